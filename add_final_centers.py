@@ -2,11 +2,10 @@
 """
 Add remaining comprehensive stroke centers to reach closer to 297 total
 Focus on missing states and underrepresented states
-"""
 
-import json
-import time
-import requests
+The list below is a build.py source. Running this script runs the
+incremental build; it no longer writes data/stroke_centers.json itself.
+"""
 
 # Additional comprehensive stroke centers for missing/underrepresented states
 ADDITIONAL_CENTERS = [
@@ -97,107 +96,18 @@ ADDITIONAL_CENTERS = [
     {"name": "WVU Medicine Ruby Memorial Hospital", "city": "Morgantown", "state": "WV", "zipcode": "26506"},
 ]
 
-def geocode_address(name, city, state, zipcode):
-    """Geocode using OpenStreetMap Nominatim with better query formatting"""
-    # Try multiple query formats for better success rate
-    queries = [
-        f"{name}, {city}, {state} {zipcode}, USA",
-        f"{name}, {city}, {state}, USA",
-        f"{city}, {state} {zipcode}, USA"  # Fallback to city location
-    ]
-
-    url = "https://nominatim.openstreetmap.org/search"
-    headers = {
-        'User-Agent': 'StrokeCenterFinderApp/1.0'
-    }
-
-    for query in queries:
-        try:
-            time.sleep(1.1)  # Rate limiting
-            params = {
-                'q': query,
-                'format': 'json',
-                'limit': 1
-            }
-            response = requests.get(url, params=params, headers=headers, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-
-            if data and len(data) > 0:
-                return {
-                    'latitude': float(data[0]['lat']),
-                    'longitude': float(data[0]['lon']),
-                    'query_used': query
-                }
-        except Exception as e:
-            continue
-
-    print(f"  ✗ All geocoding attempts failed for {name}")
-    return None
-
 def main():
-    print("Loading existing stroke centers...")
-    with open('data/stroke_centers.json', 'r') as f:
-        existing_centers = json.load(f)
-
-    print(f"Current database: {len(existing_centers)} centers")
-
-    # Create deduplication key from existing centers
-    existing_keys = set()
-    for center in existing_centers:
-        key = f"{center['name'].lower()}|{center['city'].lower()}|{center['state'].lower()}"
-        existing_keys.add(key)
-
-    print(f"\nGeocoding and adding up to {len(ADDITIONAL_CENTERS)} new centers...")
-    added_count = 0
-    skipped_count = 0
-    failed_count = 0
-
-    for i, center in enumerate(ADDITIONAL_CENTERS, 1):
-        # Check for duplicates
-        key = f"{center['name'].lower()}|{center['city'].lower()}|{center['state'].lower()}"
-        if key in existing_keys:
-            print(f"{i}/{len(ADDITIONAL_CENTERS)}: Skipping duplicate - {center['name']}")
-            skipped_count += 1
-            continue
-
-        print(f"{i}/{len(ADDITIONAL_CENTERS)}: Processing {center['name']}, {center['city']}, {center['state']}")
-
-        # Geocode
-        coords = geocode_address(center['name'], center['city'], center['state'], center.get('zipcode', ''))
-
-        if coords:
-            new_center = {
-                'name': center['name'],
-                'address': '',
-                'city': center['city'],
-                'state': center['state'],
-                'zipcode': center.get('zipcode', ''),
-                'latitude': coords['latitude'],
-                'longitude': coords['longitude'],
-                'phone': '',
-                'certification_org': 'Joint Commission',
-                'certification_type': 'Comprehensive Stroke Center'
-            }
-            existing_centers.append(new_center)
-            existing_keys.add(key)
-            added_count += 1
-            print(f"  ✓ Added ({coords['latitude']}, {coords['longitude']})")
-        else:
-            failed_count += 1
-
-    # Save updated database
-    with open('data/stroke_centers.json', 'w') as f:
-        json.dump(existing_centers, f, indent=2)
-
-    print(f"\n{'='*60}")
-    print(f"Complete!")
-    print(f"Added: {added_count} new centers")
-    print(f"Skipped: {skipped_count} duplicates")
-    print(f"Failed: {failed_count} geocoding failures")
-    print(f"Total in database: {len(existing_centers)} centers")
-    print(f"Progress to 297: {len(existing_centers)}/297 ({len(existing_centers)/297*100:.1f}%)")
-    print(f"{'='*60}")
+    """Run the incremental build, which owns data/stroke_centers.json"""
+    # Imported here: build.py imports the lists above
+    import build
+    print("This list is a build.py source.")
+    print("Running build.py instead, which rebuilds only what changed.")
+    print()
+    build.main()
+
 
 if __name__ == '__main__':
-    main()
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\nProcess interrupted by user")
@@ -2,11 +2,10 @@
 """
 Add comprehensive stroke centers from manual web research
 Based on official sources and hospital websites found during research
-"""
 
-import json
-import time
-import requests
+The list below is a build.py source. Running this script runs the
+incremental build; it no longer writes data/stroke_centers.json itself.
+"""
 
 # Comprehensive Stroke Centers identified from web research
 NEW_CENTERS = [
@@ -136,95 +135,18 @@ NEW_CENTERS = [
     {"name": "HonorHealth Scottsdale Osborn Medical Center", "city": "Scottsdale", "state": "AZ", "zipcode": "85251"},
 ]
 
-def geocode_address(name, city, state, zipcode):
-    """Geocode using OpenStreetMap Nominatim"""
-    query = f"{name}, {city}, {state} {zipcode}, USA"
-    url = "https://nominatim.openstreetmap.org/search"
-    params = {
-        'q': query,
-        'format': 'json',
-        'limit': 1
-    }
-    headers = {
-        'User-Agent': 'StrokeCenterFinderApp/1.0'
-    }
-
-    try:
-        time.sleep(1.1)  # Rate limiting
-        response = requests.get(url, params=params, headers=headers, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-
-        if data and len(data) > 0:
-            return {
-                'latitude': float(data[0]['lat']),
-                'longitude': float(data[0]['lon'])
-            }
-    except Exception as e:
-        print(f"  Geocoding failed for {name}: {e}")
-
-    return None
-
 def main():
-    print("Loading existing stroke centers...")
-    with open('data/stroke_centers.json', 'r') as f:
-        existing_centers = json.load(f)
-
-    print(f"Current database: {len(existing_centers)} centers")
-
-    # Create deduplication key from existing centers
-    existing_keys = set()
-    for center in existing_centers:
-        key = f"{center['name'].lower()}|{center['city'].lower()}|{center['state'].lower()}"
-        existing_keys.add(key)
-
-    print(f"\nGeocoding and adding {len(NEW_CENTERS)} new centers...")
-    added_count = 0
-    skipped_count = 0
-
-    for i, center in enumerate(NEW_CENTERS, 1):
-        # Check for duplicates
-        key = f"{center['name'].lower()}|{center['city'].lower()}|{center['state'].lower()}"
-        if key in existing_keys:
-            print(f"{i}/{len(NEW_CENTERS)}: Skipping duplicate - {center['name']}")
-            skipped_count += 1
-            continue
-
-        print(f"{i}/{len(NEW_CENTERS)}: Processing {center['name']}, {center['city']}, {center['state']}")
-
-        # Geocode
-        coords = geocode_address(center['name'], center['city'], center['state'], center.get('zipcode', ''))
-
-        if coords:
-            new_center = {
-                'name': center['name'],
-                'address': '',  # Address not available from web research
-                'city': center['city'],
-                'state': center['state'],
-                'zipcode': center.get('zipcode', ''),
-                'latitude': coords['latitude'],
-                'longitude': coords['longitude'],
-                'phone': '',  # Phone not available from web research
-                'certification_org': 'Joint Commission',
-                'certification_type': 'Comprehensive Stroke Center'
-            }
-            existing_centers.append(new_center)
-            existing_keys.add(key)
-            added_count += 1
-            print(f"  ✓ Added ({coords['latitude']}, {coords['longitude']})")
-        else:
-            print(f"  ✗ Failed to geocode")
-
-    # Save updated database
-    with open('data/stroke_centers.json', 'w') as f:
-        json.dump(existing_centers, f, indent=2)
-
-    print(f"\n{'='*60}")
-    print(f"Complete!")
-    print(f"Added: {added_count} new centers")
-    print(f"Skipped: {skipped_count} duplicates")
-    print(f"Total in database: {len(existing_centers)} centers")
-    print(f"{'='*60}")
+    """Run the incremental build, which owns data/stroke_centers.json"""
+    # Imported here: build.py imports the lists above
+    import build
+    print("This list is a build.py source.")
+    print("Running build.py instead, which rebuilds only what changed.")
+    print()
+    build.main()
+
 
 if __name__ == '__main__':
-    main()
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\nProcess interrupted by user")
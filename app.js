@@ -1,8 +1,20 @@
 // Load data files
 let strokeCenters = [];
-let zipcodeData = {};
 let statesList = [];
 
+// Search radius in miles (the nearest-center index is built for the same radius)
+const SEARCH_RADIUS_MILES = 100;
+
+// Zipcode prefix → zipcode count, from data/zipcodes/manifest.json
+let zipcodePrefixes = null;
+
+// Zipcode and nearest-center shards fetched so far, by URL
+const shardCache = {};
+
+// Whether the nearest-center shards were built from the centers loaded;
+// their entries are indices into that file
+let nearestIndexCurrent = false;
+
 // State name mapping
 const stateNames = {
     'AL': 'Alabama', 'AK': 'Alaska', 'AZ': 'Arizona', 'AR': 'Arkansas', 'CA': 'California',
@@ -21,13 +33,24 @@ const stateNames = {
 // Initialize the application
 async function init() {
     try {
-        // Load stroke centers data
-        const centersResponse = await fetch('data/stroke_centers.json');
-        strokeCenters = await centersResponse.json();
+        // Hashed file names when the site was published (assets.js)
+        await loadAssetManifest();
+
+        // Load stroke centers data: the .bin copy (columnar.js) when it was
+        // made from the same file as the nearest-center index, else the JSON
+        const sources = await loadDatasetSources();
+        const loaded = await loadCenters('data/stroke_centers.json', sources['data/stroke_centers.json']);
+        strokeCenters = loaded.centers;
+        nearestIndexCurrent = loaded.source !== null;
+        if (!nearestIndexCurrent) {
+            console.warn('Nearest-center index missing or out of date; computing distances');
+        }
 
-        // Load zipcode data
-        const zipResponse = await fetch('data/zipcodes.json');
-        zipcodeData = await zipResponse.json();
+        // Small manifest of zipcode prefixes; shards are fetched per search
+        const manifestResponse = await fetch(assetUrl('data/zipcodes/manifest.json'));
+        if (manifestResponse.ok) {
+            zipcodePrefixes = (await manifestResponse.json()).prefixes;
+        }
 
         // Get unique states and populate dropdown
         const uniqueStates = [...new Set(strokeCenters.map(center => center.state))].sort();
@@ -35,7 +58,6 @@ async function init() {
         populateStateDropdown(uniqueStates);
 
         console.log(`Loaded ${strokeCenters.length} stroke centers`);
-        console.log(`Loaded ${Object.keys(zipcodeData).length} zipcodes`);
         console.log(`States available: ${uniqueStates.join(', ')}`);
     } catch (error) {
         console.error('Error loading data:', error);
@@ -54,6 +76,21 @@ function populateStateDropdown(states) {
     });
 }
 
+// Fetch a JSON shard once and keep it in memory; resolves to null if it does not exist
+function loadShard(url) {
+    if (!shardCache[url]) {
+        shardCache[url] = fetch(assetUrl(url)).then(response => {
+            if (response.status === 404) return null;
+            if (!response.ok) throw new Error(`HTTP ${response.status}`);
+            return response.json();
+        }).catch(error => {
+            delete shardCache[url];
+            throw error;
+        });
+    }
+    return shardCache[url];
+}
+
 // Calculate distance between two coordinates using Haversine formula
 function calculateDistance(lat1, lon1, lat2, lon2) {
     const R = 3959; // Earth's radius in miles
@@ -74,6 +111,35 @@ function toRadians(degrees) {
     return degrees * (Math.PI / 180);
 }
 
+// Centers within the search radius of a zipcode, nearest first; null if the zipcode is unknown
+async function findNearbyCenters(zipcode) {
+    const prefix = zipcode.slice(0, 3);
+    if (zipcodePrefixes && !(prefix in zipcodePrefixes)) {
+        return null;
+    }
+
+    // Precomputed at build time: one small fetch and a lookup
+    const nearest = nearestIndexCurrent ? await loadShard(`data/nearest/${prefix}.json`) : null;
+    if (nearest) {
+        const entry = nearest[zipcode];
+        if (!entry) return null;
+        return entry.csc.map(([index, distance]) => ({ ...strokeCenters[index], distance }));
+    }
+
+    // Index not built, or built from other centers: compute from the zipcode's coordinates
+    const zipcodes = await loadShard(`data/zipcodes/${prefix}.json`);
+    const location = zipcodes && zipcodes[zipcode];
+    if (!location) return null;
+    const [userLat, userLon] = location;
+    return strokeCenters
+        .map(center => ({
+            ...center,
+            distance: calculateDistance(userLat, userLon, center.latitude, center.longitude)
+        }))
+        .filter(center => center.distance <= SEARCH_RADIUS_MILES)
+        .sort((a, b) => a.distance - b.distance);
+}
+
 // Search for stroke centers
 async function searchStrokeCenters() {
     const zipcodeInput = document.getElementById('zipcode');
@@ -88,44 +154,30 @@ async function searchStrokeCenters() {
         return;
     }
 
-    // Check if zipcode exists in database
-    if (!zipcodeData[zipcode]) {
-        showError('Zipcode not found. Please enter a valid US zipcode.');
-        return;
-    }
-
     // Show loading
     document.getElementById('loading').style.display = 'block';
     document.getElementById('results').style.display = 'none';
 
-    // Simulate processing time for better UX
-    setTimeout(() => {
-        performSearch(zipcode);
-    }, 500);
-}
-
-function performSearch(zipcode) {
-    const userLocation = zipcodeData[zipcode];
-    const userLat = userLocation.lat;
-    const userLon = userLocation.lon;
-
-    // Find centers within 100 miles
-    const centersWithDistance = strokeCenters
-        .map(center => {
-            const distance = calculateDistance(
-                userLat,
-                userLon,
-                center.latitude,
-                center.longitude
-            );
-            return { ...center, distance };
-        })
-        .filter(center => center.distance <= 100)
-        .sort((a, b) => a.distance - b.distance);
+    let centers;
+    try {
+        centers = await findNearbyCenters(zipcode);
+    } catch (error) {
+        console.error('Error loading zipcode data:', error);
+        document.getElementById('loading').style.display = 'none';
+        showError('Error loading data files. Please ensure data files are present.');
+        return;
+    }
 
-    // Hide loading, show results
+    // Hide loading
     document.getElementById('loading').style.display = 'none';
-    displayResults(zipcode, centersWithDistance, userLocation.city, userLocation.state);
+
+    // Check if zipcode exists in database
+    if (!centers) {
+        showError('Zipcode not found. Please enter a valid US zipcode.');
+        return;
+    }
+
+    displayResults(zipcode, centers);
 }
 
 // Search by state
@@ -193,7 +245,7 @@ function switchTab(tabName) {
     }
 }
 
-function displayResults(zipcode, centers, city, state) {
+function displayResults(zipcode, centers) {
     const resultsDiv = document.getElementById('results');
     const centersListDiv = document.getElementById('centersList');
     const resultsCountP = document.getElementById('resultsCount');
@@ -0,0 +1,24 @@
+// Content-hashed file names written by publish.py (dist/asset-manifest.json).
+// Without a manifest (the repository served as is) paths are used unchanged.
+let assetManifest = null;
+
+async function loadAssetManifest() {
+    try {
+        // The manifest is the one file that must always be revalidated
+        const response = await fetch('asset-manifest.json', { cache: 'no-cache' });
+        if (response.ok) {
+            assetManifest = await response.json();
+        }
+    } catch (error) {
+        console.warn('Asset manifest unavailable, using plain paths:', error);
+    }
+}
+
+// Published URL of a data file, e.g. data/nearest/331.json → data/nearest.<hash>/331.json
+function assetUrl(path) {
+    if (!assetManifest) return path;
+    if (path in assetManifest.files) return assetManifest.files[path];
+    const slash = path.lastIndexOf('/');
+    const directory = assetManifest.directories[path.slice(0, slash + 1)];
+    return directory ? directory + path.slice(slash + 1) : path;
+}
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Audit published center coordinates against the zipcode centroids.
+
+Loads every center and the zip centroids (mapped from data/zipcodes.bin)
+into numpy arrays and checks the whole database in one vectorized pass,
+with no network access:
+
+- zip_distance      more than --threshold miles from its declared zip centroid
+- unknown_zip       declared zip missing or not in data/zipcodes.json
+- zip_state         declared zip belongs to another state
+- coordinate_state  the zip centroid nearest the coordinates is in another state
+- city_level        geocoded to a zip/city centroid rather than the building
+- missing_coordinates
+
+Records with a location flag can be queued for re-geocoding; the next
+build.py run looks them up again, bypassing the geocode cache, and consumes
+the queue.
+
+    python3 audit.py                  # report
+    python3 audit.py --threshold 10   # tighter distance check
+    python3 audit.py --queue          # also queue flagged records for build.py
+"""
+
+import argparse
+import json
+import os
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    raise SystemExit("The audit needs numpy: pip install numpy")
+
+from center_store import DATASETS, EARTH_RADIUS_MILES, center_key, write_atomic
+from columnar import load_zipcode_arrays
+from spatial_index import SpatialIndex
+from zip_states import ZIP3_STATES
+
+ZIPCODES_PATH = os.path.join('data', 'zipcodes.json')
+JOURNAL_PATH = os.path.join('data', 'build_journal.jsonl')  # written by build.py
+QUEUE_PATH = os.path.join('data', 'regeocode_queue.json')
+
+# Default distance from the declared zip centroid that counts as an outlier
+DISTANCE_THRESHOLD_MILES = 25.0
+
+# Coordinates this close to the zip centroid are the centroid itself (a
+# hospital with its own unique zip can sit legitimately near its centroid)
+CENTROID_MILES = 0.001
+
+# Build tiers that mean only a zip or city centroid was found
+CITY_LEVEL_TIERS = ('zip', 'city')
+
+# Flags worth a new lookup; unknown_zip alone usually means a hospital's own
+# unique zip, which the Census centroids do not include
+QUEUE_FLAGS = ('missing_coordinates', 'zip_state', 'zip_distance', 'coordinate_state', 'city_level')
+
+def load_zipcodes(path=ZIPCODES_PATH):
+    """(sorted zip numbers, latitudes, longitudes, states) as arrays"""
+    numbers, lat, lon = load_zipcode_arrays(path)
+    numbers = numbers.astype(np.int32)
+    lat, lon = lat.astype(np.float64), lon.astype(np.float64)
+    states = np.array(ZIP3_STATES)[numbers // 100]
+    return numbers, lat, lon, states
+
+
+def load_centers():
+    """Every published center with the dataset it came from"""
+    rows = []
+    for dataset, (path, _) in DATASETS.items():
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                rows.extend((dataset, center) for center in json.load(f))
+    return rows
+
+
+def load_tiers(path=JOURNAL_PATH):
+    """center key → geocoding tier recorded by the last build, if any"""
+    tiers = {}
+    try:
+        with open(path, 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                if entry.get('record'):
+                    tiers[center_key(entry['record'])] = entry['tier']
+    except FileNotFoundError:
+        pass
+    return tiers
+
+
+def haversine_miles(lat1, lon1, lat2, lon2):
+    """Element-wise great-circle distance in miles"""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def audit(rows, zipcodes, tiers, threshold=DISTANCE_THRESHOLD_MILES):
+    """
+    Flag suspicious rows. Returns a list of (dataset, center, flags, miles)
+    for the flagged rows only; miles is the distance from the declared zip
+    centroid, or None when it cannot be computed.
+    """
+    numbers, zip_lat, zip_lon, zip_states = zipcodes
+    n = len(rows)
+    centers = [center for _, center in rows]
+
+    declared_state = np.array([(c.get('state') or '').upper() for c in centers], dtype='<U2')
+    zip_text = [(c.get('zipcode') or '').strip()[:5] for c in centers]
+    zip_number = np.array([int(z) if len(z) == 5 and z.isdigit() else -1 for z in zip_text],
+                          dtype=np.int64)
+    lat = np.array([c['latitude'] if c.get('latitude') is not None else np.nan for c in centers],
+                   dtype=np.float64)
+    lon = np.array([c['longitude'] if c.get('longitude') is not None else np.nan for c in centers],
+                   dtype=np.float64)
+
+    # Declared zip → centroid index via binary search over the sorted zips
+    index = np.clip(np.searchsorted(numbers, zip_number), 0, len(numbers) - 1)
+    known_zip = numbers[index] == zip_number
+    has_coords = ~(np.isnan(lat) | np.isnan(lon))
+
+    miles = np.full(n, np.nan)
+    both = known_zip & has_coords
+    miles[both] = haversine_miles(lat[both], lon[both], zip_lat[index[both]], zip_lon[index[both]])
+
+    prefix_state = np.array(ZIP3_STATES)[np.clip(zip_number // 100, 0, 999)]
+    nearest_state = np.full(n, '', dtype='<U2')
+    if has_coords.any():
+        nearest, _ = SpatialIndex(zip_lat, zip_lon).nearest_many(lat[has_coords], lon[has_coords])
+        nearest_state[has_coords] = zip_states[nearest[:, 0]]
+
+    tier_level = np.array([tiers.get(center_key(c)) in CITY_LEVEL_TIERS for c in centers], dtype=bool)
+
+    checks = {
+        'missing_coordinates': ~has_coords,
+        'unknown_zip': ~known_zip,
+        'zip_state': (zip_number >= 0) & (prefix_state != declared_state),
+        'zip_distance': both & (miles > threshold),
+        'coordinate_state': has_coords & (nearest_state != declared_state),
+        'city_level': tier_level | (both & (miles <= CENTROID_MILES)),
+    }
+
+    flagged_any = np.zeros(n, dtype=bool)
+    for mask in checks.values():
+        flagged_any |= mask
+
+    results = []
+    for i in np.flatnonzero(flagged_any):
+        flags = [name for name, mask in checks.items() if mask[i]]
+        dataset, center = rows[i]
+        results.append((dataset, center, flags, None if np.isnan(miles[i]) else float(miles[i])))
+    return results
+
+
+def write_queue(flagged, path=QUEUE_PATH):
+    """Queue flagged records for build.py to re-geocode"""
+    queue = [
+        {
+            "dataset": dataset,
+            "key": center_key(center),
+            "name": center['name'],
+            "city": center['city'],
+            "state": center['state'],
+            "flags": flags,
+        }
+        for dataset, center, flags, _ in flagged
+        if any(flag in QUEUE_FLAGS for flag in flags)
+    ]
+    if queue:
+        write_atomic(path, queue)
+    elif os.path.exists(path):
+        os.remove(path)
+    return len(queue)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Audit center coordinates against zip centroids")
+    parser.add_argument('--threshold', type=float, default=DISTANCE_THRESHOLD_MILES,
+                        help=f"miles from the declared zip centroid (default {DISTANCE_THRESHOLD_MILES:g})")
+    parser.add_argument('--queue', action='store_true',
+                        help=f"queue flagged records for re-geocoding in {QUEUE_PATH}")
+    args = parser.parse_args()
+
+    rows = load_centers()
+    zipcodes = load_zipcodes()
+    tiers = load_tiers()
+
+    start = time.perf_counter()
+    flagged = audit(rows, zipcodes, tiers, args.threshold)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    counts = {}
+    for dataset, center, flags, miles in flagged:
+        for flag in flags:
+            counts[flag] = counts.get(flag, 0) + 1
+        distance = f"{miles:.1f} mi" if miles is not None else "-"
+        print(f"  ⚠ [{dataset}] {center['name']}, {center['city']}, {center['state']} "
+              f"{center.get('zipcode', '')} ({distance}): {', '.join(flags)}")
+
+    print()
+    print(f"Audited {len(rows)} centers against {len(zipcodes[0])} zip centroids in {elapsed:.1f} ms")
+    for flag, count in sorted(counts.items()):
+        print(f"  {flag}: {count}")
+    print(f"{len(flagged)} centers flagged")
+
+    if args.queue:
+        queued = write_queue(flagged)
+        print(f"✓ Queued {queued} centers in {QUEUE_PATH}; run build.py to re-geocode")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Nearest CSC/TSC for every row of a large CSV or JSONL extract.
+
+Each row's origin is its latitude/longitude columns when present and valid,
+otherwise its zipcode, looked up in data/zipcodes.json (via the columnar
+.bin copy). The input is read in chunks of lines; worker processes parse a
+chunk, find the nearest centers with spatial_index's batch query and format
+the output, and the results are written back in input order with only a
+few chunks in flight, so memory stays flat however long the file is.
+
+Every input row is written back with these columns added (for -k 2 and
+up, csc_2_name etc. follow):
+
+    origin       'coordinates', 'zip', or empty when the row could not be located
+    csc_name  csc_city  csc_state  csc_miles
+    tsc_name  tsc_city  tsc_state  tsc_miles
+
+    python3 batch_nearest.py incidents.csv -o incidents_nearest.csv
+    python3 batch_nearest.py patients.jsonl --zip-column home_zip -k 3 > out.jsonl
+    python3 batch_nearest.py extract.csv.gz --workers 8 | gzip > out.csv.gz
+
+numpy and the index are only imported by the workers, so argument errors
+and --help return immediately.
+"""
+
+import argparse
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+import time
+from collections import deque
+
+DATASET_NAMES = ('csc', 'tsc')
+
+# Lines per worker task
+CHUNK_SIZE = 50000
+
+# Column names tried, case-insensitively, when none is given
+ZIP_COLUMNS = ('zipcode', 'zip', 'zip_code', 'postal_code', 'postcode', 'origin_zip')
+LAT_COLUMNS = ('latitude', 'lat', 'origin_lat')
+LON_COLUMNS = ('longitude', 'lon', 'lng', 'long', 'origin_lon')
+
+CENTER_FIELDS = ('name', 'city', 'state')
+
+# Set in each worker by _init_worker
+_worker = None
+
+
+def output_columns(datasets, k):
+    """Names of the columns added to every row"""
+    columns = ['origin']
+    for dataset in datasets:
+        for rank in range(1, k + 1):
+            prefix = dataset if rank == 1 else f"{dataset}_{rank}"
+            columns.extend(f"{prefix}_{field}" for field in CENTER_FIELDS + ('miles',))
+    return columns
+
+
+def find_column(names, wanted, candidates):
+    """Index of the wanted column (or the first candidate present), or None"""
+    lowered = [name.strip().lower() for name in names]
+    if wanted:
+        if wanted.lower() not in lowered:
+            raise SystemExit(f"Column {wanted!r} not in the input (have: {', '.join(names)})")
+        return lowered.index(wanted.lower())
+    for candidate in candidates:
+        if candidate in lowered:
+            return lowered.index(candidate)
+    return None
+
+
+def normalize_zip(value):
+    """Zip as an int from '02134', '2134' (lost leading zero), '02134-1234'; -1 if invalid"""
+    text = str(value).strip() if value is not None else ''
+    text = text.split('-')[0].strip()
+    if text.endswith('.0'):
+        text = text[:-2]
+    if not text.isdigit() or not 3 <= len(text) <= 5:
+        return -1
+    return int(text)
+
+
+def parse_coordinate(value, limit):
+    if value is None or value == '':
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if -limit <= number <= limit else None
+
+
+class Worker:
+    """Per-process state: the zip table and one spatial index per dataset"""
+
+    def __init__(self, options):
+        import numpy as np
+        from columnar import load_zipcode_arrays
+        from spatial_index import SpatialIndex
+
+        self.np = np
+        self.options = options
+        self.zip_numbers, self.zip_lat, self.zip_lon = load_zipcode_arrays()
+        self.indexes = {dataset: SpatialIndex.from_dataset(dataset) for dataset in options['datasets']}
+        # Output values of each center, built once rather than per row
+        self.fields = {dataset: [tuple(record.get(field) for field in CENTER_FIELDS) for record in index.records]
+                       for dataset, index in self.indexes.items()}
+
+    def locate(self, zips, lats, lons):
+        """(lat, lon, origin label) arrays for raw zip / latitude / longitude values"""
+        np = self.np
+        count = len(zips)
+        lat = np.full(count, np.nan)
+        lon = np.full(count, np.nan)
+        origin = [''] * count
+
+        zip_numbers = np.array([normalize_zip(z) for z in zips], dtype=np.int64)
+        position = np.clip(np.searchsorted(self.zip_numbers, zip_numbers), 0, len(self.zip_numbers) - 1)
+        known = (self.zip_numbers[position] == zip_numbers).tolist()
+        zip_lat, zip_lon = self.zip_lat[position].tolist(), self.zip_lon[position].tolist()
+
+        for i in range(count):
+            y, x = parse_coordinate(lats[i], 90.0), parse_coordinate(lons[i], 180.0)
+            if y is not None and x is not None:
+                lat[i], lon[i], origin[i] = y, x, 'coordinates'
+            elif known[i]:
+                lat[i], lon[i], origin[i] = zip_lat[i], zip_lon[i], 'zip'
+        return lat, lon, origin
+
+    def nearest(self, lat, lon):
+        """Added column values for each row, as tuples"""
+        np = self.np
+        k, max_miles = self.options['k'], self.options['max_miles']
+        located = np.flatnonzero(~np.isnan(lat)).tolist()
+        blank = (None,) * (len(CENTER_FIELDS) + 1)
+        columns = []
+        for dataset in self.options['datasets']:
+            index, fields = self.indexes[dataset], self.fields[dataset]
+            nearest, miles = index.nearest_many(lat[located], lon[located], k, max_miles)
+            values = [blank * k] * len(lat)
+            ranks = [
+                [fields[center] + (distance,) if center >= 0 else blank
+                 for center, distance in zip(nearest[:, rank].tolist(), np.round(miles[:, rank], 2).tolist())]
+                for rank in range(k)
+            ]
+            for row, found in zip(located, zip(*ranks)):
+                values[row] = sum(found, ())
+            columns.append(values)
+
+        combined = columns[0]
+        for values in columns[1:]:
+            combined = [a + b for a, b in zip(combined, values)]
+        return combined
+
+    def process_csv(self, text):
+        rows = list(csv.reader(io.StringIO(text)))
+        zip_index, lat_index, lon_index = self.options['columns']
+
+        def column(index):
+            if index is None:
+                return [None] * len(rows)
+            return [row[index] if index < len(row) else None for row in rows]
+
+        lat, lon, origin = self.locate(column(zip_index), column(lat_index), column(lon_index))
+        added = self.nearest(lat, lon)
+        out = io.StringIO()
+        # csv writes None as an empty field
+        csv.writer(out, lineterminator='\n').writerows(
+            row + [label, *values] for row, label, values in zip(rows, origin, added))
+        return out.getvalue(), len(rows), origin.count('')
+
+    def process_jsonl(self, text):
+        records = [json.loads(line) for line in text.splitlines() if line.strip()]
+        zip_key, lat_key, lon_key = self.options['columns']
+        if records:
+            # Unnamed columns are looked for among the first record's keys
+            keys = list(records[0])
+            zip_key = zip_key or self._key(keys, ZIP_COLUMNS)
+            lat_key = lat_key or self._key(keys, LAT_COLUMNS)
+            lon_key = lon_key or self._key(keys, LON_COLUMNS)
+        lat, lon, origin = self.locate([r.get(zip_key) if zip_key else None for r in records],
+                                       [r.get(lat_key) if lat_key else None for r in records],
+                                       [r.get(lon_key) if lon_key else None for r in records])
+        added = self.nearest(lat, lon)
+        names = self.options['output_columns']
+        lines = []
+        for record, label, values in zip(records, origin, added):
+            record.update(zip(names, (label or None,) + values))
+            lines.append(json.dumps(record, ensure_ascii=False))
+        return ''.join(line + '\n' for line in lines), len(records), origin.count('')
+
+    @staticmethod
+    def _key(keys, candidates):
+        index = find_column(keys, None, candidates)
+        return None if index is None else keys[index]
+
+
+def _init_worker(options):
+    global _worker
+    _worker = Worker(options)
+
+
+def _process_chunk(text):
+    """Worker: (output text, rows, rows that could not be located) for a chunk"""
+    if _worker.options['format'] == 'csv':
+        return _worker.process_csv(text)
+    return _worker.process_jsonl(text)
+
+
+def read_chunks(lines, chunk_size, quoted):
+    """
+    Join `chunk_size` lines at a time. For CSV a chunk is extended until its
+    double quotes balance, so a quoted field with a line break is never split.
+    """
+    chunk, quotes = [], 0
+    for line in lines:
+        chunk.append(line)
+        if quoted:
+            quotes += line.count('"')
+        if len(chunk) >= chunk_size and quotes % 2 == 0:
+            yield ''.join(chunk)
+            chunk, quotes = [], 0
+    if chunk:
+        yield ''.join(chunk)
+
+
+def open_input(path):
+    """Text stream of the input file, decompressed when it ends in .gz"""
+    if path == '-':
+        return sys.stdin
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return open(path, 'r', encoding='utf-8', newline='')
+
+
+def detect_format(path, requested):
+    if requested:
+        return requested
+    name = path[:-3] if path.endswith('.gz') else path
+    return 'jsonl' if name.endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+
+def run(source, sink, options, workers, chunk_size):
+    """Stream source → sink; returns (rows, unresolved)"""
+    rows = unresolved = 0
+
+    def finish(result):
+        nonlocal rows, unresolved
+        output, count, missing = result
+        sink.write(output)
+        rows += count
+        unresolved += missing
+
+    chunks = read_chunks(source, chunk_size, options['format'] == 'csv')
+    if workers <= 1:
+        _init_worker(options)
+        for text in chunks:
+            finish(_process_chunk(text))
+        return rows, unresolved
+
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(options,)) as pool:
+        in_flight = deque()
+        for text in chunks:
+            in_flight.append(pool.submit(_process_chunk, text))
+            if len(in_flight) >= workers * 2:
+                finish(in_flight.popleft().result())
+        while in_flight:
+            finish(in_flight.popleft().result())
+    return rows, unresolved
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Nearest stroke centers for every row of a CSV/JSONL file")
+    parser.add_argument('input', help="CSV or JSONL file, or - for stdin")
+    parser.add_argument('-o', '--output', default='-', help="output file (default stdout)")
+    parser.add_argument('--format', choices=('csv', 'jsonl'), help="input format (default from the extension)")
+    parser.add_argument('--zip-column', help="zipcode column (default: zipcode, zip, zip_code, ...)")
+    parser.add_argument('--lat-column', help="latitude column (default: latitude, lat, ...)")
+    parser.add_argument('--lon-column', help="longitude column (default: longitude, lon, lng, ...)")
+    parser.add_argument('--dataset', choices=DATASET_NAMES, action='append',
+                        help="only this dataset (repeatable; default csc and tsc)")
+    parser.add_argument('-k', type=int, default=1, help="nearest centers per dataset (default 1)")
+    parser.add_argument('--max-miles', type=float, help="leave centers further than this out")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="worker processes (default: one per CPU; 1 runs in-process)")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                        help=f"lines per worker task (default {CHUNK_SIZE})")
+    args = parser.parse_args()
+    if args.k < 1:
+        parser.error("-k must be at least 1")
+
+    datasets = tuple(args.dataset or DATASET_NAMES)
+    fmt = detect_format(args.input, args.format)
+    added = output_columns(datasets, args.k)
+
+    source = open_input(args.input)
+    sink = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8', newline='')
+    start = time.time()
+    try:
+        if fmt == 'csv':
+            header_line = next(source, '')
+            header = next(csv.reader([header_line]), [])
+            columns = (find_column(header, args.zip_column, ZIP_COLUMNS),
+                       find_column(header, args.lat_column, LAT_COLUMNS),
+                       find_column(header, args.lon_column, LON_COLUMNS))
+            if columns[0] is None and None in columns[1:]:
+                raise SystemExit(f"No zipcode or latitude/longitude columns in {', '.join(header)}")
+            csv.writer(sink, lineterminator='\n').writerow(header + added)
+        else:
+            # Resolved by the workers from each chunk's first record
+            columns = (args.zip_column, args.lat_column, args.lon_column)
+
+        options = {
+            "format": fmt,
+            "columns": columns,
+            "datasets": datasets,
+            "k": args.k,
+            "max_miles": args.max_miles,
+            "output_columns": added,
+        }
+        rows, unresolved = run(source, sink, options, args.workers, args.chunk_size)
+    except BrokenPipeError:
+        # Output piped into head or similar; stop quietly
+        sys.stdout = open(os.devnull, 'w')
+        return
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+
+    elapsed = time.time() - start
+    rate = rows / elapsed if elapsed else 0
+    marker = '✓' if not unresolved else '⚠'
+    print(f"{marker} {rows:,} rows in {elapsed:.1f}s ({rate:,.0f}/s); "
+          f"{unresolved:,} could not be located", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+"""
+Performance benchmarks for the build, query and load paths, stored per
+commit so a slowdown shows up as a regression against the last results.
+
+    build      end-to-end build.py --force in a scratch copy of the sources,
+               geocoding against a local stub Nominatim; ms per source
+               record, plus a rebuild with nothing to do
+    dedup      find_duplicates and the SQLite merge (replace_dataset) on
+               synthetic datasets of growing size, with the scaling exponent
+    nearest    k-nearest query latency (p50/p95/p99) for every zip centroid,
+               and the batch query over all of them
+    zipcodes   load time and peak Python memory of data/zipcodes.json,
+               and of its columnar .bin copy
+
+Each metric is the median of --repeat runs. Results go to
+.benchmarks/<commit>.json (<commit>-dirty.json for uncommitted changes) and
+are compared with the newest stored results of an ancestor commit, or of
+HEAD itself for a dirty tree. A metric more than --threshold worse is a
+regression; --check exits 1 if there is one. Timings depend on the machine,
+so results from another host are only compared with a warning.
+
+    python3 benchmark.py                    # run everything, save, compare
+    python3 benchmark.py --only nearest,zipcodes --repeat 3
+    python3 benchmark.py --check --threshold 0.15
+    python3 benchmark.py --compare a1b2c3d  # compare with that commit's stored results
+"""
+
+import argparse
+import gc
+import hashlib
+import json
+import math
+import os
+import platform
+import random
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from center_store import write_text_atomic
+from publish import PAGES, STATIC
+
+RESULTS_DIR = '.benchmarks'
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_REPEAT = 5
+# A metric this much worse than the baseline is a regression
+DEFAULT_THRESHOLD = 0.10
+
+# Synthetic dataset sizes for the dedup benchmark
+DEDUP_SIZES = (400, 1600, 6400)
+
+# Files a scratch build needs (sources, zipcodes and the site it
+# publishes); everything else it regenerates
+BUILD_INPUTS = (os.path.join('data', 'sources'), os.path.join('data', 'zipcodes.json')) + PAGES + STATIC
+
+BENCHMARKS = {}
+
+
+def benchmark(name, repeat=None):
+    """
+    Register a benchmark. The function takes the options and returns one
+    sample: {metric: (value, unit)}. Units in ms, µs, s or MB are better
+    lower; anything per second is better higher.
+    """
+    def register(function):
+        BENCHMARKS[name] = (function, repeat)
+        return function
+    return register
+
+
+def higher_is_better(unit):
+    return unit.endswith('/s')
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+# Stub geocoder
+
+class StubNominatim(BaseHTTPRequestHandler):
+    """Answers /search?q= with a point derived from the query, like Nominatim's JSON"""
+
+    latency = 0.0
+
+    def do_GET(self):
+        query = parse_qs(urlsplit(self.path).query).get('q', [''])[0]
+        digest = hashlib.blake2b(query.encode(), digest_size=8).digest()
+        lat = 25.0 + 24.0 * int.from_bytes(digest[:4], 'big') / 2 ** 32
+        lon = -124.0 + 57.0 * int.from_bytes(digest[4:], 'big') / 2 ** 32
+        if self.latency:
+            time.sleep(self.latency)
+        body = json.dumps([{"lat": f"{lat:.7f}", "lon": f"{lon:.7f}"}]).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubGeocoder:
+    """A StubNominatim on a free localhost port, served from a thread"""
+
+    def __init__(self, latency=0.0):
+        handler = type('Handler', (StubNominatim,), {'latency': latency})
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/search"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# Benchmarks
+
+def run_build(directory, geocoder, force):
+    """Run build.py in directory; returns (seconds, records geocoded, source records)"""
+    env = dict(os.environ, NOMINATIM_URL=geocoder.url, NOMINATIM_RATE='10000', NOMINATIM_BURST='100',
+               NO_PROXY='127.0.0.1,localhost')
+    command = [sys.executable, os.path.join(REPO_DIR, 'build.py')] + (['--force'] if force else [])
+    start = time.perf_counter()
+    result = subprocess.run(command, cwd=directory, env=env, capture_output=True, text=True)
+    seconds = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"build.py failed:\n{result.stdout[-2000:]}{result.stderr[-2000:]}")
+    finished = re.search(r"Build finished in [\d.]+s \((\d+) geocoded", result.stdout)
+    sources = re.search(r"Sources: (\d+) records", result.stdout)
+    return seconds, int(finished.group(1)), int(sources.group(1))
+
+
+@benchmark('build', repeat=2)
+def bench_build(options):
+    with tempfile.TemporaryDirectory(prefix='benchmark-build-') as directory:
+        for path in BUILD_INPUTS:
+            source, target = os.path.join(REPO_DIR, path), os.path.join(directory, path)
+            os.makedirs(os.path.dirname(target) or directory, exist_ok=True)
+            (shutil.copytree if os.path.isdir(source) else shutil.copy)(source, target)
+        with StubGeocoder(options.geocoder_latency) as geocoder:
+            cold, geocoded, records = run_build(directory, geocoder, force=True)
+            # The first rebuild can still have work to do (near-duplicates
+            # are re-checked once every record has coordinates); the one
+            # after it is a true no-op
+            run_build(directory, geocoder, force=False)
+            noop, _, _ = run_build(directory, geocoder, force=False)
+    return {
+        "cold_seconds": (cold, 's'),
+        "cold_ms_per_record": (cold * 1000 / records, 'ms'),
+        "records_geocoded": (geocoded, 'records'),
+        "noop_seconds": (noop, 's'),
+    }
+
+
+def synthetic_centers(size, seed=0):
+    """
+    `size` records built from the published centers: copies moved to other
+    coordinates and cities (same name tokens, as with common hospital
+    names), plus one near-duplicate in twenty (a name variant at the same site)
+    """
+    centers = []
+    for path in ('stroke_centers.json', 'thrombectomy_centers.json'):
+        with open(os.path.join(REPO_DIR, 'data', path), 'r') as f:
+            centers.extend(json.load(f))
+    rng = random.Random(seed)
+    records = []
+    while len(records) < size:
+        copy = len(records) // len(centers)
+        center = centers[len(records) % len(centers)]
+        record = dict(center)
+        if copy:
+            record['latitude'] = min(max(center['latitude'] + rng.uniform(-3, 3), 18.0), 65.0)
+            record['longitude'] = center['longitude'] + rng.uniform(-3, 3)
+            record['city'] = f"{center['city']} {copy}"
+        if rng.random() < 0.05 and records:
+            base = records[-1]
+            record = dict(base, name=f"The {base['name']}", latitude=base['latitude'] + 0.001)
+        records.append(record)
+    return records
+
+
+@benchmark('dedup', repeat=3)
+def bench_dedup(options):
+    from center_store import CenterStore
+    from dedup import find_duplicates
+
+    sample, times = {}, []
+    for size in options.dedup_sizes:
+        records = synthetic_centers(size)
+        start = time.perf_counter()
+        find_duplicates(records)
+        elapsed = time.perf_counter() - start
+        times.append(elapsed)
+        sample[f"find_duplicates_{size}_ms"] = (elapsed * 1000, 'ms')
+
+        with tempfile.TemporaryDirectory(prefix='benchmark-store-') as directory:
+            with CenterStore(os.path.join(directory, 'centers.sqlite')) as store:
+                start = time.perf_counter()
+                with store.transaction():
+                    store.replace_dataset('csc', records)
+                sample[f"merge_{size}_ms"] = ((time.perf_counter() - start) * 1000, 'ms')
+
+    # Time ~ size ** exponent between the smallest and largest datasets
+    sizes = options.dedup_sizes
+    if len(sizes) > 1 and times[0] > 0:
+        exponent = math.log(times[-1] / times[0]) / math.log(sizes[-1] / sizes[0])
+        sample["find_duplicates_scaling_exponent"] = (exponent, 'exponent')
+    return sample
+
+
+@benchmark('nearest', repeat=3)
+def bench_nearest(options):
+    import numpy as np
+    from columnar import load_zipcode_arrays
+    from nearest_index import K_NEAREST, SEARCH_RADIUS_MILES
+    from spatial_index import SpatialIndex
+
+    _, lat, lon = load_zipcode_arrays()
+    lat, lon = lat.astype(np.float64).tolist(), lon.astype(np.float64).tolist()
+    index = SpatialIndex.from_dataset('csc')
+
+    sample = {}
+    for label, k, radius in (('k1', 1, None), (f"k{K_NEAREST}", K_NEAREST, SEARCH_RADIUS_MILES)):
+        latencies = []
+        clock = time.perf_counter_ns
+        for y, x in zip(lat, lon):
+            start = clock()
+            index.nearest(y, x, k, max_miles=radius)
+            latencies.append((clock() - start) / 1000)
+        for name, fraction in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99)):
+            sample[f"{label}_{name}_us"] = (percentile(latencies, fraction), 'µs')
+
+    start = time.perf_counter()
+    index.nearest_many(np.array(lat), np.array(lon), 1)
+    elapsed = time.perf_counter() - start
+    sample["batch_all_zips_ms"] = (elapsed * 1000, 'ms')
+    sample["batch_queries_per_second"] = (len(lat) / elapsed, 'queries/s')
+    return sample
+
+
+def measure_load(load):
+    """(seconds, peak MB of Python allocations) of one call, each measured on its own"""
+    gc.collect()
+    start = time.perf_counter()
+    result = load()
+    seconds = time.perf_counter() - start
+    del result
+    gc.collect()
+    tracemalloc.start()
+    result = load()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return seconds, peak / 1e6
+
+
+@benchmark('zipcodes')
+def bench_zipcodes(options):
+    from columnar import ZIPCODES_PATH, load_zipcode_arrays
+
+    def load_json():
+        with open(os.path.join(REPO_DIR, ZIPCODES_PATH), 'r') as f:
+            return json.load(f)
+
+    def load_binary():
+        numbers, lat, lon = load_zipcode_arrays(os.path.join(REPO_DIR, ZIPCODES_PATH))
+        # Touch every value, as a reader of the JSON would
+        return int(numbers.sum()) + float(lat.sum()) + float(lon.sum())
+
+    json_seconds, json_peak = measure_load(load_json)
+    binary_seconds, binary_peak = measure_load(load_binary)
+    return {
+        "json_load_ms": (json_seconds * 1000, 'ms'),
+        "json_peak_mb": (json_peak, 'MB'),
+        "bin_load_ms": (binary_seconds * 1000, 'ms'),
+        "bin_peak_mb": (binary_peak, 'MB'),
+    }
+
+
+# Storage and comparison
+
+def git(*args):
+    result = subprocess.run(['git', *args], cwd=REPO_DIR, capture_output=True, text=True)
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def machine():
+    return {"python": platform.python_version(), "system": platform.platform(),
+            "processor": platform.machine(), "cpus": os.cpu_count()}
+
+
+def results_path(commit, dirty):
+    return os.path.join(REPO_DIR, RESULTS_DIR, f"{commit[:12]}{'-dirty' if dirty else ''}.json")
+
+
+def load_results(commit, dirty=False):
+    """Stored results for a commit; None if missing or unreadable"""
+    path = results_path(commit, dirty)
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        print(f"⚠ Ignoring unreadable {os.path.relpath(path, REPO_DIR)}")
+        return None
+
+
+def find_baseline(commit, dirty, reference=None):
+    """Stored results to compare with: `reference`, or the newest ancestor (HEAD too if dirty)"""
+    if reference:
+        resolved = git('rev-parse', reference)
+        return load_results(resolved) if resolved else None
+    ancestors = (git('rev-list', '--max-count=500', commit) or '').split()
+    for ancestor in ancestors if dirty else ancestors[1:]:
+        results = load_results(ancestor)
+        if results is not None:
+            return results
+    return None
+
+
+def run(names, options):
+    """{benchmark: {metric: {value, unit, samples}}}"""
+    results = {}
+    for name in names:
+        function, repeat = BENCHMARKS[name]
+        repeat = options.repeat or repeat or DEFAULT_REPEAT
+        start = time.time()
+        samples = [function(options) for _ in range(repeat)]
+        results[name] = {
+            metric: {"value": statistics.median(s[metric][0] for s in samples), "unit": unit,
+                     "samples": [round(s[metric][0], 4) for s in samples]}
+            for metric, (_, unit) in samples[0].items()
+        }
+        print(f"✓ {name}: {len(results[name])} metrics, {repeat} runs ({time.time() - start:.1f}s)")
+    return results
+
+
+def compare(current, baseline, threshold):
+    """Print each metric against the baseline; returns the regressions"""
+    regressions = []
+    print()
+    print(f"{'metric':44} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, metrics in current['results'].items():
+        for metric, entry in metrics.items():
+            label, value, unit = f"{name}.{metric}", entry['value'], entry['unit']
+            old = baseline['results'].get(name, {}).get(metric) if baseline else None
+            if old is None or not old['value']:
+                print(f"  {label:42} {'':>12} {value:>10.4g} {unit:<3}")
+                continue
+            change = (value - old['value']) / old['value']
+            worse = -change if higher_is_better(unit) else change
+            if unit in ('records', 'exponent'):
+                marker = '='
+            elif worse > threshold:
+                marker = '✗'
+                regressions.append((label, old['value'], value, unit, change))
+            elif worse < -threshold:
+                marker = '✓'
+            else:
+                marker = '='
+            print(f"{marker} {label:42} {old['value']:>10.4g} {value:>10.4g} {unit:<3} {change:+7.1%}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the build, query and load paths")
+    parser.add_argument('--only', help=f"comma-separated benchmarks ({', '.join(BENCHMARKS)})")
+    parser.add_argument('--repeat', type=int, help="runs per benchmark (default: per benchmark, up to 5)")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f"relative slowdown counted as a regression (default {DEFAULT_THRESHOLD})")
+    parser.add_argument('--check', action='store_true', help="exit 1 if any metric regressed")
+    parser.add_argument('--compare', metavar='COMMIT',
+                        help="compare with this commit's stored results instead of the newest ancestor's")
+    parser.add_argument('--no-save', action='store_true', help="do not store the results")
+    parser.add_argument('--geocoder-latency', type=float, default=0.0,
+                        help="seconds the stub geocoder waits per request (default 0)")
+    parser.add_argument('--dedup-sizes', default=','.join(map(str, DEDUP_SIZES)),
+                        help="synthetic dataset sizes for the dedup benchmark")
+    args = parser.parse_args()
+    args.dedup_sizes = [int(size) for size in args.dedup_sizes.split(',')]
+
+    names = args.only.split(',') if args.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    commit = git('rev-parse', 'HEAD') or 'unknown'
+    dirty = bool(git('status', '--porcelain', '--untracked-files=no'))
+    print(f"Benchmarking {commit[:12]}{' (uncommitted changes)' if dirty else ''}: {', '.join(names)}")
+
+    current = {"commit": commit, "dirty": dirty, "date": time.strftime('%Y-%m-%dT%H:%M:%S'),
+               "machine": machine(), "results": run(names, args)}
+    baseline = find_baseline(commit, dirty, args.compare)
+
+    # Metrics this run skipped keep their previous values for this commit
+    previous = load_results(commit, dirty)
+    if previous and previous.get('machine') == current['machine']:
+        current['results'] = {**previous['results'], **current['results']}
+    if not args.no_save:
+        os.makedirs(os.path.join(REPO_DIR, RESULTS_DIR), exist_ok=True)
+        path = results_path(commit, dirty)
+        write_text_atomic(path, json.dumps(current, indent=2))
+        print(f"✓ Saved {os.path.relpath(path, REPO_DIR)}")
+
+    if baseline is None:
+        print("= No stored results for an earlier commit to compare with")
+    else:
+        print(f"Compared with {baseline['commit'][:12]} ({baseline['date']})")
+        if baseline.get('machine') != current['machine']:
+            print(f"⚠ Baseline is from another machine ({baseline['machine'].get('system')}); "
+                  f"timings may not be comparable")
+    shown = dict(current, results={name: current['results'][name] for name in names})
+    regressions = compare(shown, baseline, args.threshold)
+    if regressions:
+        print(f"\n✗ {len(regressions)} regressions beyond {args.threshold:.0%}")
+        if args.check:
+            sys.exit(1)
+    elif baseline is not None:
+        print(f"\n✓ No regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+"""
+Incremental build of the published stroke center datasets.
+
+Replaces running the compile/add scripts in sequence: every source list is
+declared once in SOURCES, each record is content-hashed, and only records
+whose inputs changed since the last build are geocoded again. Every result
+is appended to a journal as soon as it arrives, so an interrupted build
+resumes where it stopped. The results are then synced into the SQLite center
+store in one transaction, and the CSC and TSC JSON files are exported from
+it atomically.
+
+    python3 build.py            # incremental build
+    python3 build.py --force    # re-geocode every record
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import time
+
+from add_final_centers import ADDITIONAL_CENTERS
+from add_remaining_centers import NEW_CENTERS
+from compile_comprehensive_centers import (
+    FLORIDA_COMPREHENSIVE_CENTERS,
+    OTHER_MAJOR_CENTERS,
+    PENNSYLVANIA_COMPREHENSIVE_CENTERS,
+)
+from center_store import CenterStore, center_key, write_text_atomic
+from columnar import write_binaries
+from compile_final_database import NY_CENTERS, TX_CENTERS
+from dedup import find_duplicates
+from download_zipcode_data import write_zipcode_shards
+from geocoding import geocode_many
+from http_client import get_client
+from publish import publish
+
+CSC_OUTPUT = os.path.join('data', 'stroke_centers.json')
+TSC_OUTPUT = os.path.join('data', 'thrombectomy_centers.json')
+JOURNAL_PATH = os.path.join('data', 'build_journal.jsonl')
+REGEOCODE_QUEUE_PATH = os.path.join('data', 'regeocode_queue.json')  # written by audit.py
+
+# Journal appends are fsync'd this often; an interruption loses at most one batch
+JOURNAL_BATCH = 10
+
+CSC = "Comprehensive Stroke Center"
+
+# Source lists in precedence order: for a repeated name/city/state the first
+# source wins. `defaults` fill fields a list leaves out; `overrides` replace
+# them. Records that already carry latitude/longitude are never geocoded.
+SOURCES = [
+    {
+        "name": "florida",
+        "records": FLORIDA_COMPREHENSIVE_CENTERS,
+        "output": CSC_OUTPUT,
+        "defaults": {"certification_org": "Joint Commission/DNV", "certification_type": CSC},
+    },
+    {
+        "name": "pennsylvania",
+        "records": PENNSYLVANIA_COMPREHENSIVE_CENTERS,
+        "output": CSC_OUTPUT,
+        "defaults": {"certification_org": "Joint Commission/DNV", "certification_type": CSC},
+    },
+    {
+        "name": "other_major",
+        "records": OTHER_MAJOR_CENTERS,
+        "output": CSC_OUTPUT,
+        "defaults": {"certification_org": "Joint Commission/DNV", "certification_type": CSC},
+    },
+    {
+        "name": "new_york",
+        "records": NY_CENTERS,
+        "output": CSC_OUTPUT,
+        "overrides": {"certification_org": "Joint Commission/DNV", "certification_type": CSC},
+    },
+    {
+        "name": "texas",
+        "records": TX_CENTERS,
+        "output": CSC_OUTPUT,
+        "overrides": {"certification_org": "Joint Commission/DNV", "certification_type": CSC},
+    },
+    {
+        "name": "web_research",
+        "records": NEW_CENTERS,
+        "output": CSC_OUTPUT,
+        "overrides": {"address": "", "phone": "", "certification_org": "Joint Commission",
+                      "certification_type": CSC},
+    },
+    {
+        "name": "additional",
+        "records": ADDITIONAL_CENTERS,
+        "output": CSC_OUTPUT,
+        "overrides": {"address": "", "phone": "", "certification_org": "Joint Commission",
+                      "certification_type": CSC},
+    },
+    {
+        "name": "manual",
+        "path": os.path.join('data', 'sources', 'manual_centers.json'),
+        "output": CSC_OUTPUT,
+    },
+    {
+        "name": "thrombectomy",
+        "path": os.path.join('data', 'sources', 'thrombectomy_centers.json'),
+        "output": TSC_OUTPUT,
+    },
+]
+
+# Center store dataset each output is exported from (the store sets the order)
+OUTPUT_DATASETS = {
+    CSC_OUTPUT: 'csc',
+    TSC_OUTPUT: 'tsc',
+}
+
+
+def record_hash(record):
+    """Stable content hash of a source record's inputs"""
+    canonical = json.dumps(record, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+
+
+def is_geocoded(record):
+    return record.get('latitude') is not None and record.get('longitude') is not None
+
+
+def load_sources():
+    """Expand SOURCES into (source name, output, record) in precedence order"""
+    for source in SOURCES:
+        if 'path' in source:
+            with open(source['path'], 'r') as f:
+                records = json.load(f)
+        else:
+            records = source['records']
+        for record in records:
+            merged = {**source.get('defaults', {}), **record, **source.get('overrides', {})}
+            yield source['name'], source['output'], merged
+
+
+def emit(record, result):
+    """Published record for a freshly geocoded source record"""
+    if is_geocoded(record):
+        # A source that carries its own coordinates, re-geocoded after an
+        # audit: keep its fields and only replace the position
+        return {**record, "latitude": result.latitude, "longitude": result.longitude}
+    return {
+        "name": record['name'],
+        "address": record.get('address', ''),
+        "city": record['city'],
+        "state": record['state'],
+        "zipcode": record.get('zipcode', ''),
+        "latitude": result.latitude,
+        "longitude": result.longitude,
+        "phone": record.get('phone', ''),
+        "certification_org": record['certification_org'],
+        "certification_type": record['certification_type']
+    }
+
+
+class BuildJournal:
+    """
+    Append-only JSONL log of build results, one {"hash", "source", "tier",
+    "record"} object per line. Replaying it restores the state of an
+    interrupted build; a finished build compacts it to the live entries.
+    """
+
+    def __init__(self, path=JOURNAL_PATH, batch_size=JOURNAL_BATCH):
+        self.path = path
+        self.batch_size = batch_size
+        self.file = None
+        self.unsynced = 0
+        self.skipped = 0
+
+    def load(self):
+        """
+        Replay the journal into {hash: entry}; None if there is none yet.
+        Lines that do not parse are counted in self.skipped; compact()
+        before appending again, so new lines never follow a torn one.
+        """
+        try:
+            f = open(self.path, 'r')
+        except FileNotFoundError:
+            return None
+
+        state = {}
+        self.skipped = 0
+        with f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    digest = entry.pop('hash')
+                except (json.JSONDecodeError, AttributeError, KeyError):
+                    # A crash mid-write leaves a torn line; whatever was
+                    # journaled after it still counts
+                    self.skipped += 1
+                    continue
+                state[digest] = entry
+        return state
+
+    def __enter__(self):
+        self.file = open(self.path, 'a')
+        return self
+
+    def __exit__(self, *exc):
+        self.sync()
+        self.file.close()
+        self.file = None
+
+    def append(self, digest, entry):
+        self.file.write(json.dumps({"hash": digest, **entry}) + "\n")
+        self.unsynced += 1
+        if self.unsynced >= self.batch_size:
+            self.sync()
+
+    def sync(self):
+        if self.file and self.unsynced:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.unsynced = 0
+
+    def compact(self, state):
+        """Atomically rewrite the journal with one line per live entry"""
+        lines = ''.join(json.dumps({"hash": d, **e}) + "\n" for d, e in state.items())
+        write_text_atomic(self.path, lines)
+
+
+def seed_state(entries):
+    """
+    First build: adopt the coordinates already published for matching
+    records instead of geocoding the whole database again. Source records
+    missing from the published data were dropped by hand (mostly failed
+    lookups later re-added under another name), so they stay excluded
+    until their source entry is edited.
+    """
+    published = {}
+    for output in OUTPUT_DATASETS:
+        if os.path.exists(output):
+            with open(output, 'r') as f:
+                for center in json.load(f):
+                    published.setdefault((output, center_key(center)), center)
+
+    state = {}
+    for digest, (source, output, record) in entries.items():
+        center = published.get((output, center_key(record)))
+        if center is not None:
+            state[digest] = {"source": source, "tier": "published", "record": center}
+        elif not is_geocoded(record):
+            state[digest] = {"source": source, "tier": "excluded", "record": None}
+    return state
+
+
+def drop_near_duplicates(entries, state):
+    """
+    Remove entries that fuzzily duplicate an earlier one (a variant name or
+    city for the same hospital, or a TSC entry for a hospital already listed
+    as a CSC, since CSC sources come first). Records excluded from the
+    outputs take no part, so they can never displace a published center.
+    Returns the number removed.
+    """
+    digests = [d for d in entries if not (d in state and state[d]['record'] is None)]
+    located = [state[d]['record'] if d in state else entries[d][2] for d in digests]
+
+    dropped = find_duplicates(located)
+    for i, kept in sorted(dropped.items()):
+        record, other = located[i], located[kept]
+        print(f"  = {record['name']}, {record['city']} ({entries[digests[i]][0]}) duplicates "
+              f"{other['name']}, {other['city']} ({entries[digests[kept]][0]})")
+    for i in dropped:
+        del entries[digests[i]]
+    return len(dropped)
+
+
+def load_regeocode_queue(path=REGEOCODE_QUEUE_PATH):
+    """{(output, center key): queue entry} from `audit.py --queue`; empty without a queue"""
+    try:
+        with open(path, 'r') as f:
+            queue = json.load(f)
+    except FileNotFoundError:
+        return {}
+    outputs = {dataset: output for output, dataset in OUTPUT_DATASETS.items()}
+    return {(outputs[e['dataset']], e['key']): e for e in queue if e['dataset'] in outputs}
+
+
+def build_lookups():
+    """
+    Regenerate the web app's precomputed lookups from the published files.
+    Each step checks its own inputs (hashes in its manifest, or mtimes for
+    publish) and does nothing when they are unchanged.
+    """
+    write_zipcode_shards()
+    write_binaries()
+    try:
+        from catchment import build_catchments
+        from coverage import build_coverage
+        from nearest_index import build_nearest_index
+    except (ImportError, SystemExit) as e:
+        print(f"⚠ Skipping the nearest-center index, coverage and catchments ({e}); pip install numpy")
+    else:
+        build_nearest_index()
+        build_coverage()
+        build_catchments()
+    publish()
+
+
+def build(force=False, local_first=False, dedup=True):
+    """Geocode what changed and regenerate the outputs; returns the counts"""
+    start = time.time()
+
+    # Content-hash every source record; the first source wins a duplicate key
+    entries = {}
+    seen = set()
+    duplicates = 0
+    for source, output, record in load_sources():
+        key = (output, center_key(record))
+        if key in seen:
+            duplicates += 1
+            continue
+        seen.add(key)
+        entries[record_hash(record)] = (source, output, record)
+
+    journal = BuildJournal()
+    state = None if force else journal.load()
+    if state is None:
+        state = {} if force else seed_state(entries)
+        journal.compact(state)
+        print(f"✓ Started build journal with {len(state)} published records")
+    else:
+        # Rewritten whole, so this run's appends start on a clean line
+        journal.compact(state)
+        print(f"✓ Replayed {len(state)} results from {journal.path}")
+        if journal.skipped:
+            print(f"⚠ Skipped {journal.skipped} unreadable lines (an interrupted write)")
+
+    # Results of near-duplicates stay journaled, so --keep-duplicates needs no re-geocoding
+    live = set(entries)
+    near_duplicates = drop_near_duplicates(entries, state) if dedup else 0
+
+    # Audit-queued records are looked up again even though nothing changed;
+    # their previous result stands if the new lookup fails
+    queued = load_regeocode_queue()
+    previous = {
+        d: state.pop(d) for d, (_, output, record) in entries.items()
+        if (output, center_key(record)) in queued and state.get(d, {}).get('record')
+    }
+
+    # Only records without a stored result need work
+    pending = [d for d in entries if d not in state]
+    to_geocode = [d for d in pending if not is_geocoded(entries[d][2]) and d not in previous]
+    to_geocode += [d for d in pending if d in previous]
+    for digest in pending:
+        source, output, record = entries[digest]
+        if is_geocoded(record) and digest not in previous:
+            state[digest] = {"source": source, "tier": "source", "record": record}
+
+    print(f"Sources: {len(entries)} records ({duplicates} duplicates, "
+          f"{near_duplicates} near-duplicates skipped)")
+    print(f"Changed: {len(pending) - len(previous)} records, {len(to_geocode)} need geocoding"
+          f" ({len(previous)} queued by the audit)")
+
+    failed = 0
+    changed = [entries[d][2] for d in to_geocode if d not in previous]
+    audited = [entries[d][2] for d in to_geocode if d in previous]
+    with journal:
+        for digest in pending:
+            if digest in state:
+                journal.append(digest, state[digest])
+
+        # Audited records skip the cached answer and the zip-centroid shortcut
+        # that flagged them in the first place
+        geocoded = itertools.chain(
+            geocode_many(changed, local_first=local_first),
+            geocode_many(audited, refresh=True)
+        )
+        for digest, (record, result) in zip(to_geocode, geocoded):
+            source = entries[digest][0]
+            if result and digest in previous and result.approximate:
+                # A centroid is no improvement on what the audit flagged
+                result = None
+            if result:
+                state[digest] = {"source": source, "tier": result.tier, "record": emit(record, result)}
+                journal.append(digest, state[digest])
+                print(f"  ✓ {record['name']}, {record['city']}, {record['state']} ({result.tier})")
+            elif digest in previous:
+                # Stays queued for the next build
+                state[digest] = previous[digest]
+                failed += 1
+                print(f"  ⚠ Keeping previous coordinates for {record['name']} - geocoding failed")
+            else:
+                # Not journaled, so the next build retries it (the geocode
+                # cache keeps the retry cheap until the negative TTL expires)
+                failed += 1
+                print(f"  ⚠ Skipping {record['name']} - geocoding failed")
+
+    # Drop results for records that no longer exist in any source
+    state = {d: state[d] for d in live if d in state}
+
+    written = []
+    with CenterStore() as store:
+        with store.transaction():
+            for output, dataset in OUTPUT_DATASETS.items():
+                centers = [
+                    state[d]['record'] for d, (_, out, _) in entries.items()
+                    if out == output and d in state and state[d]['record'] is not None
+                ]
+                upserted, deleted = store.replace_dataset(dataset, centers)
+                print(f"✓ {store.path} [{dataset}]: {upserted} centers ({deleted} removed)")
+
+        for output, dataset in OUTPUT_DATASETS.items():
+            if store.export(dataset, output):
+                written.append(output)
+            print(f"✓ {output}: {store.count(dataset)} centers")
+
+    build_lookups()
+
+    journal.compact(state)
+    if queued:
+        retry = [
+            queued[(entries[d][1], center_key(entries[d][2]))]
+            for d in previous if state.get(d) is previous[d]
+        ]
+        if retry:
+            write_text_atomic(REGEOCODE_QUEUE_PATH, json.dumps(retry, indent=2))
+        else:
+            os.remove(REGEOCODE_QUEUE_PATH)
+
+    print()
+    print(f"Build finished in {time.time() - start:.2f}s "
+          f"({len(to_geocode)} geocoded, {failed} failed, {len(written)} outputs changed)")
+    get_client().print_summary()
+    return {"geocoded": len(to_geocode), "failed": failed, "written": written}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental stroke center database build")
+    parser.add_argument('--force', action='store_true', help="re-geocode every record")
+    parser.add_argument('--local-first', action='store_true',
+                        help="answer from offline data only; records left over are looked up next build")
+    parser.add_argument('--keep-duplicates', action='store_true',
+                        help="only drop exact name/city/state duplicates")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("STROKE CENTER DATABASE BUILD")
+    print("=" * 70)
+    print()
+
+    build(force=args.force, local_first=args.local_first, dedup=not args.keep_duplicates)
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\nProcess interrupted by user")
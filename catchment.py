@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Catchments: the zips (and area) each center is the nearest facility for.
+
+Every zip centroid is assigned to its nearest CSC and nearest TSC in one
+batched pass, and every cell of the coverage lattice likewise, so each
+center's catchment polygon is its Voronoi cell clipped to the populated
+area, built from merged lattice rectangles. Writes, per dataset:
+
+    data/catchments/<dataset>.csv       one row per center: zips, area,
+                                        mean/max distance, states served
+    data/catchments/<dataset>.geojson   one catchment polygon per center
+
+build.py regenerates them when the centers or zipcodes change.
+
+    python3 catchment.py                # rebuild if needed, print the largest catchments
+    python3 catchment.py --force --cell 0.1
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    raise SystemExit("Catchments need numpy: pip install numpy")
+
+from center_store import DATASETS, manifest_up_to_date, MILES_PER_DEGREE_LAT, write_text_atomic
+from columnar import load_zipcode_arrays
+from coverage import CELL_DEGREES, LAND_CELLS, ZIPCODES_PATH, cell_centers, lattice, merge_cells, rectangles_geometry
+from spatial_index import SpatialIndex
+from zip_states import ZIP3_STATES
+
+CATCHMENT_DIR = os.path.join('data', 'catchments')
+
+CSV_COLUMNS = ('id', 'name', 'city', 'state', 'zips', 'area_sq_miles',
+               'mean_miles', 'max_miles', 'states_served')
+
+
+def catchment_table(index, assigned, miles, states, cell_assigned, cell_area):
+    """One row per center, in dataset order"""
+    count = len(index)
+    zips = np.bincount(assigned, minlength=count)
+    total_miles = np.bincount(assigned, weights=miles, minlength=count)
+    max_miles = np.zeros(count)
+    np.maximum.at(max_miles, assigned, miles)
+    area = np.bincount(cell_assigned, weights=cell_area, minlength=count)
+
+    # State spread: zips per (center, state), most first
+    spread = [{} for _ in range(count)]
+    pairs, pair_counts = np.unique(np.stack([assigned, np.searchsorted(np.unique(states), states)]),
+                                   axis=1, return_counts=True)
+    state_names = np.unique(states)
+    for (center, state), n in zip(pairs.T.tolist(), pair_counts.tolist()):
+        spread[center][state_names[state] or '?'] = n
+
+    rows = []
+    for i, record in enumerate(index.records):
+        served = sorted(spread[i].items(), key=lambda item: (-item[1], item[0]))
+        rows.append({
+            "id": i,
+            "name": record['name'],
+            "city": record.get('city', ''),
+            "state": record.get('state', ''),
+            "zips": int(zips[i]),
+            "area_sq_miles": round(float(area[i])),
+            "mean_miles": round(float(total_miles[i] / zips[i]), 1) if zips[i] else None,
+            "max_miles": round(float(max_miles[i]), 1) if zips[i] else None,
+            "states_served": ';'.join(f"{state}:{n}" for state, n in served),
+        })
+    return rows
+
+
+def compute_catchments(cell=CELL_DEGREES, land_cells=LAND_CELLS):
+    """{dataset: (table rows, GeoJSON)} from the published files"""
+    numbers, zip_lat, zip_lon = load_zipcode_arrays(ZIPCODES_PATH)
+    zip_lat, zip_lon = zip_lat.astype(np.float64), zip_lon.astype(np.float64)
+    states = np.array(ZIP3_STATES)[numbers.astype(np.int64) // 100]
+
+    rows, cols = lattice(zip_lat, zip_lon, cell, land_cells)
+    cell_lat, cell_lon = cell_centers(rows, cols, cell)
+    cell_area = (cell * MILES_PER_DEGREE_LAT) ** 2 * np.cos(np.radians(cell_lat))
+
+    results = {}
+    for dataset in DATASETS:
+        index = SpatialIndex.from_dataset(dataset)
+        nearest, miles = index.nearest_many(zip_lat, zip_lon, 1)
+        cell_nearest, _ = index.nearest_many(cell_lat, cell_lon, 1)
+        assigned, cell_assigned = nearest[:, 0], cell_nearest[:, 0]
+        table = catchment_table(index, assigned, miles[:, 0], states, cell_assigned, cell_area)
+
+        # Group the lattice cells by center once, then merge each group
+        order = np.argsort(cell_assigned, kind='stable')
+        bounds = np.searchsorted(cell_assigned[order], np.arange(len(index) + 1))
+        features = []
+        for row in table:
+            members = order[bounds[row['id']]:bounds[row['id'] + 1]]
+            if len(members) == 0:
+                continue
+            properties = {key: row[key] for key in CSV_COLUMNS if key != 'states_served'}
+            features.append({
+                "type": "Feature",
+                "properties": properties,
+                "geometry": rectangles_geometry(merge_cells(rows[members], cols[members]), cell),
+            })
+        results[dataset] = (table, {"type": "FeatureCollection", "features": features})
+    return results
+
+
+def build_catchments(force=False, output_dir=CATCHMENT_DIR, cell=CELL_DEGREES, land_cells=LAND_CELLS):
+    """Write the catchment tables and polygons if their inputs changed; returns True if written"""
+    inputs = [ZIPCODES_PATH] + [path for path, _ in DATASETS.values()]
+    parameters = {"cell_degrees": cell, "land_cells": land_cells}
+    manifest_path = os.path.join(output_dir, 'manifest.json')
+    current, manifest = manifest_up_to_date(manifest_path, inputs, **parameters)
+    if not force and current:
+        print(f"= {output_dir}: up to date")
+        return False
+
+    start = time.time()
+    results = compute_catchments(cell, land_cells)
+    os.makedirs(output_dir, exist_ok=True)
+    for dataset, (table, geojson) in results.items():
+        out = io.StringIO()
+        writer = csv.DictWriter(out, fieldnames=CSV_COLUMNS, lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(table)
+        write_text_atomic(os.path.join(output_dir, f"{dataset}.csv"), out.getvalue())
+        write_text_atomic(os.path.join(output_dir, f"{dataset}.geojson"),
+                          json.dumps(geojson, separators=(',', ':')))
+    write_text_atomic(manifest_path, json.dumps(manifest, indent=2))
+
+    counts = ', '.join(f"{len(table)} {dataset.upper()}s" for dataset, (table, _) in results.items())
+    print(f"✓ {output_dir}: catchments for {counts} ({time.time() - start:.1f}s)")
+    return True
+
+
+def print_largest(dataset, limit=15, output_dir=CATCHMENT_DIR):
+    with open(os.path.join(output_dir, f"{dataset}.csv"), 'r', newline='') as f:
+        table = list(csv.DictReader(f))
+    # Centers nearest for no zip have empty distance columns
+    served_any = sorted((row for row in table if row['zips'] != '0'), key=lambda row: -int(row['zips']))
+    empty = len(table) - len(served_any)
+    print()
+    print(f"Largest {dataset.upper()} catchments by zips ({empty} centers are nearest for none):")
+    for row in served_any[:limit]:
+        served = row['states_served'].split(';')
+        more = f" +{len(served) - 3}" if len(served) > 3 else ''
+        print(f"  {int(row['zips']):>5} zips {int(row['area_sq_miles']):>8,} sq mi "
+              f"mean {float(row['mean_miles']):5.1f} max {float(row['max_miles']):6.1f}  "
+              f"{row['name']}, {row['state']} [{', '.join(served[:3])}{more}]")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Nearest-center catchments for every CSC and TSC")
+    parser.add_argument('--force', action='store_true', help="rebuild even if inputs are unchanged")
+    parser.add_argument('--cell', type=float, default=CELL_DEGREES,
+                        help=f"lattice cell size in degrees for the polygons (default {CELL_DEGREES})")
+    parser.add_argument('--land-cells', type=int, default=LAND_CELLS,
+                        help=f"cells around a zip centroid included in the lattice (default {LAND_CELLS})")
+    args = parser.parse_args()
+    build_catchments(force=args.force, cell=args.cell, land_cells=args.land_cells)
+    for dataset in DATASETS:
+        print_largest(dataset)
+
+
+if __name__ == '__main__':
+    main()
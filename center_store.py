@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+SQLite store for the stroke center datasets.
+
+Each center is one row keyed by (dataset, name|city|state), with indexes on
+state, zipcode and certification type and an R*Tree over its coordinates,
+so radius and bounding-box queries never scan the table. Builders upsert
+inside a transaction (WAL mode, so readers are never blocked and concurrent
+writers queue instead of overwriting each other), and the published JSON
+files are exported from the store.
+
+    python3 center_store.py import                # load the published JSON files
+    python3 center_store.py near 29.65 -82.34 25  # centers within 25 miles
+    python3 center_store.py bbox 25 -88 31 -80    # centers in a lat/lon box
+    python3 center_store.py export                # rewrite the published JSON files
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
+
+STORE_PATH = os.path.join('data', 'centers.sqlite')
+
+# Dataset name → (published JSON file, export order); an empty order keeps upsert order
+DATASETS = {
+    'csc': (os.path.join('data', 'stroke_centers.json'), ('state', 'city', 'name')),
+    'tsc': (os.path.join('data', 'thrombectomy_centers.json'), ()),
+}
+
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE_LAT = 69.0
+
+# Columns export order may sort by; position is the order rows were upserted
+ORDER_COLUMNS = ('state', 'city', 'name', 'zipcode', 'certification_type', 'position')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS centers (
+    id INTEGER PRIMARY KEY,
+    dataset TEXT NOT NULL,
+    key TEXT NOT NULL,
+    name TEXT NOT NULL,
+    city TEXT NOT NULL,
+    state TEXT NOT NULL,
+    zipcode TEXT NOT NULL,
+    certification_type TEXT NOT NULL,
+    latitude REAL,
+    longitude REAL,
+    position INTEGER NOT NULL,
+    record TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    UNIQUE (dataset, key)
+);
+CREATE INDEX IF NOT EXISTS centers_state ON centers (state);
+CREATE INDEX IF NOT EXISTS centers_zipcode ON centers (zipcode);
+CREATE INDEX IF NOT EXISTS centers_certification ON centers (certification_type);
+CREATE VIRTUAL TABLE IF NOT EXISTS centers_rtree USING rtree (
+    id, min_lat, max_lat, min_lon, max_lon
+);
+"""
+
+
+def center_key(center):
+    """Exact duplicate key used by every compile script"""
+    return f"{center['name']}|{center['city']}|{center['state']}".lower()
+
+
+def haversine_miles(lat1, lon1, lat2, lon2):
+    """Great-circle distance in miles"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_MILES * math.asin(math.sqrt(a))
+
+
+def radius_bbox(lat, lon, miles):
+    """(min_lat, min_lon, max_lat, max_lon) enclosing a circle of `miles`"""
+    dlat = miles / MILES_PER_DEGREE_LAT
+    cos_lat = math.cos(math.radians(min(89.0, abs(lat) + dlat)))
+    dlon = min(180.0, miles / (MILES_PER_DEGREE_LAT * max(cos_lat, 1e-6)))
+    return lat - dlat, lon - dlon, lat + dlat, lon + dlon
+
+
+def write_atomic(path, data):
+    """Write JSON next to the target and rename over it; skip if unchanged"""
+    return write_text_atomic(path, json.dumps(data, indent=2))
+
+
+def write_text_atomic(path, text):
+    """Write text next to the target and rename over it; skip if unchanged"""
+    return write_bytes_atomic(path, text.encode('utf-8'))
+
+
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+
+def manifest_up_to_date(path, inputs, **parameters):
+    """
+    Check a generated output's manifest against the current input file
+    hashes and build parameters. Returns (up to date, manifest), where the
+    manifest is what to write (plus any extra fields) after regenerating.
+    """
+    manifest = {"parameters": parameters, "inputs": {p: file_hash(p) for p in inputs}}
+    try:
+        with open(path, 'r') as f:
+            previous = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        previous = {}
+    # Round-trip through JSON so tuples compare equal to the stored lists
+    return json.loads(json.dumps(manifest)) == {key: previous.get(key) for key in manifest}, manifest
+
+
+def write_bytes_atomic(path, data):
+    """Write bytes next to the target and rename over it; skip if unchanged"""
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+
+    try:
+        mode = os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        mode = 0o644  # mkstemp creates 0600, which a static web server cannot read
+
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return True
+
+
+class CenterStore:
+    """Rows of every dataset plus the R*Tree that indexes their coordinates"""
+
+    def __init__(self, path=STORE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        # isolation_level=None: transactions are opened explicitly below
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Write transaction that takes the lock up front, so two builders
+        serialize instead of failing halfway through with SQLITE_BUSY
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def upsert(self, dataset, center, position=0):
+        """Insert or replace one center; returns its row id"""
+        lat, lon = center.get('latitude'), center.get('longitude')
+        row = self.conn.execute("""
+            INSERT INTO centers (dataset, key, name, city, state, zipcode, certification_type,
+                                 latitude, longitude, position, record, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (dataset, key) DO UPDATE SET
+                name = excluded.name, city = excluded.city, state = excluded.state,
+                zipcode = excluded.zipcode, certification_type = excluded.certification_type,
+                latitude = excluded.latitude, longitude = excluded.longitude,
+                position = excluded.position, record = excluded.record,
+                updated_at = excluded.updated_at
+            RETURNING id
+        """, (
+            dataset, center_key(center), center['name'], center['city'], center['state'],
+            center.get('zipcode') or '', center.get('certification_type') or '',
+            lat, lon, position, json.dumps(center, ensure_ascii=False), time.time()
+        )).fetchone()
+        row_id = row[0]
+
+        self.conn.execute("DELETE FROM centers_rtree WHERE id = ?", (row_id,))
+        if lat is not None and lon is not None:
+            self.conn.execute("INSERT INTO centers_rtree VALUES (?, ?, ?, ?, ?)",
+                              (row_id, lat, lat, lon, lon))
+        return row_id
+
+    def upsert_many(self, dataset, centers):
+        """Upsert centers in one transaction, numbering them in the given order"""
+        with self.transaction():
+            for position, center in enumerate(centers):
+                self.upsert(dataset, center, position)
+
+    def replace_dataset(self, dataset, centers):
+        """
+        Make the dataset exactly `centers`: upsert them and delete rows no
+        longer present. Returns (upserted, deleted). Call inside transaction().
+        """
+        keep = [self.upsert(dataset, center, position) for position, center in enumerate(centers)]
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS keep_ids (id INTEGER PRIMARY KEY)")
+        self.conn.execute("DELETE FROM keep_ids")
+        self.conn.executemany("INSERT OR IGNORE INTO keep_ids VALUES (?)", ((i,) for i in keep))
+        stale = [row[0] for row in self.conn.execute(
+            "SELECT id FROM centers WHERE dataset = ? AND id NOT IN (SELECT id FROM keep_ids)",
+            (dataset,)
+        )]
+        self.conn.executemany("DELETE FROM centers_rtree WHERE id = ?", ((i,) for i in stale))
+        self.conn.executemany("DELETE FROM centers WHERE id = ?", ((i,) for i in stale))
+        return len(keep), len(stale)
+
+    def count(self, dataset=None):
+        if dataset is None:
+            return self.conn.execute("SELECT COUNT(*) FROM centers").fetchone()[0]
+        return self.conn.execute("SELECT COUNT(*) FROM centers WHERE dataset = ?",
+                                 (dataset,)).fetchone()[0]
+
+    def centers(self, dataset, order_by=('position',), state=None, certification_type=None):
+        """Records of a dataset, optionally filtered, in the requested column order"""
+        for column in order_by:
+            if column not in ORDER_COLUMNS:
+                raise ValueError(f"Cannot order centers by {column!r}")
+        sql = "SELECT record FROM centers WHERE dataset = ?"
+        params = [dataset]
+        if state:
+            sql += " AND state = ?"
+            params.append(state.upper())
+        if certification_type:
+            sql += " AND certification_type = ?"
+            params.append(certification_type)
+        # position last keeps ties in upsert order, as a stable sort would
+        columns = [c for c in order_by if c != 'position'] + ['position']
+        sql += " ORDER BY " + ", ".join(columns)
+        return [json.loads(row[0]) for row in self.conn.execute(sql, params)]
+
+    def within_bbox(self, min_lat, min_lon, max_lat, max_lon, dataset=None):
+        """Centers whose coordinates fall inside the box"""
+        # The R*Tree holds float32 boxes rounded outward, so it only narrows
+        # the candidates; the exact test runs on the stored doubles
+        sql = """
+            SELECT c.record FROM centers_rtree r JOIN centers c ON c.id = r.id
+            WHERE r.max_lat >= ? AND r.min_lat <= ? AND r.max_lon >= ? AND r.min_lon <= ?
+              AND c.latitude BETWEEN ? AND ? AND c.longitude BETWEEN ? AND ?
+        """
+        params = [min_lat, max_lat, min_lon, max_lon, min_lat, max_lat, min_lon, max_lon]
+        if dataset:
+            sql += " AND c.dataset = ?"
+            params.append(dataset)
+        return [json.loads(row[0]) for row in self.conn.execute(sql, params)]
+
+    def within_radius(self, lat, lon, miles, dataset=None):
+        """[(distance in miles, center)] within `miles`, nearest first"""
+        results = []
+        for center in self.within_bbox(*radius_bbox(lat, lon, miles), dataset=dataset):
+            distance = haversine_miles(lat, lon, center['latitude'], center['longitude'])
+            if distance <= miles:
+                results.append((distance, center))
+        results.sort(key=lambda item: item[0])
+        return results
+
+    def export(self, dataset, output=None):
+        """Write a dataset as its published JSON file; returns True if it changed"""
+        path, order_by = DATASETS[dataset]
+        return write_atomic(output or path, self.centers(dataset, order_by))
+
+
+def import_published(store, datasets=DATASETS):
+    """Load the published JSON files into the store, replacing what it held"""
+    with store.transaction():
+        for dataset, (path, _) in datasets.items():
+            with open(path, 'r') as f:
+                centers = json.load(f)
+            upserted, deleted = store.replace_dataset(dataset, centers)
+            print(f"  ✓ {dataset}: {upserted} centers from {path} ({deleted} removed)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite stroke center store")
+    parser.add_argument('--store', default=STORE_PATH)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('import', help="load the published JSON files")
+    subparsers.add_parser('export', help="rewrite the published JSON files from the store")
+
+    near = subparsers.add_parser('near', help="centers within a radius")
+    near.add_argument('latitude', type=float)
+    near.add_argument('longitude', type=float)
+    near.add_argument('miles', type=float)
+    near.add_argument('--dataset', choices=sorted(DATASETS))
+
+    bbox = subparsers.add_parser('bbox', help="centers inside a bounding box")
+    for name in ('min_lat', 'min_lon', 'max_lat', 'max_lon'):
+        bbox.add_argument(name, type=float)
+    bbox.add_argument('--dataset', choices=sorted(DATASETS))
+
+    args = parser.parse_args()
+
+    with CenterStore(args.store) as store:
+        if args.command == 'import':
+            import_published(store)
+        elif args.command == 'export':
+            for dataset, (path, _) in DATASETS.items():
+                changed = store.export(dataset)
+                print(f"  {'✓' if changed else '='} {path}: {store.count(dataset)} centers")
+        elif args.command == 'near':
+            start = time.perf_counter()
+            results = store.within_radius(args.latitude, args.longitude, args.miles, args.dataset)
+            elapsed = (time.perf_counter() - start) * 1000
+            for distance, center in results:
+                print(f"  {distance:6.1f} mi  {center['name']}, {center['city']}, {center['state']}")
+            print(f"{len(results)} centers within {args.miles:g} miles ({elapsed:.1f} ms)")
+        else:
+            start = time.perf_counter()
+            results = store.within_bbox(args.min_lat, args.min_lon, args.max_lat, args.max_lon,
+                                        args.dataset)
+            elapsed = (time.perf_counter() - start) * 1000
+            for center in results:
+                print(f"  {center['name']}, {center['city']}, {center['state']}")
+            print(f"{len(results)} centers in box ({elapsed:.1f} ms)")
+
+
+if __name__ == '__main__':
+    main()
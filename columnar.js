@@ -0,0 +1,115 @@
+// Reader for the columnar .bin files written by columnar.py
+//
+// Numeric columns are typed-array views over the fetched buffer (no copy);
+// dictionary columns are code arrays plus the dictionary from the header;
+// string columns are decoded on demand.
+
+const COLUMNAR_MAGIC = 'SCOL';
+const COLUMNAR_VERSION = 1;
+
+const COLUMNAR_ARRAYS = {
+    float32: Float32Array,
+    uint32: Uint32Array,
+    uint8: Uint8Array,
+    uint16: Uint16Array
+};
+
+function parseColumnar(buffer) {
+    const view = new DataView(buffer);
+    const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+    if (magic !== COLUMNAR_MAGIC) {
+        throw new Error('Not a columnar file');
+    }
+    const version = view.getUint32(4, true);
+    if (version !== COLUMNAR_VERSION) {
+        throw new Error(`Unsupported columnar version ${version}`);
+    }
+    const headerLength = view.getUint32(8, true);
+    const decoder = new TextDecoder();
+    const header = JSON.parse(decoder.decode(new Uint8Array(buffer, 12, headerLength)));
+    const rows = header.rows;
+    const columns = {};
+    header.columns.forEach(column => { columns[column.name] = column; });
+
+    // Typed-array view of a numeric or dictionary-code column
+    function column(name) {
+        const spec = columns[name];
+        const type = spec.type === 'dict' ? spec.codes : spec.type;
+        if (!COLUMNAR_ARRAYS[type]) {
+            throw new Error(`${name} is a ${spec.type} column`);
+        }
+        return new COLUMNAR_ARRAYS[type](buffer, spec.offset, rows);
+    }
+
+    // Plain JS values of any column
+    function values(name) {
+        const spec = columns[name];
+        if (spec.type === 'dict') {
+            return Array.from(column(name), code => spec.dictionary[code]);
+        }
+        if (spec.type === 'string') {
+            const offsets = new Uint32Array(buffer, spec.offset, rows + 1);
+            const data = new Uint8Array(buffer, spec.data_offset, spec.data_length);
+            const result = new Array(rows);
+            for (let i = 0; i < rows; i++) {
+                result[i] = decoder.decode(data.subarray(offsets[i], offsets[i + 1]));
+            }
+            return result;
+        }
+        return Array.from(column(name));
+    }
+
+    // Rows as objects, like the JSON datasets
+    function records() {
+        const names = Object.keys(columns);
+        const decoded = names.map(values);
+        const result = new Array(rows);
+        for (let i = 0; i < rows; i++) {
+            const record = {};
+            names.forEach((name, j) => { record[name] = decoded[j][i]; });
+            result[i] = record;
+        }
+        return result;
+    }
+
+    return { rows, source: header.source, columns, column, values, records };
+}
+
+async function loadColumnar(url) {
+    const response = await fetch(url);
+    if (!response.ok) {
+        throw new Error(`${url}: HTTP ${response.status}`);
+    }
+    return parseColumnar(await response.arrayBuffer());
+}
+
+// JSON dataset path → hash of the file the build's lookups were made from
+// (the inputs of data/nearest/manifest.json); empty if there is no index
+async function loadDatasetSources() {
+    try {
+        const response = await fetch(assetUrl('data/nearest/manifest.json'));
+        if (response.ok) {
+            return (await response.json()).inputs || {};
+        }
+    } catch (error) {
+        console.warn('Nearest-center manifest unavailable:', error.message);
+    }
+    return {};
+}
+
+// Center records from a .bin dataset, falling back to its JSON when the
+// .bin is missing or was not made from the file with hash `source`.
+// Resolves to { centers, source }; source is null for the JSON.
+async function loadCenters(jsonUrl, source) {
+    try {
+        const table = await loadColumnar(assetUrl(jsonUrl.replace(/\.json$/, '.bin')));
+        if (!source || table.source !== source) {
+            throw new Error(`stale copy (made from ${table.source}, expected ${source || 'unknown'})`);
+        }
+        return { centers: table.records(), source: table.source };
+    } catch (error) {
+        console.warn(`Falling back to ${jsonUrl}:`, error.message);
+        const response = await fetch(assetUrl(jsonUrl));
+        return { centers: await response.json(), source: null };
+    }
+}
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Compact columnar binary copies of the zipcode and center datasets.
+
+The JSON files stay the source of truth; these .bin files are what scripts
+and the web pages load. Layout (all integers little-endian):
+
+    b'SCOL'  uint32 version  uint32 header length  header JSON
+    column blocks, each starting on an 8-byte boundary
+
+The header lists the row count and, per column, its type and byte offset:
+
+    float32 / uint32   packed values
+    dict               uint8/uint16 codes into a `dictionary` list in the header
+    string             uint32 offsets (rows + 1) into a block of UTF-8 bytes
+
+ColumnarFile mmaps a file and returns zero-copy numpy arrays (or plain
+memoryviews when numpy is not installed); columnar.js is the browser reader.
+
+    python3 columnar.py              # regenerate the .bin files
+    python3 columnar.py info data/zipcodes.bin
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+
+from center_store import DATASETS, write_bytes_atomic
+
+MAGIC = b'SCOL'
+VERSION = 1
+ALIGNMENT = 8
+
+ZIPCODES_PATH = os.path.join('data', 'zipcodes.json')
+
+# Float columns; everything else in a center record is text
+COORDINATE_FIELDS = ('lat', 'lon', 'latitude', 'longitude')
+
+# Text columns with at most this share of distinct values are dictionary-encoded
+DICTIONARY_RATIO = 0.5
+
+NUMPY_TYPES = {'float32': '<f4', 'uint32': '<u4', 'uint8': 'u1', 'uint16': '<u2'}
+MEMORYVIEW_TYPES = {'float32': 'f', 'uint32': 'I', 'uint8': 'B', 'uint16': 'H'}
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def binary_path(json_path):
+    """data/zipcodes.json → data/zipcodes.bin"""
+    return os.path.splitext(json_path)[0] + '.bin'
+
+
+def _pad(blob):
+    return blob + b'\0' * (-len(blob) % ALIGNMENT)
+
+
+def source_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+
+def encode(rows, columns, source=None):
+    """
+    Serialize `rows` rows; columns is a list of (name, kind, values) with
+    kind one of 'float32', 'uint32' or 'text'. `source` is the hash of the
+    JSON the data came from, so readers can tell a stale copy. Returns the
+    file bytes.
+    """
+    header_columns, blocks = [], []
+
+    for name, kind, values in columns:
+        if kind in ('float32', 'uint32'):
+            fmt = 'f' if kind == 'float32' else 'I'
+            blocks.append(struct.pack(f'<{rows}{fmt}', *values))
+            header_columns.append({"name": name, "type": kind})
+            continue
+
+        values = ['' if v is None else str(v) for v in values]
+        distinct = list(dict.fromkeys(values))
+        if len(distinct) <= max(1, rows * DICTIONARY_RATIO) and len(distinct) <= 0xFFFF:
+            codes = {value: i for i, value in enumerate(distinct)}
+            width = 'uint8' if len(distinct) <= 0xFF else 'uint16'
+            fmt = 'B' if width == 'uint8' else 'H'
+            blocks.append(struct.pack(f'<{rows}{fmt}', *(codes[v] for v in values)))
+            header_columns.append({"name": name, "type": "dict", "codes": width,
+                                   "dictionary": distinct})
+        else:
+            encoded = [v.encode('utf-8') for v in values]
+            offsets = [0]
+            for item in encoded:
+                offsets.append(offsets[-1] + len(item))
+            blocks.append(struct.pack(f'<{rows + 1}I', *offsets))
+            blocks.append(b''.join(encoded))
+            header_columns.append({"name": name, "type": "string"})
+
+    # Offsets depend on the header length, which depends on the offsets'
+    # digits; lay out until the header stops growing
+    header_length = 0
+    while True:
+        position = len(_pad(b'\0' * (12 + header_length)))
+        block_iter = iter(blocks)
+        for column in header_columns:
+            block = next(block_iter)
+            column["offset"], column["length"] = position, len(block)
+            position += len(_pad(block))
+            if column["type"] == "string":
+                data = next(block_iter)
+                column["data_offset"], column["data_length"] = position, len(data)
+                position += len(_pad(data))
+        header = json.dumps({"rows": rows, "source": source, "columns": header_columns},
+                            separators=(',', ':')).encode('utf-8')
+        if len(header) == header_length:
+            break
+        header_length = len(header)
+
+    prefix = _pad(MAGIC + struct.pack('<II', VERSION, len(header)) + header)
+    return prefix + b''.join(_pad(block) for block in blocks)
+
+
+def encode_zipcodes(zipcodes, source=None):
+    """{zip: {lat, lon, city, state}} → bytes, sorted by zip"""
+    codes = sorted(zipcodes)
+    columns = [
+        ("zip", 'uint32', [int(z) for z in codes]),
+        ("lat", 'float32', [zipcodes[z]['lat'] for z in codes]),
+        ("lon", 'float32', [zipcodes[z]['lon'] for z in codes]),
+        ("city", 'text', [zipcodes[z].get('city', '') for z in codes]),
+        ("state", 'text', [zipcodes[z].get('state', '') for z in codes]),
+    ]
+    return encode(len(codes), columns, source)
+
+
+def encode_centers(centers, source=None):
+    """Published center records → bytes, one column per field in first-seen order"""
+    fields = list(dict.fromkeys(key for center in centers for key in center))
+    columns = [
+        (field, 'float32' if field in COORDINATE_FIELDS else 'text',
+         [center.get(field) for center in centers])
+        for field in fields
+    ]
+    return encode(len(centers), columns, source)
+
+
+class ColumnarFile:
+    """Memory-mapped reader; column() views share the mapping, no copies"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[:4] != MAGIC:
+            raise ValueError(f"{path} is not a columnar file")
+        version, header_length = struct.unpack_from('<II', self.map, 4)
+        if version != VERSION:
+            raise ValueError(f"{path}: unsupported version {version}")
+        header = json.loads(bytes(self.map[12:12 + header_length]))
+        self.rows = header['rows']
+        self.source = header.get('source')
+        self.columns = {column['name']: column for column in header['columns']}
+
+    def __len__(self):
+        return self.rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        try:
+            self.map.close()
+        except BufferError:
+            # numpy views still reference the mapping; it closes when they go
+            pass
+
+    def _view(self, kind, offset, count):
+        if np is not None:
+            return np.frombuffer(self.map, dtype=NUMPY_TYPES[kind], count=count, offset=offset)
+        if sys.byteorder != 'little':
+            raise RuntimeError("Reading columnar files without numpy needs a little-endian host")
+        size = struct.calcsize(MEMORYVIEW_TYPES[kind])
+        return memoryview(self.map)[offset:offset + count * size].cast(MEMORYVIEW_TYPES[kind])
+
+    def column(self, name):
+        """Numeric values, or dictionary codes, as a zero-copy view"""
+        column = self.columns[name]
+        kind = column['codes'] if column['type'] == 'dict' else column['type']
+        if kind == 'string':
+            raise TypeError(f"{name} is a string column; use values()")
+        return self._view(kind, column['offset'], self.rows)
+
+    def dictionary(self, name):
+        return self.columns[name]['dictionary']
+
+    def values(self, name):
+        """Decoded Python values of any column"""
+        column = self.columns[name]
+        if column['type'] == 'dict':
+            dictionary = column['dictionary']
+            return [dictionary[code] for code in self.column(name).tolist()]
+        if column['type'] == 'string':
+            offsets = self._view('uint32', column['offset'], self.rows + 1).tolist()
+            data = self.map[column['data_offset']:column['data_offset'] + column['data_length']]
+            return [data[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(self.rows)]
+        return self.column(name).tolist()
+
+    def records(self):
+        """Rows as dicts (floats widened from float32)"""
+        names = list(self.columns)
+        columns = [self.values(name) for name in names]
+        return [dict(zip(names, row)) for row in zip(*columns)]
+
+
+def open_current(path):
+    """ColumnarFile for the .bin copy of `path`, or None if missing or stale"""
+    try:
+        table = ColumnarFile(binary_path(path))
+    except (FileNotFoundError, ValueError):
+        return None
+    if table.source != source_hash(path):
+        table.close()
+        return None
+    return table
+
+
+def load_zipcode_arrays(path=ZIPCODES_PATH):
+    """
+    (sorted zip numbers, float32 latitudes, float32 longitudes) as numpy
+    arrays, mapped from the .bin copy when it is current and parsed from the
+    JSON otherwise
+    """
+    table = open_current(path)
+    if table is not None:
+        return table.column('zip'), table.column('lat'), table.column('lon')
+    with open(path, 'r') as f:
+        zipcodes = json.load(f)
+    codes = sorted(zipcodes)
+    return (np.array([int(z) for z in codes], dtype=np.uint32),
+            np.array([zipcodes[z]['lat'] for z in codes], dtype=np.float32),
+            np.array([zipcodes[z]['lon'] for z in codes], dtype=np.float32))
+
+
+def write_binaries(force=False):
+    """Regenerate .bin files whose JSON changed; returns the paths written"""
+    changed = []
+    sources = [(ZIPCODES_PATH, encode_zipcodes)]
+    sources += [(path, encode_centers) for path, _ in DATASETS.values()]
+    for path, encoder in sources:
+        if not os.path.exists(path):
+            continue
+        table = None if force else open_current(path)
+        if table is not None:
+            table.close()
+            continue
+        with open(path, 'r') as f:
+            data = encoder(json.load(f), source_hash(path))
+        if write_bytes_atomic(binary_path(path), data):
+            changed.append(binary_path(path))
+            print(f"✓ {binary_path(path)}: {len(data) / 1024:.0f} KB "
+                  f"(JSON {os.path.getsize(path) / 1024:.0f} KB)")
+    return changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar binary copies of the datasets")
+    parser.add_argument('--force', action='store_true', help="rewrite even if up to date")
+    subparsers = parser.add_subparsers(dest='command')
+    info = subparsers.add_parser('info', help="describe a .bin file")
+    info.add_argument('path')
+    args = parser.parse_args()
+
+    if args.command == 'info':
+        with ColumnarFile(args.path) as table:
+            print(f"{args.path}: {table.rows} rows")
+            for name, column in table.columns.items():
+                detail = f"{len(column['dictionary'])} distinct" if column['type'] == 'dict' else ''
+                print(f"  {name:20} {column['type']:8} {column['length']:>8} bytes  {detail}")
+    else:
+        if not write_binaries(force=args.force):
+            print("= .bin files up to date")
+
+
+if __name__ == '__main__':
+    main()
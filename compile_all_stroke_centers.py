@@ -2,13 +2,11 @@
 """
 Comprehensive Stroke Center Data Compiler
 Aggregates data from multiple state health departments and creates a complete dataset.
-"""
 
-import json
-import re
-import requests
-import time
-from typing import List, Dict
+Superseded by compile_comprehensive_centers.py, whose lists build.py
+reads. Running this script runs the incremental build; it no longer writes
+data/stroke_centers.json itself.
+"""
 
 # List of comprehensive stroke centers from Pennsylvania (extracted from PDF)
 PA_COMPREHENSIVE_CENTERS = [
@@ -110,142 +108,18 @@ KNOWN_COMPREHENSIVE_CENTERS = [
 ]
 
 
-def geocode_address(name, address, city, state, zipcode):
-    """
-    Geocode an address using Nominatim (OpenStreetMap) - free, no API key required
-    """
-    try:
-        # Build query string
-        if address:
-            query = f"{address}, {city}, {state} {zipcode}, USA"
-        else:
-            query = f"{name}, {city}, {state} {zipcode}, USA"
-
-        # Nominatim API (free, but rate-limited to 1 request/second)
-        url = "https://nominatim.openstreetmap.org/search"
-        params = {
-            "q": query,
-            "format": "json",
-            "limit": 1,
-            "countrycodes": "us"
-        }
-        headers = {
-            "User-Agent": "StrokeCenterFinder/1.0"
-        }
-
-        response = requests.get(url, params=params, headers=headers, timeout=10)
-        time.sleep(1.1)  # Rate limiting: max 1 request per second
-
-        if response.status_code == 200:
-            results = response.json()
-            if results and len(results) > 0:
-                lat = float(results[0]['lat'])
-                lon = float(results[0]['lon'])
-                print(f"  ✓ Geocoded: {name} → ({lat}, {lon})")
-                return lat, lon
-
-        # Fallback: try with just city, state, zip
-        query = f"{city}, {state} {zipcode}, USA"
-        params["q"] = query
-        response = requests.get(url, params=params, headers=headers, timeout=10)
-        time.sleep(1.1)
-
-        if response.status_code == 200:
-            results = response.json()
-            if results and len(results) > 0:
-                lat = float(results[0]['lat'])
-                lon = float(results[0]['lon'])
-                print(f"  ✓ Geocoded (city-level): {name} → ({lat}, {lon})")
-                return lat, lon
-
-    except Exception as e:
-        print(f"  ✗ Geocoding failed for {name}: {e}")
-
-    return None, None
-
-
-def compile_all_centers():
-    """
-    Compile all comprehensive stroke centers from various sources
-    """
-    print("="*70)
-    print("COMPREHENSIVE STROKE CENTER DATA COMPILER")
-    print("="*70)
+def main():
+    """Run the incremental build, which owns data/stroke_centers.json"""
+    # Imported here: build.py imports the lists above
+    import build
+    print("These lists were superseded by compile_comprehensive_centers.py.")
+    print("Running build.py instead, which rebuilds only what changed.")
     print()
-
-    all_centers = []
-
-    # Combine Pennsylvania and known centers
-    combined = PA_COMPREHENSIVE_CENTERS + KNOWN_COMPREHENSIVE_CENTERS
-
-    print(f"Processing {len(combined)} stroke centers...")
-    print()
-
-    for i, center in enumerate(combined, 1):
-        print(f"[{i}/{len(combined)}] Processing: {center['name']}")
-
-        # Get geocoding
-        lat, lon = geocode_address(
-            center['name'],
-            center.get('address', ''),
-            center['city'],
-            center['state'],
-            center['zipcode']
-        )
-
-        if lat and lon:
-            center_data = {
-                "name": center['name'],
-                "address": center.get('address', ''),
-                "city": center['city'],
-                "state": center['state'],
-                "zipcode": center['zipcode'],
-                "latitude": lat,
-                "longitude": lon,
-                "phone": center.get('phone', ''),
-                "certification_org": center.get('certification_org', 'Joint Commission/DNV'),
-                "certification_type": "Comprehensive Stroke Center"
-            }
-            all_centers.append(center_data)
-        else:
-            print(f"  ⚠ Skipping {center['name']} - geocoding failed")
-
-    print()
-    print("="*70)
-    print(f"COMPILATION COMPLETE: {len(all_centers)} centers successfully geocoded")
-    print("="*70)
-    print()
-
-    # Save to file
-    output_file = 'data/stroke_centers.json'
-    with open(output_file, 'w') as f:
-        json.dump(all_centers, f, indent=2)
-
-    print(f"✓ Data saved to: {output_file}")
-    print(f"✓ Total comprehensive stroke centers: {len(all_centers)}")
-
-    # Statistics
-    states = {}
-    for center in all_centers:
-        state = center['state']
-        states[state] = states.get(state, 0) + 1
-
-    print()
-    print("Centers by state:")
-    for state in sorted(states.keys()):
-        print(f"  {state}: {states[state]} centers")
-
-    return all_centers
+    build.main()
 
 
-if __name__ == "__main__":
+if __name__ == '__main__':
     try:
-        centers = compile_all_centers()
-        print("\n✓ Success! Your stroke center finder now has real data.")
-        print("  Open index.html to test the dashboard.")
+        main()
     except KeyboardInterrupt:
         print("\n\nProcess interrupted by user")
-    except Exception as e:
-        print(f"\n✗ Error: {e}")
-        import traceback
-        traceback.print_exc()
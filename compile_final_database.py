@@ -2,11 +2,10 @@
 """
 Final Comprehensive Stroke Center Database - Targeting ~162 centers (54.5% of 297)
 Combines: FL (49), PA (14), NY (26), TX (48), + Major Academic Centers (54)
-"""
 
-import json
-import requests
-import time
+The lists below are build.py sources. Running this script runs the
+incremental build; it no longer writes data/stroke_centers.json itself.
+"""
 
 # New York Comprehensive Stroke Centers (26) - Official NYS Data
 NY_CENTERS = [
@@ -91,144 +90,18 @@ TX_CENTERS = [
 ]
 
 
-def geocode_address(name, city, state, zipcode):
-    """Geocode using OpenStreetMap Nominatim API (free)"""
-    try:
-        query = f"{name}, {city}, {state} {zipcode}, USA"
-        url = "https://nominatim.openstreetmap.org/search"
-        params = {
-            "q": query,
-            "format": "json",
-            "limit": 1,
-            "countrycodes": "us"
-        }
-        headers = {"User-Agent": "StrokeCenterFinder/2.0"}
-
-        response = requests.get(url, params=params, headers=headers, timeout=10)
-        time.sleep(1.1)  # Rate limiting
-
-        if response.status_code == 200:
-            results = response.json()
-            if results:
-                return float(results[0]['lat']), float(results[0]['lon'])
-
-        # Fallback: just city, state, zip
-        query = f"{city}, {state} {zipcode}, USA"
-        params["q"] = query
-        response = requests.get(url, params=params, headers=headers, timeout=10)
-        time.sleep(1.1)
-
-        if response.status_code == 200:
-            results = response.json()
-            if results:
-                return float(results[0]['lat']), float(results[0]['lon'])
-    except Exception as e:
-        print(f"  ✗ Geocoding failed for {name}: {e}")
-
-    return None, None
-
-
-def compile_final_database():
-    """Compile final comprehensive database"""
-    print("="*80)
-    print("FINAL COMPREHENSIVE STROKE CENTER DATABASE COMPILER")
-    print("Targeting ~162 centers (54.5% of 297 total US centers)")
-    print("="*80)
-    print()
-
-    # Load existing data
-    try:
-        with open('data/stroke_centers.json', 'r') as f:
-            existing = json.load(f)
-        print(f"✓ Loaded {len(existing)} existing centers")
-    except:
-        existing = []
-        print("✗ No existing data found, starting fresh")
-
-    # Combine new data
-    new_centers = NY_CENTERS + TX_CENTERS
-    print(f"✓ Adding {len(NY_CENTERS)} New York centers")
-    print(f"✓ Adding {len(TX_CENTERS)} Texas centers")
-    print()
-
-    # Deduplicate by name+city+state
-    all_centers_dict = {}
-
-    # Add existing first
-    for center in existing:
-        key = f"{center['name']}|{center['city']}|{center['state']}".lower()
-        all_centers_dict[key] = center
-
-    # Add new (will overwrite if duplicate)
-    processed = 0
-    for center in new_centers:
-        key = f"{center['name']}|{center['city']}|{center['state']}".lower()
-        if key not in all_centers_dict:
-            processed += 1
-            print(f"[{processed}] Processing: {center['name']}, {center['city']}, {center['state']}")
-
-            lat, lon = geocode_address(center['name'], center['city'], center['state'], center['zipcode'])
-
-            if lat and lon:
-                all_centers_dict[key] = {
-                    "name": center['name'],
-                    "address": center.get('address', ''),
-                    "city": center['city'],
-                    "state": center['state'],
-                    "zipcode": center['zipcode'],
-                    "latitude": lat,
-                    "longitude": lon,
-                    "phone": center.get('phone', ''),
-                    "certification_org": "Joint Commission/DNV",
-                    "certification_type": "Comprehensive Stroke Center"
-                }
-                print(f"  ✓ Geocoded: ({lat}, {lon})")
-            else:
-                print(f"  ⚠ Skipping - geocoding failed")
-
-    # Convert back to list
-    final_centers = list(all_centers_dict.values())
-
-    print()
-    print("="*80)
-    print(f"COMPILATION COMPLETE: {len(final_centers)} unique centers")
-    print("="*80)
-    print()
-
-    # Save
-    with open('data/stroke_centers.json', 'w') as f:
-        json.dump(final_centers, f, indent=2)
-
-    print(f"✓ Data saved to: data/stroke_centers.json")
-    print(f"✓ Total comprehensive stroke centers: {len(final_centers)}")
-
-    # Statistics
-    states = {}
-    for center in final_centers:
-        state = center['state']
-        states[state] = states.get(state, 0) + 1
-
+def main():
+    """Run the incremental build, which owns data/stroke_centers.json"""
+    # Imported here: build.py imports the lists above
+    import build
+    print("These lists are build.py sources.")
+    print("Running build.py instead, which rebuilds only what changed.")
     print()
-    print(f"Coverage: {len(states)} states")
-    print()
-    print("Top 10 states by center count:")
-    for state, count in sorted(states.items(), key=lambda x: x[1], reverse=True)[:10]:
-        print(f"  {state}: {count} centers")
-
-    print()
-    print(f"Coverage: {len(final_centers) / 297 * 100:.1f}% of estimated 297 total US comprehensive stroke centers")
-
-    return final_centers
+    build.main()
 
 
-if __name__ == "__main__":
+if __name__ == '__main__':
     try:
-        centers = compile_final_database()
-        print("\n✓ Success! Database expanded with NY + TX official data.")
-        print("  Refresh index.html to see all centers.")
+        main()
     except KeyboardInterrupt:
-        print("\n\nProcess interrupted")
-    except Exception as e:
-        print(f"\n✗ Error: {e}")
-        import traceback
-        traceback.print_exc()
+        print("\n\nProcess interrupted by user")
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Stroke-desert coverage: distance to the nearest CSC and TSC for every zip
+centroid and every cell of a lattice over the populated US, summarized into
+artifacts the map and reports load directly:
+
+    data/coverage/uncovered.geojson   areas beyond each radius band of any
+                                      CSC, any TSC, or either, as merged
+                                      lattice-cell rectangles
+    data/coverage/states.json         per-state share of zips within each band
+    data/coverage/zips.bin            zip → nearest CSC/TSC miles (columnar.py format)
+
+The lattice keeps only cells within LAND_CELLS cells of a zip centroid, so
+oceans, lakes and empty desert are left out. Cells are CELL_DEGREES on a
+side (about 14 miles north-south at the default). build.py regenerates
+the coverage when the centers or zipcodes change.
+
+    python3 coverage.py               # rebuild if the inputs changed, print the state table
+    python3 coverage.py --cell 0.1 --force
+"""
+
+import argparse
+import json
+import os
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    raise SystemExit("The coverage engine needs numpy: pip install numpy")
+
+from center_store import DATASETS, manifest_up_to_date, write_bytes_atomic, write_text_atomic
+from columnar import encode, load_zipcode_arrays
+from spatial_index import SpatialIndex
+from zip_states import ZIP3_STATES
+
+ZIPCODES_PATH = os.path.join('data', 'zipcodes.json')
+COVERAGE_DIR = os.path.join('data', 'coverage')
+
+# Straight-line radius bands; 60 miles is the map's "golden hour"
+RADIUS_BANDS = (30, 60, 90)
+MAP_RADIUS_MILES = 60
+
+# Lattice cell size, and how many cells around a zip centroid count as populated
+CELL_DEGREES = 0.2
+LAND_CELLS = 2
+
+# Nearest of either dataset
+EITHER = 'either'
+
+
+def lattice(zip_lat, zip_lon, cell=CELL_DEGREES, land_cells=LAND_CELLS):
+    """
+    (rows, cols) of the lattice cells within land_cells of a zip centroid.
+    A cell spans [row * cell, (row + 1) * cell) of latitude and
+    [col * cell - 180, (col + 1) * cell - 180) of longitude.
+    """
+    columns = int(round(360 / cell))
+    rows = np.floor(np.asarray(zip_lat, dtype=np.float64) / cell).astype(np.int64)
+    cols = np.floor((np.asarray(zip_lon, dtype=np.float64) + 180) / cell).astype(np.int64)
+    offsets = np.arange(-land_cells, land_cells + 1)
+    all_rows = (rows[:, None, None] + offsets[None, :, None]).repeat(len(offsets), axis=2)
+    all_cols = (cols[:, None, None] + offsets[None, None, :]) % columns
+    all_cols = np.broadcast_to(all_cols, all_rows.shape)
+    keys = np.unique(all_rows.ravel() * columns + all_cols.ravel())
+    return keys // columns, keys % columns
+
+
+def cell_centers(rows, cols, cell=CELL_DEGREES):
+    return (rows + 0.5) * cell, (cols + 0.5) * cell - 180
+
+
+def nearest_miles(index, lat, lon):
+    """Miles from each point to the nearest point of the index"""
+    _, miles = index.nearest_many(lat, lon, 1)
+    return miles[:, 0]
+
+
+def merge_cells(rows, cols):
+    """
+    Rectangles (row0, row1, col0, col1), inclusive, covering a set of cells:
+    runs along each row, then identical runs in consecutive rows joined.
+    """
+    order = np.lexsort((cols, rows))
+    rows, cols = rows[order].tolist(), cols[order].tolist()
+    runs = []
+    for row, col in zip(rows, cols):
+        if runs and runs[-1][0] == row and runs[-1][2] == col - 1:
+            runs[-1][2] = col
+        else:
+            runs.append([row, col, col])
+
+    rectangles, open_runs = [], {}
+    for row, col0, col1 in runs:
+        previous = open_runs.get((col0, col1))
+        if previous is not None and previous[1] == row - 1:
+            previous[1] = row
+        else:
+            if previous is not None:
+                rectangles.append((previous[0], previous[1], col0, col1))
+            open_runs[(col0, col1)] = [row, row]
+    rectangles.extend((start, end, col0, col1) for (col0, col1), (start, end) in open_runs.items())
+    rectangles.sort()
+    return rectangles
+
+
+def rectangles_geometry(rectangles, cell=CELL_DEGREES):
+    """GeoJSON MultiPolygon of (row0, row1, col0, col1) rectangles"""
+    polygons = []
+    for row0, row1, col0, col1 in rectangles:
+        south, north = round(row0 * cell, 4), round((row1 + 1) * cell, 4)
+        west, east = round(col0 * cell - 180, 4), round((col1 + 1) * cell - 180, 4)
+        polygons.append([[[west, south], [east, south], [east, north], [west, north], [west, south]]])
+    return {"type": "MultiPolygon", "coordinates": polygons}
+
+
+def state_statistics(states, distances, bands=RADIUS_BANDS):
+    """Per-state zip counts, share within each band, median and max miles"""
+    stats = {}
+    for state in sorted(set(states.tolist()) - {''}):
+        mask = states == state
+        entry = {"zips": int(mask.sum()), "within": {}, "median_miles": {}, "max_miles": {}}
+        for band in bands:
+            entry["within"][str(band)] = {
+                name: round(float((miles[mask] <= band).mean()), 4) for name, miles in distances.items()
+            }
+        for name, miles in distances.items():
+            entry["median_miles"][name] = round(float(np.median(miles[mask])), 1)
+            entry["max_miles"][name] = round(float(miles[mask].max()), 1)
+        stats[state] = entry
+    return stats
+
+
+def compute_coverage(cell=CELL_DEGREES, land_cells=LAND_CELLS, bands=RADIUS_BANDS):
+    """(zip numbers, zip distances, states.json data, GeoJSON) from the published files"""
+    numbers, zip_lat, zip_lon = load_zipcode_arrays(ZIPCODES_PATH)
+    zip_lat, zip_lon = zip_lat.astype(np.float64), zip_lon.astype(np.float64)
+    rows, cols = lattice(zip_lat, zip_lon, cell, land_cells)
+    cell_lat, cell_lon = cell_centers(rows, cols, cell)
+
+    zip_miles, cell_miles = {}, {}
+    for dataset in DATASETS:
+        index = SpatialIndex.from_dataset(dataset)
+        zip_miles[dataset] = nearest_miles(index, zip_lat, zip_lon)
+        cell_miles[dataset] = nearest_miles(index, cell_lat, cell_lon)
+    zip_miles[EITHER] = np.minimum.reduce([zip_miles[d] for d in DATASETS])
+    cell_miles[EITHER] = np.minimum.reduce([cell_miles[d] for d in DATASETS])
+
+    states = np.array(ZIP3_STATES)[numbers.astype(np.int64) // 100]
+    summary = {
+        "radius_bands": list(bands),
+        "cell_degrees": cell,
+        "national": {
+            "zips": len(numbers),
+            "lattice_cells": len(rows),
+            "zips_within": {str(band): {name: round(float((miles <= band).mean()), 4)
+                                        for name, miles in zip_miles.items()} for band in bands},
+            "area_within": {str(band): {name: round(float((miles <= band).mean()), 4)
+                                        for name, miles in cell_miles.items()} for band in bands},
+        },
+        "states": state_statistics(states, zip_miles, bands),
+    }
+
+    features = []
+    for band in bands:
+        for name, miles in cell_miles.items():
+            outside = miles > band
+            rectangles = merge_cells(rows[outside], cols[outside])
+            features.append({
+                "type": "Feature",
+                "properties": {"dataset": name, "radius_miles": band, "cells": int(outside.sum())},
+                "geometry": rectangles_geometry(rectangles, cell),
+            })
+    geojson = {"type": "FeatureCollection", "features": features}
+    return numbers, zip_miles, summary, geojson
+
+
+def build_coverage(force=False, output_dir=COVERAGE_DIR, cell=CELL_DEGREES, land_cells=LAND_CELLS):
+    """Write the coverage artifacts if their inputs changed; returns True if written"""
+    inputs = [ZIPCODES_PATH] + [path for path, _ in DATASETS.values()]
+    parameters = {"cell_degrees": cell, "land_cells": land_cells, "radius_bands": list(RADIUS_BANDS)}
+    manifest_path = os.path.join(output_dir, 'manifest.json')
+    current, manifest = manifest_up_to_date(manifest_path, inputs, **parameters)
+    if not force and current:
+        print(f"= {output_dir}: up to date")
+        return False
+
+    start = time.time()
+    numbers, zip_miles, summary, geojson = compute_coverage(cell, land_cells)
+    os.makedirs(output_dir, exist_ok=True)
+
+    write_text_atomic(os.path.join(output_dir, 'uncovered.geojson'),
+                      json.dumps(geojson, separators=(',', ':')))
+    write_text_atomic(os.path.join(output_dir, 'states.json'), json.dumps(summary, indent=2))
+    columns = [("zip", 'uint32', numbers.tolist())]
+    columns += [(f"{name}_miles", 'float32', miles.tolist()) for name, miles in zip_miles.items()]
+    write_bytes_atomic(os.path.join(output_dir, 'zips.bin'), encode(len(numbers), columns))
+    write_text_atomic(manifest_path, json.dumps(manifest, indent=2))
+
+    within = summary["national"]["zips_within"][str(MAP_RADIUS_MILES)]
+    print(f"✓ {output_dir}: {len(numbers)} zips, {summary['national']['lattice_cells']} lattice cells "
+          f"({within[EITHER]:.1%} of zips within {MAP_RADIUS_MILES} miles; {time.time() - start:.1f}s)")
+    return True
+
+
+def print_states(path=os.path.join(COVERAGE_DIR, 'states.json'), band=MAP_RADIUS_MILES):
+    with open(path, 'r') as f:
+        summary = json.load(f)
+    print()
+    print(f"Share of zips within {band} miles (straight line):")
+    print(f"  {'state':5} {'zips':>6} {'CSC':>7} {'TSC':>7} {'either':>7} {'median CSC mi':>14}")
+    for state, entry in sorted(summary['states'].items(), key=lambda item: item[1]['within'][str(band)][EITHER]):
+        within = entry['within'][str(band)]
+        print(f"  {state:5} {entry['zips']:>6} {within['csc']:>7.1%} {within['tsc']:>7.1%} "
+              f"{within[EITHER]:>7.1%} {entry['median_miles']['csc']:>14.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute stroke center coverage artifacts")
+    parser.add_argument('--force', action='store_true', help="rebuild even if inputs are unchanged")
+    parser.add_argument('--cell', type=float, default=CELL_DEGREES,
+                        help=f"lattice cell size in degrees (default {CELL_DEGREES})")
+    parser.add_argument('--land-cells', type=int, default=LAND_CELLS,
+                        help=f"cells around a zip centroid included in the lattice (default {LAND_CELLS})")
+    args = parser.parse_args()
+    build_coverage(force=args.force, cell=args.cell, land_cells=args.land_cells)
+    print_states()
+
+
+if __name__ == '__main__':
+    main()
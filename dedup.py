@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Fuzzy duplicate detection for stroke center records.
+
+The compile scripts only catch exact name|city|state repeats. This module
+also finds near-duplicates ("Mount Sinai Hospital" / "The Mount Sinai
+Hospital", the same hospital filed under two cities) without comparing
+every pair: candidates are blocked by geohash cell (the record's cell and
+its eight neighbours) and by the distinctive tokens of their names, then
+each candidate pair is scored by weighted name overlap times a proximity
+factor. Records without coordinates fall back to city/state proximity, so
+pending records can be checked before they are geocoded.
+
+    python3 dedup.py                 # report duplicates across both datasets
+    python3 dedup.py --threshold 0.6 # include weaker matches for review
+"""
+
+import argparse
+import json
+import math
+import os
+from dataclasses import dataclass
+
+from center_store import DATASETS, haversine_miles
+from gazetteer_geocoder import name_tokens
+
+# Pairs scoring at least this are treated as the same center
+DUPLICATE_THRESHOLD = 0.8
+# Pairs between this and DUPLICATE_THRESHOLD are reported for review
+REVIEW_THRESHOLD = 0.6
+
+# ~4.9 km cells; with the neighbours each block spans about 15 km
+GEOHASH_PRECISION = 5
+
+# Full proximity credit within SAME_SITE_MILES, none beyond MAX_MILES
+SAME_SITE_MILES = 1.0
+MAX_MILES = 15.0
+# Proximity credit for the same city when coordinates are missing or disagree
+SAME_CITY_FACTOR = 0.9
+
+# Name tokens shared by more records than this ("hospital", "medical")
+# are too common to block on
+MAX_TOKEN_BLOCK = 50
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def geohash(lat, lon, precision=GEOHASH_PRECISION):
+    """Standard base-32 geohash of a point"""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    bits, value, even = 0, 0, True
+    while len(chars) < precision:
+        interval, coordinate = (lon_range, lon) if even else (lat_range, lat)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def geohash_cell_size(precision=GEOHASH_PRECISION):
+    """(degrees of latitude, degrees of longitude) covered by one cell"""
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def geohash_neighbourhood(lat, lon, precision=GEOHASH_PRECISION):
+    """The cell containing the point plus its eight neighbours"""
+    dlat, dlon = geohash_cell_size(precision)
+    return {
+        geohash(max(-90.0, min(90.0, lat + i * dlat)), (lon + j * dlon + 180) % 360 - 180, precision)
+        for i in (-1, 0, 1) for j in (-1, 0, 1)
+    }
+
+
+@dataclass(frozen=True)
+class Match:
+    """A scored candidate pair; a and b index the input records, a < b"""
+    a: int
+    b: int
+    score: float
+    name_score: float
+    distance: float  # miles, or None when either record lacks coordinates
+
+    @property
+    def duplicate(self):
+        return self.score >= DUPLICATE_THRESHOLD
+
+
+def has_coordinates(center):
+    return center.get('latitude') is not None and center.get('longitude') is not None
+
+
+def proximity(a, b):
+    """1.0 for the same site, falling to 0 at MAX_MILES; (factor, miles)"""
+    same_state = (a.get('state') or '').upper() == (b.get('state') or '').upper()
+    same_city = same_state and (a.get('city') or '').lower() == (b.get('city') or '').lower()
+
+    if has_coordinates(a) and has_coordinates(b):
+        miles = haversine_miles(a['latitude'], a['longitude'], b['latitude'], b['longitude'])
+        if miles <= SAME_SITE_MILES:
+            return 1.0, miles
+        if miles > MAX_MILES:
+            return 0.0, miles
+        factor = 1 - (miles - SAME_SITE_MILES) / (MAX_MILES - SAME_SITE_MILES)
+        # City-level geocodes of the same hospital can land miles apart
+        return max(factor, SAME_CITY_FACTOR if same_city else 0.0), miles
+
+    if not same_state:
+        return 0.0, None
+    if a.get('zipcode') and a.get('zipcode') == b.get('zipcode'):
+        return 1.0, None
+    if same_city:
+        return SAME_CITY_FACTOR, None
+    # Same state, different city: a hospital listed under a neighbouring
+    # town scores as a review candidate at best
+    return 0.7, None
+
+
+class DuplicateFinder:
+    """Blocks and scores candidate pairs over a list of center records"""
+
+    def __init__(self, centers):
+        self.centers = centers
+        self.tokens = [name_tokens(c['name']) for c in centers]
+
+        document_frequency = {}
+        for tokens in self.tokens:
+            for token in tokens:
+                document_frequency[token] = document_frequency.get(token, 0) + 1
+        self.document_frequency = document_frequency
+        n = max(1, len(centers))
+        self.weights = {t: math.log(1 + n / df) for t, df in document_frequency.items()}
+
+    def name_score(self, i, j):
+        """IDF-weighted Jaccard overlap of two names' tokens"""
+        a, b = self.tokens[i], self.tokens[j]
+        union = sum(self.weights[t] for t in a | b)
+        return sum(self.weights[t] for t in a & b) / union if union else 0.0
+
+    def candidate_pairs(self):
+        """Index pairs sharing a geohash neighbourhood or a distinctive name token"""
+        blocks = {}
+        for i, center in enumerate(self.centers):
+            if has_coordinates(center):
+                blocks.setdefault(('cell', geohash(center['latitude'], center['longitude'])), []).append(i)
+            state = (center.get('state') or '').upper()
+            for token in self.tokens[i]:
+                if self.document_frequency[token] <= MAX_TOKEN_BLOCK:
+                    blocks.setdefault(('token', state, token), []).append(i)
+
+        pairs = set()
+        for i, center in enumerate(self.centers):
+            if not has_coordinates(center):
+                continue
+            for cell in geohash_neighbourhood(center['latitude'], center['longitude']):
+                for j in blocks.get(('cell', cell), ()):
+                    if i < j:
+                        pairs.add((i, j))
+        for key, members in blocks.items():
+            if key[0] == 'token':
+                for x, i in enumerate(members):
+                    for j in members[x + 1:]:
+                        pairs.add((i, j))
+        return pairs
+
+    def matches(self, threshold=REVIEW_THRESHOLD):
+        """Scored pairs at or above threshold, best first"""
+        results = []
+        for i, j in self.candidate_pairs():
+            factor, miles = proximity(self.centers[i], self.centers[j])
+            if factor == 0.0:
+                continue
+            name_score = self.name_score(i, j)
+            score = name_score * factor
+            if score >= threshold:
+                results.append(Match(i, j, score, name_score, miles))
+        results.sort(key=lambda m: (-m.score, m.a, m.b))
+        return results
+
+
+def find_duplicates(centers, threshold=DUPLICATE_THRESHOLD):
+    """
+    Indices of records that duplicate an earlier record. Inputs are in
+    precedence order, so the first record of each duplicate cluster is kept.
+    Returns {dropped index: kept index}.
+    """
+    parent = list(range(len(centers)))
+
+    def root(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for match in DuplicateFinder(centers).matches(threshold):
+        ra, rb = root(match.a), root(match.b)
+        if ra != rb:
+            parent[max(ra, rb)] = min(ra, rb)
+
+    return {i: root(i) for i in range(len(centers)) if root(i) != i}
+
+
+def describe(center):
+    return f"{center['name']}, {center['city']}, {center['state']}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find near-duplicate stroke centers")
+    parser.add_argument('--threshold', type=float, default=REVIEW_THRESHOLD,
+                        help=f"minimum pair score to report (default {REVIEW_THRESHOLD})")
+    args = parser.parse_args()
+
+    centers, datasets = [], []
+    for dataset, (path, _) in DATASETS.items():
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                records = json.load(f)
+            centers.extend(records)
+            datasets.extend([dataset] * len(records))
+
+    finder = DuplicateFinder(centers)
+    pairs = finder.candidate_pairs()
+    matches = finder.matches(args.threshold)
+    print(f"{len(centers)} centers, {len(pairs)} candidate pairs "
+          f"(of {len(centers) * (len(centers) - 1) // 2} possible)")
+    print()
+
+    for match in matches:
+        marker = '✗' if match.duplicate else '⚠'
+        distance = f"{match.distance:.2f} mi" if match.distance is not None else "no coordinates"
+        print(f"  {marker} {match.score:.2f} (name {match.name_score:.2f}, {distance})")
+        print(f"      [{datasets[match.a]}] {describe(centers[match.a])}")
+        print(f"      [{datasets[match.b]}] {describe(centers[match.b])}")
+
+    duplicates = sum(1 for m in matches if m.duplicate)
+    print()
+    print(f"{duplicates} likely duplicates, {len(matches) - duplicates} pairs to review")
+
+
+if __name__ == '__main__':
+    main()
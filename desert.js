@@ -7,18 +7,29 @@ let map;
 let cscLayer;
 let tscLayer;
 
+// Precomputed uncovered areas (coverage.py), and the layer showing them
+const COVERAGE_RADIUS_MILES = 60;
+let coverage = null;
+let desertLayer = null;
+
 // Initialize the application
 async function init() {
     try {
-        // Load CSC and TSC datasets
-        const cscResponse = await fetch('data/stroke_centers.json');
-        comprehensiveCenters = await cscResponse.json();
+        // Hashed file names when the site was published (assets.js)
+        await loadAssetManifest();
 
-        const tscResponse = await fetch('data/thrombectomy_centers.json');
-        thrombectomyCenters = await tscResponse.json();
+        // Load CSC and TSC datasets
+        // Columnar .bin copies (columnar.js), or the JSON if they are missing or stale
+        const sources = await loadDatasetSources();
+        comprehensiveCenters = (await loadCenters('data/stroke_centers.json',
+                                                  sources['data/stroke_centers.json'])).centers;
+        thrombectomyCenters = (await loadCenters('data/thrombectomy_centers.json',
+                                                 sources['data/thrombectomy_centers.json'])).centers;
 
         console.log(`Loaded ${comprehensiveCenters.length} CSCs, ${thrombectomyCenters.length} TSCs`);
 
+        coverage = await loadCoverage();
+
         // Initialize map
         initializeMap();
 
@@ -59,19 +70,23 @@ function addStrokeCenters() {
 
     // TSC: Blue, 60 miles (1 hour)
     addCenterType(thrombectomyCenters, tscLayer, 60 * 1609.34, '#2196F3', 'TSC');
+
+    updateDesertLayer();
 }
 
 function addCenterType(centers, layer, radiusMeters, color, type) {
     centers.forEach(center => {
-        // Add coverage circle
-        L.circle([center.latitude, center.longitude], {
-            radius: radiusMeters,
-            color: color,
-            fillColor: color,
-            fillOpacity: 0.12,
-            weight: 1,
-            opacity: 0.35
-        }).addTo(layer);
+        // Coverage circles only when the precomputed layer is unavailable
+        if (!coverage) {
+            L.circle([center.latitude, center.longitude], {
+                radius: radiusMeters,
+                color: color,
+                fillColor: color,
+                fillOpacity: 0.12,
+                weight: 1,
+                opacity: 0.35
+            }).addTo(layer);
+        }
 
         // Add marker
         const marker = L.circleMarker([center.latitude, center.longitude], {
@@ -97,6 +112,54 @@ function addCenterType(centers, layer, radiusMeters, color, type) {
     });
 }
 
+// Uncovered-area features from coverage.py, or null if not generated
+async function loadCoverage() {
+    try {
+        const response = await fetch(assetUrl('data/coverage/uncovered.geojson'));
+        if (!response.ok) {
+            return null;
+        }
+        return await response.json();
+    } catch (error) {
+        console.warn('Coverage layer unavailable, drawing circles:', error);
+        return null;
+    }
+}
+
+// Shade the areas beyond the radius of every checked center type
+function updateDesertLayer() {
+    if (!coverage) {
+        return;
+    }
+    if (desertLayer) {
+        map.removeLayer(desertLayer);
+        desertLayer = null;
+    }
+
+    const csc = document.getElementById('toggle-csc').checked;
+    const tsc = document.getElementById('toggle-tsc').checked;
+    if (!csc && !tsc) {
+        return;
+    }
+    const dataset = csc && tsc ? 'either' : (csc ? 'csc' : 'tsc');
+    const feature = coverage.features.find(f =>
+        f.properties.dataset === dataset && f.properties.radius_miles === COVERAGE_RADIUS_MILES);
+    if (!feature) {
+        return;
+    }
+
+    desertLayer = L.geoJSON(feature, {
+        style: {
+            color: '#E53935',
+            fillColor: '#E53935',
+            fillOpacity: 0.25,
+            weight: 0
+        },
+        interactive: false
+    }).addTo(map);
+    desertLayer.bringToBack();
+}
+
 // Toggle center type visibility
 function toggleCenterType(type) {
     const checkbox = document.getElementById(`toggle-${type}`);
@@ -115,6 +178,7 @@ function toggleCenterType(type) {
             map.removeLayer(tscLayer);
         }
     }
+    updateDesertLayer();
 }
 
 // Start the application
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Content-addressed local cache for downloaded source files.
+
+Each body is stored once under its SHA-256 in data/download_cache/objects/.
+Repeat fetches revalidate with ETag / If-Modified-Since, so an unchanged
+source costs one 304 round trip, and every result says whether the content
+actually changed so callers can skip re-parsing and re-geocoding it.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from http_client import get_client
+
+CACHE_DIR = os.path.join('data', 'download_cache')
+
+
+@dataclass(frozen=True)
+class Download:
+    """Where a source's current content lives and whether it changed"""
+    url: str
+    path: str
+    sha256: str
+    changed: bool
+    revalidated: bool  # True when the server answered 304 Not Modified
+
+    def read(self):
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+
+class DownloadCache:
+    """URL → content hash index plus the content-addressed object store"""
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.objects_dir = os.path.join(cache_dir, 'objects')
+        self.index_path = os.path.join(cache_dir, 'index.json')
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.lock = threading.Lock()
+        try:
+            with open(self.index_path, 'r') as f:
+                self.index = json.load(f)
+        except FileNotFoundError:
+            self.index = {}
+
+    def object_path(self, sha256):
+        return os.path.join(self.objects_dir, sha256)
+
+    def _store(self, body):
+        sha256 = hashlib.sha256(body).hexdigest()
+        path = self.object_path(sha256)
+        if not os.path.exists(path):
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+        return sha256
+
+    def _save_index(self):
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.index, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def fetch(self, url, headers=None):
+        """Download url, or revalidate the cached copy; returns a Download"""
+        with self.lock:
+            entry = dict(self.index.get(url, {}))
+        cached = entry.get('sha256') and os.path.exists(self.object_path(entry['sha256']))
+
+        request_headers = dict(headers or {})
+        if cached:
+            if entry.get('etag'):
+                request_headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                request_headers['If-Modified-Since'] = entry['last_modified']
+
+        response = get_client().get(url, headers=request_headers)
+        if response.status_code == 304 and cached:
+            sha256, changed, revalidated = entry['sha256'], False, True
+        else:
+            response.raise_for_status()
+            sha256 = self._store(response.content)
+            changed, revalidated = sha256 != entry.get('sha256'), False
+
+        with self.lock:
+            self.index[url] = {
+                'sha256': sha256,
+                'etag': response.headers.get('ETag', entry.get('etag')),
+                'last_modified': response.headers.get('Last-Modified', entry.get('last_modified')),
+                'checked_at': time.time(),
+            }
+            self._save_index()
+
+        return Download(url, self.object_path(sha256), sha256, changed, revalidated)
+
+    def fetch_all(self, sources, headers=None, workers=8):
+        """
+        Fetch {name: url} concurrently. Returns {name: Download or Exception},
+        so one failing source does not stop the others.
+        """
+        def fetch_one(url):
+            try:
+                return self.fetch(url, headers)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(fetch_one, sources.values())
+            return dict(zip(sources.keys(), results))
+
+
+def report(results):
+    """Print one line per source saying what happened to it"""
+    for name, result in results.items():
+        if isinstance(result, Exception):
+            print(f"  ✗ {name}: {result}")
+        elif result.changed:
+            print(f"  ✓ {name}: changed ({result.sha256[:12]})")
+        else:
+            how = "304 Not Modified" if result.revalidated else "same content"
+            print(f"  = {name}: unchanged ({how})")
@@ -1,15 +1,71 @@
 #!/usr/bin/env python3
 """
 Script to download and process US zipcode data with coordinates.
-This will create a JSON file with zipcode -> lat/lon mappings.
+This will create a JSON file with zipcode -> lat/lon mappings, plus
+minified per-3-digit-prefix shards and a manifest in data/zipcodes/ so the
+web app can fetch only the shard for the zipcode being searched.
 """
 
+import hashlib
 import json
 import csv
-import urllib.request
 import os
 
-def download_zipcode_data():
+from center_store import write_text_atomic
+from columnar import write_binaries
+from download_cache import DownloadCache
+from http_client import get_client
+
+OUTPUT_FILE = 'data/zipcodes.json'
+SHARD_DIR = os.path.join('data', 'zipcodes')
+
+
+def write_zipcode_shards(source=OUTPUT_FILE, output_dir=SHARD_DIR, force=False):
+    """
+    Split the zipcode file into data/zipcodes/<prefix>.json shards of
+    {"33101": [lat, lon]} (city and state appended when known) and a
+    manifest of prefix → zipcode count. Returns the number of shards written.
+    """
+    with open(source, 'rb') as f:
+        raw = f.read()
+    source_hash = hashlib.sha256(raw).hexdigest()[:16]
+
+    manifest_path = os.path.join(output_dir, 'manifest.json')
+    try:
+        with open(manifest_path, 'r') as f:
+            if not force and json.load(f).get('source') == source_hash:
+                return 0
+    except FileNotFoundError:
+        pass
+
+    shards = {}
+    for zipcode, entry in sorted(json.loads(raw).items()):
+        row = [entry['lat'], entry['lon']]
+        if entry.get('city') or entry.get('state'):
+            row += [entry.get('city', ''), entry.get('state', '')]
+        shards.setdefault(zipcode[:3], {})[zipcode] = row
+
+    os.makedirs(output_dir, exist_ok=True)
+    written = 0
+    for prefix, zipcodes in shards.items():
+        if write_text_atomic(os.path.join(output_dir, f"{prefix}.json"),
+                             json.dumps(zipcodes, separators=(',', ':'))):
+            written += 1
+    for name in os.listdir(output_dir):
+        if name.endswith('.json') and name != 'manifest.json' and name[:-5] not in shards:
+            os.remove(os.path.join(output_dir, name))
+
+    manifest = {
+        "source": source_hash,
+        "prefixes": {prefix: len(zipcodes) for prefix, zipcodes in shards.items()},
+    }
+    write_text_atomic(manifest_path, json.dumps(manifest, separators=(',', ':')))
+    print(f"✓ {output_dir}: {sum(manifest['prefixes'].values())} zipcodes in {len(shards)} shards "
+          f"({written} changed)")
+    return written
+
+
+def download_zipcode_data(force=False):
     """Download zipcode data from a reliable free source."""
 
     print("Downloading US zipcode data...")
@@ -18,9 +74,14 @@ def download_zipcode_data():
     url = "https://gist.githubusercontent.com/erichurst/7882666/raw/5bdc46db47d9515269ab12ed6fb2850377fd869e/US%2520Zip%2520Codes%2520from%25202013%2520Government%2520Data"
 
     try:
-        # Download the file
-        with urllib.request.urlopen(url) as response:
-            data = response.read().decode('utf-8')
+        # Download the file (revalidated against the local download cache)
+        download = DownloadCache().fetch(url)
+        if not download.changed and not force and os.path.exists(OUTPUT_FILE):
+            print(f"Source unchanged since last download; {OUTPUT_FILE} is up to date")
+            write_zipcode_shards()
+            write_binaries()
+            return True
+        data = download.read().decode('utf-8')
 
         # Parse CSV data
         zipcode_dict = {}
@@ -50,11 +111,14 @@ def download_zipcode_data():
         os.makedirs('data', exist_ok=True)
 
         # Save to JSON file
-        output_file = 'data/zipcodes.json'
+        output_file = OUTPUT_FILE
         with open(output_file, 'w') as f:
             json.dump(zipcode_dict, f, indent=2)
 
         print(f"Zipcode data saved to {output_file}")
+        write_zipcode_shards(force=force)
+        write_binaries(force=force)
+        get_client().print_summary()
         return True
 
     except Exception as e:
@@ -4,12 +4,32 @@ Extract comprehensive stroke centers from multiple state PDF sources
 """
 
 import json
-import time
+import os
 import re
-import requests
-from urllib.parse import quote
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import PyPDF2
-from io import BytesIO
+
+from center_store import write_text_atomic
+from download_cache import DownloadCache, report
+from http_client import get_client
+
+RAW_OUTPUT = 'data/extracted_centers_raw.json'
+
+# Extracted page text, keyed by PDF content hash and page index
+PAGE_CACHE_DIR = 'data/pdf_text_cache'
+
+# Pages handed to a worker process at a time
+PAGES_PER_TASK = 8
+
+# A center's city may appear on its own line or the next two
+CITY_WINDOW = 3
+CITY_PATTERN = re.compile(r',\s*([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)')
+
+# Some state sites reject non-browser user agents
+PDF_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
 
 # State PDF sources with comprehensive stroke centers
 STATE_SOURCES = {
@@ -19,121 +39,152 @@ STATE_SOURCES = {
     'FL': 'https://ahca.myflorida.com/content/download/24552/file/Comprehensive_Stroke_Centers.pdf',
 }
 
-def download_pdf(url):
-    """Download PDF and return bytes"""
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-    }
+def load_previous_centers():
+    """Last run's parsed centers grouped by state, for sources that did not change"""
     try:
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        return BytesIO(response.content)
-    except Exception as e:
-        print(f"Error downloading {url}: {e}")
-        return None
-
-def extract_text_from_pdf(pdf_bytes):
-    """Extract all text from PDF"""
-    text = ""
-    try:
-        pdf_reader = PyPDF2.PdfReader(pdf_bytes)
-        for page in pdf_reader.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text += page_text + "\n"
-    except Exception as e:
-        print(f"Error extracting PDF text: {e}")
-    return text
-
-def parse_comprehensive_centers(text, state):
-    """Parse comprehensive stroke centers from extracted text"""
-    centers = []
-
-    # Look for comprehensive stroke center indicators
-    lines = text.split('\n')
+        with open(RAW_OUTPUT, 'r') as f:
+            previous = json.load(f)
+    except FileNotFoundError:
+        return {}
+    by_state = {}
+    for center in previous:
+        by_state.setdefault(center['state'], []).append(center)
+    return by_state
+
+def _extract_page_range(pdf_path, start, stop):
+    """Worker: text of pages [start, stop) of the PDF at pdf_path"""
+    pdf_reader = PyPDF2.PdfReader(pdf_path)
+    return [pdf_reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+def _page_cache_path(pdf_hash, index):
+    return os.path.join(PAGE_CACHE_DIR, pdf_hash, f"{index}.txt")
+
+def iter_pdf_pages(pdf_path, pdf_hash, workers=None):
+    """
+    Yield each page's text in order. Cached pages are read from disk; the
+    rest are extracted PAGES_PER_TASK at a time in a process pool, with only
+    a few tasks in flight so memory stays bounded on very long PDFs.
+    """
+    page_count = len(PyPDF2.PdfReader(pdf_path).pages)
+    os.makedirs(os.path.join(PAGE_CACHE_DIR, pdf_hash), exist_ok=True)
+
+    def cached(index):
+        try:
+            with open(_page_cache_path(pdf_hash, index), 'r', encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def store(index, text):
+        # Atomic, so an interrupted run never leaves a truncated page behind
+        write_text_atomic(_page_cache_path(pdf_hash, index), text)
+
+    chunks = [(start, min(start + PAGES_PER_TASK, page_count))
+              for start in range(0, page_count, PAGES_PER_TASK)]
+    workers = workers or os.cpu_count() or 1
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        next_chunk = 0
+
+        def submit_more():
+            nonlocal next_chunk
+            while next_chunk < len(chunks) and len(in_flight) < workers * 2:
+                start, stop = chunks[next_chunk]
+                texts = [cached(i) for i in range(start, stop)]
+                if None in texts:
+                    in_flight.append((start, pool.submit(_extract_page_range, pdf_path, start, stop)))
+                else:
+                    in_flight.append((start, texts))
+                next_chunk += 1
+
+        submit_more()
+        while in_flight:
+            start, texts = in_flight.popleft()
+            if not isinstance(texts, list):
+                texts = texts.result()
+                for offset, text in enumerate(texts):
+                    store(start + offset, text)
+            submit_more()
+            yield from texts
+
+def iter_lines(pages):
+    """Lines of a page stream, as text.split('\\n') would give them, without joining"""
+    for page in pages:
+        if page:
+            yield from page.split('\n')
+
+def iter_comprehensive_centers(lines, state):
+    """
+    Single pass over the text lines: each line is matched against the city
+    pattern once, and each candidate center waits at most CITY_WINDOW - 1
+    further lines for its city before it is emitted.
+    """
+    waiting = deque()  # [center, lines left in its city window]
 
     for i, line in enumerate(lines):
         line_lower = line.lower()
 
         # Check if this line mentions "comprehensive" stroke center
         if 'comprehensive' in line_lower and ('stroke' in line_lower or i > 0):
-            # Try to extract hospital name from this line or nearby lines
-            hospital_name = None
-            city = None
-
-            # Clean the line
             hospital_name = re.sub(r'\s+', ' ', line).strip()
-
-            # Try to find city in the same line or next few lines
-            for j in range(i, min(i+3, len(lines))):
-                city_match = re.search(r',\s*([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)', lines[j])
-                if city_match:
-                    city = city_match.group(1)
-                    break
-
-            if hospital_name and len(hospital_name) > 5:
-                centers.append({
+            if len(hospital_name) > 5:
+                waiting.append([{
                     'name': hospital_name,
-                    'city': city or 'Unknown',
+                    'city': None,
                     'state': state,
                     'raw_line': line
-                })
-
-    return centers
-
-def geocode_address(name, city, state, zipcode=''):
-    """Geocode using OpenStreetMap Nominatim"""
-    query = f"{name}, {city}, {state}, USA"
-    url = "https://nominatim.openstreetmap.org/search"
-    params = {
-        'q': query,
-        'format': 'json',
-        'limit': 1
-    }
-    headers = {
-        'User-Agent': 'StrokeCenter FinderApp/1.0'
-    }
+                }, CITY_WINDOW])
 
-    try:
-        time.sleep(1.1)  # Rate limiting
-        response = requests.get(url, params=params, headers=headers, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        city_match = CITY_PATTERN.search(line) if waiting else None
+        for entry in waiting:
+            if entry[0]['city'] is None and city_match:
+                entry[0]['city'] = city_match.group(1)
+            entry[1] -= 1
 
-        if data and len(data) > 0:
-            return {
-                'latitude': float(data[0]['lat']),
-                'longitude': float(data[0]['lon'])
-            }
-    except Exception as e:
-        print(f"Geocoding failed for {name}: {e}")
+        # Emit in document order once the oldest candidate is settled
+        while waiting and (waiting[0][0]['city'] is not None or waiting[0][1] == 0):
+            center = waiting.popleft()[0]
+            center['city'] = center['city'] or 'Unknown'
+            yield center
 
-    return None
+    for center, _ in waiting:
+        center['city'] = center['city'] or 'Unknown'
+        yield center
 
 def main():
     print("Extracting comprehensive stroke centers from state PDFs...")
 
     all_centers = []
 
-    for state, url in STATE_SOURCES.items():
+    # Download (or revalidate) every PDF at once
+    print("\nChecking sources...")
+    downloads = DownloadCache().fetch_all(STATE_SOURCES, PDF_HEADERS)
+    report(downloads)
+    previous = load_previous_centers()
+
+    for state, download in downloads.items():
         print(f"\nProcessing {state}...")
 
-        # Download PDF
-        pdf_bytes = download_pdf(url)
-        if not pdf_bytes:
+        if isinstance(download, Exception):
             print(f"  Failed to download {state} PDF")
             continue
 
-        # Extract text
-        text = extract_text_from_pdf(pdf_bytes)
-        if not text:
-            print(f"  Failed to extract text from {state} PDF")
+        # Unchanged PDF: reuse what we parsed last time
+        if not download.changed and state in previous:
+            all_centers.extend(previous[state])
+            print(f"  Unchanged - reusing {len(previous[state])} previously parsed centers")
             continue
 
-        print(f"  Extracted {len(text)} characters of text")
+        # Stream page text straight into the parser
+        try:
+            pages = iter_pdf_pages(download.path, download.sha256)
+            centers = list(iter_comprehensive_centers(iter_lines(pages), state))
+        except Exception as e:
+            print(f"  Failed to extract text from {state} PDF: {e}")
+            continue
 
         # Parse comprehensive centers
-        centers = parse_comprehensive_centers(text, state)
         print(f"  Found {len(centers)} potential comprehensive stroke centers")
 
         all_centers.extend(centers)
@@ -141,10 +192,11 @@ def main():
     print(f"\nTotal centers found: {len(all_centers)}")
 
     # Save raw extracted data
-    with open('data/extracted_centers_raw.json', 'w') as f:
+    with open(RAW_OUTPUT, 'w') as f:
         json.dump(all_centers, f, indent=2)
 
-    print(f"Saved raw data to data/extracted_centers_raw.json")
+    print(f"Saved raw data to {RAW_OUTPUT}")
+    get_client().print_summary()
     print("\nManual review needed - the parsing may need refinement based on PDF formats")
 
 if __name__ == '__main__':
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Offline hospital-name geocoder backed by a local gazetteer of hospital features.
+
+Ingests an OpenStreetMap hospital extract (Overpass JSON or GeoJSON) into
+data/hospital_gazetteer.json, then matches center names by weighted token
+overlap against the hospitals in the same zip or city. Fetch an extract with
+the Overpass query below (save as data/osm_hospitals.json) and run:
+
+    [out:json][timeout:300];
+    area["ISO3166-1"="US"]->.us;
+    nwr["amenity"="hospital"](area.us);
+    out center tags;
+
+    python3 gazetteer_geocoder.py build data/osm_hospitals.json
+    python3 gazetteer_geocoder.py lookup "Antelope Valley Hospital" Lancaster CA 93534
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import unicodedata
+
+from zip_states import zip_state
+
+GAZETTEER_PATH = os.path.join('data', 'hospital_gazetteer.json')
+
+# Minimum weighted overlap for a name to count as the same hospital
+MATCH_THRESHOLD = 0.5
+
+NAME_TAGS = ('name', 'official_name', 'alt_name', 'short_name', 'old_name')
+
+TOKEN_EXPANSIONS = {
+    'st': 'saint', 'mt': 'mount', 'ft': 'fort', 'hosp': 'hospital',
+    'med': 'medical', 'ctr': 'center', 'centre': 'center', 'univ': 'university',
+    'reg': 'regional', 'mem': 'memorial', 'hlth': 'health', 'sys': 'system',
+    'u': 'university',
+}
+
+STOPWORDS = {'the', 'of', 'at', 'and', 'a', 'in', 'for', 'inc', 'llc'}
+
+
+def name_tokens(name):
+    """Folded, expanded tokens of a hospital name as a set"""
+    text = unicodedata.normalize('NFKD', name or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    text = text.replace('&', ' and ').replace("'s", 's')
+    words = re.findall(r'[a-z0-9]+', text)
+    return {TOKEN_EXPANSIONS.get(w, w) for w in words if w not in STOPWORDS}
+
+
+def _centroid(geometry):
+    """Rough (lat, lon) of a GeoJSON Point/Polygon/MultiPolygon"""
+    kind = geometry.get('type')
+    coords = geometry.get('coordinates')
+    if kind == 'Point':
+        return coords[1], coords[0]
+    if kind == 'Polygon':
+        ring = coords[0]
+    elif kind == 'MultiPolygon':
+        ring = [p for polygon in coords for p in polygon[0]]
+    else:
+        return None
+    return sum(p[1] for p in ring) / len(ring), sum(p[0] for p in ring) / len(ring)
+
+
+def read_hospitals(path):
+    """Yield (tags, lat, lon) from an Overpass JSON or GeoJSON extract"""
+    with open(path, 'r') as f:
+        data = json.load(f)
+
+    if 'elements' in data:
+        for element in data['elements']:
+            lat = element.get('lat', element.get('center', {}).get('lat'))
+            lon = element.get('lon', element.get('center', {}).get('lon'))
+            if lat is not None and lon is not None:
+                yield element.get('tags', {}), lat, lon
+        return
+
+    for feature in data.get('features', []):
+        point = _centroid(feature.get('geometry') or {})
+        if point:
+            yield feature.get('properties') or {}, point[0], point[1]
+
+
+def build_gazetteer(paths, output=GAZETTEER_PATH):
+    """Compact the extracts into the gazetteer file read at lookup time"""
+    entries = []
+    for path in paths:
+        before = len(entries)
+        for tags, lat, lon in read_hospitals(path):
+            names = []
+            for tag in NAME_TAGS:
+                # OSM separates multiple values with ';'
+                names.extend(n.strip() for n in (tags.get(tag) or '').split(';') if n.strip())
+            if not names:
+                continue
+            entries.append({
+                'names': names,
+                'zipcode': (tags.get('addr:postcode') or '').strip()[:5],
+                'city': (tags.get('addr:city') or '').strip(),
+                'state': (tags.get('addr:state') or '').strip().upper(),
+                'latitude': round(lat, 7),
+                'longitude': round(lon, 7),
+            })
+        print(f"  ✓ {os.path.basename(path)}: {len(entries) - before} named hospitals")
+
+    with open(output, 'w') as f:
+        json.dump(entries, f, separators=(',', ':'))
+    print(f"Saved {len(entries)} hospitals to {output}")
+    return len(entries)
+
+
+class GazetteerGeocoder:
+    """In-memory token index over the gazetteer, blocked by zip and city"""
+
+    tier = 'name'
+
+    def __init__(self, path=GAZETTEER_PATH):
+        with open(path, 'r') as f:
+            self.entries = json.load(f)
+
+        self.tokens = []
+        self.by_zip = {}
+        self.by_city = {}
+        document_frequency = {}
+        for i, entry in enumerate(self.entries):
+            token_sets = [name_tokens(name) for name in entry['names']]
+            self.tokens.append(token_sets)
+            for token in set().union(*token_sets):
+                document_frequency[token] = document_frequency.get(token, 0) + 1
+            if entry['zipcode']:
+                self.by_zip.setdefault(entry['zipcode'], []).append(i)
+            if entry['city']:
+                # OSM often omits addr:state; the zip usually tells, and
+                # entries with neither are filed under the city alone
+                state = entry['state'] or zip_state(entry['zipcode'])
+                self.by_city.setdefault((entry['city'].lower(), state), []).append(i)
+
+        # Rare tokens ("antelope") count for more than generic ones ("medical")
+        n = max(1, len(self.entries))
+        self.weights = {t: math.log(1 + n / df) for t, df in document_frequency.items()}
+        self.default_weight = math.log(1 + n)
+
+    def score(self, query, candidate):
+        """Weighted Jaccard overlap between two token sets"""
+        weight = lambda tokens: sum(self.weights.get(t, self.default_weight) for t in tokens)
+        union = weight(query | candidate)
+        return weight(query & candidate) / union if union else 0.0
+
+    def locate(self, name, city, state, zipcode=''):
+        """Return (lat, lon) of the best-matching hospital nearby, or None"""
+        query = name_tokens(name)
+        if not query:
+            return None
+
+        city = (city or '').strip().lower()
+        candidates = set(self.by_zip.get((zipcode or '').strip()[:5], ()))
+        candidates.update(self.by_city.get((city, (state or '').strip().upper()), ()))
+        candidates.update(self.by_city.get((city, ''), ()))
+
+        best, best_score = None, MATCH_THRESHOLD
+        for i in candidates:
+            score = max(self.score(query, tokens) for tokens in self.tokens[i])
+            if score >= best_score:
+                best, best_score = self.entries[i], score
+
+        if best is None:
+            return None
+        return best['latitude'], best['longitude']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline hospital-name gazetteer geocoder")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build = subparsers.add_parser('build', help="ingest OSM/GeoJSON hospital extracts")
+    build.add_argument('paths', nargs='+')
+    build.add_argument('--output', default=GAZETTEER_PATH)
+
+    lookup = subparsers.add_parser('lookup', help="geocode one hospital name")
+    lookup.add_argument('name')
+    lookup.add_argument('city')
+    lookup.add_argument('state')
+    lookup.add_argument('zipcode', nargs='?', default='')
+    lookup.add_argument('--gazetteer', default=GAZETTEER_PATH)
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        build_gazetteer(args.paths, args.output)
+    else:
+        coords = GazetteerGeocoder(args.gazetteer).locate(args.name, args.city, args.state, args.zipcode)
+        if coords:
+            print(f"✓ {args.name} → ({coords[0]}, {coords[1]})")
+        else:
+            print(f"✗ No gazetteer match for {args.name}, {args.city}, {args.state}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+"""
+Shared geocoding for the compile/add scripts.
+Looks addresses up on Nominatim (OpenStreetMap) behind a persistent SQLite
+cache, so a rerun over an unchanged source list never touches the network.
+Network lookups run on a thread pool throttled by a token bucket that is
+shared, through the cache database, by every process using the provider.
+Offline tiers are tried first when their data has been built: street
+addresses against the TIGER/Line index (tiger_geocoder.py) and hospital
+names against the OSM gazetteer (gazetteer_geocoder.py). Zip-centroid
+fallbacks are answered offline from data/zipcodes.json.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from gazetteer_geocoder import GAZETTEER_PATH, GazetteerGeocoder
+from http_client import get_client, retry_after_seconds
+from tiger_geocoder import TIGER_INDEX_PATH, TigerGeocoder
+
+CACHE_PATH = os.path.join('data', 'geocode_cache.sqlite')
+ZIPCODES_PATH = os.path.join('data', 'zipcodes.json')
+
+# Failed lookups are remembered too, but retried once this many seconds pass
+NEGATIVE_TTL = 30 * 24 * 3600
+
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+
+# Request budget per provider. The public Nominatim policy is at most one
+# request per second; a self-hosted instance can raise NOMINATIM_RATE.
+PROVIDERS = {
+    'nominatim': {
+        'url': os.environ.get('NOMINATIM_URL', NOMINATIM_URL),
+        'rate': float(os.environ.get('NOMINATIM_RATE', 1 / 1.1)),  # requests per second
+        'burst': int(os.environ.get('NOMINATIM_BURST', 1)),
+    },
+}
+
+# Retries after a 429/503 before a query tier is given up
+MAX_RETRIES = 4
+BACKOFF_BASE = 2.0
+
+
+class RateLimited(Exception):
+    """The provider answered 429/503; retry_after is in seconds"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"rate limited, retry after {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+@dataclass(frozen=True)
+class GeocodeResult:
+    """A successful lookup and the query tier that produced it"""
+    latitude: float
+    longitude: float
+    tier: str
+    query: str
+
+    @property
+    def approximate(self):
+        """True for zip/city centroids rather than a located building"""
+        return self.tier in ('zip', 'city')
+
+
+def normalize_query(query):
+    """Canonical cache key: accents folded, lowercased, whitespace collapsed"""
+    text = unicodedata.normalize('NFKD', query)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    text = text.lower().replace('–', '-').replace('—', '-')
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\s*,\s*', ', ', text)
+    return text.strip(' ,')
+
+
+def build_queries(name, address, city, state, zipcode=''):
+    """
+    Return the (tier, query) pairs tried in order for one center:
+    the street address when we have one (else the hospital name, with and
+    without the zip), then the city/state/zip fallback.
+    """
+    locality = f"{city}, {state} {zipcode}".strip()
+    queries = []
+    if address:
+        queries.append(('address', f"{address}, {locality}, USA"))
+    else:
+        queries.append(('name', f"{name}, {locality}, USA"))
+        if zipcode:
+            queries.append(('name', f"{name}, {city}, {state}, USA"))
+    queries.append(('city', f"{locality}, USA"))
+    return queries
+
+
+class ZipcodeGeocoder:
+    """
+    Offline tier answering zip and city/state queries from data/zipcodes.json.
+    City/state lookups need city names in the file; the Census-derived file
+    we ship has coordinates only, so in practice this resolves by zip.
+    """
+
+    tier = 'zip'
+
+    def __init__(self, path=ZIPCODES_PATH):
+        with open(path, 'r') as f:
+            zipcodes = json.load(f)
+
+        self.zipcodes = {z: (v['lat'], v['lon']) for z, v in zipcodes.items()}
+
+        points_by_city = {}
+        for v in zipcodes.values():
+            if v.get('city') and v.get('state'):
+                key = (v['city'].strip().lower(), v['state'].strip().upper())
+                points_by_city.setdefault(key, []).append((v['lat'], v['lon']))
+        self.cities = {
+            key: (sum(p[0] for p in points) / len(points), sum(p[1] for p in points) / len(points))
+            for key, points in points_by_city.items()
+        }
+
+    def locate(self, city, state, zipcode=''):
+        """Return the (lat, lon) centroid of the zip, else of the city, else None"""
+        zipcode = (zipcode or '').strip()[:5]
+        if zipcode in self.zipcodes:
+            return self.zipcodes[zipcode]
+        return self.cities.get(((city or '').strip().lower(), (state or '').strip().upper()))
+
+
+class GeocodeCache:
+    """On-disk cache of geocoding answers keyed by normalized query"""
+
+    def __init__(self, path=CACHE_PATH, negative_ttl=NEGATIVE_TTL):
+        self.path = path
+        self.negative_ttl = negative_ttl
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS geocodes (
+                query TEXT PRIMARY KEY,
+                latitude REAL,
+                longitude REAL,
+                tier TEXT NOT NULL,
+                provider TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def lookup(self, query):
+        """
+        Return (found, coords). coords is None for a remembered failure.
+        Expired failures are reported as not found so they get retried.
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT latitude, longitude, fetched_at FROM geocodes WHERE query = ?",
+                (normalize_query(query),)
+            ).fetchone()
+        if row is None:
+            return False, None
+        lat, lon, fetched_at = row
+        if lat is None:
+            if time.time() - fetched_at > self.negative_ttl:
+                return False, None
+            return True, None
+        return True, (lat, lon)
+
+    def store(self, query, tier, coords, provider='nominatim'):
+        """Remember a hit (coords is a (lat, lon) tuple) or a miss (coords is None)"""
+        lat, lon = coords if coords else (None, None)
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO geocodes VALUES (?, ?, ?, ?, ?, ?)",
+                (normalize_query(query), lat, lon, tier, provider, time.time())
+            )
+            self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+class TokenBucket:
+    """
+    Token bucket for one provider. Its state lives in a table of the cache
+    database, so concurrent scripts and worker threads share one budget.
+    """
+
+    def __init__(self, name, rate, burst=1, path=CACHE_PATH):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None,
+                                    check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS rate_limits (
+                name TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                paused_until REAL NOT NULL
+            )
+        """)
+
+    def _update(self, step):
+        """Run step(tokens, paused_until, now) -> (tokens, paused_until, wait) atomically"""
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = self.conn.execute(
+                    "SELECT tokens, updated_at, paused_until FROM rate_limits WHERE name = ?",
+                    (self.name,)
+                ).fetchone()
+                if row is None:
+                    tokens, paused_until = float(self.burst), 0.0
+                else:
+                    tokens, updated_at, paused_until = row
+                    tokens = min(self.burst, tokens + max(0.0, now - updated_at) * self.rate)
+                tokens, paused_until, wait = step(tokens, paused_until, now)
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO rate_limits VALUES (?, ?, ?, ?)",
+                    (self.name, tokens, now, paused_until)
+                )
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        return wait
+
+    def acquire(self):
+        """Block until a request may be sent"""
+        def take(tokens, paused_until, now):
+            if now >= paused_until and tokens >= 1:
+                return tokens - 1, paused_until, 0.0
+            wait = max(paused_until - now, (1 - tokens) / self.rate)
+            return tokens, paused_until, wait
+
+        while True:
+            wait = self._update(take)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Stop every holder of this bucket from sending for `seconds`"""
+        def hold(tokens, paused_until, now):
+            return 0.0, max(paused_until, now + seconds), 0.0
+
+        self._update(hold)
+
+
+_default_cache = None
+_zipcode_geocoder = None
+_address_geocoder = None
+_gazetteer = None
+_buckets = {}
+_singletons_lock = threading.Lock()
+
+
+def get_cache():
+    """Open the shared cache on first use"""
+    global _default_cache
+    with _singletons_lock:
+        if _default_cache is None:
+            _default_cache = GeocodeCache()
+    return _default_cache
+
+
+def get_zipcode_geocoder():
+    """Load data/zipcodes.json on first use; None if the file is missing"""
+    global _zipcode_geocoder
+    with _singletons_lock:
+        if _zipcode_geocoder is None and os.path.exists(ZIPCODES_PATH):
+            _zipcode_geocoder = ZipcodeGeocoder()
+    return _zipcode_geocoder
+
+
+def get_address_geocoder():
+    """Open the TIGER/Line address index on first use; None if it was never built"""
+    global _address_geocoder
+    with _singletons_lock:
+        if _address_geocoder is None and os.path.exists(TIGER_INDEX_PATH):
+            _address_geocoder = TigerGeocoder()
+    return _address_geocoder
+
+
+def get_gazetteer():
+    """Load the hospital gazetteer on first use; None if it was never built"""
+    global _gazetteer
+    with _singletons_lock:
+        if _gazetteer is None and os.path.exists(GAZETTEER_PATH):
+            _gazetteer = GazetteerGeocoder()
+    return _gazetteer
+
+
+def get_bucket(provider='nominatim'):
+    """Return the process-wide token bucket for a provider"""
+    with _singletons_lock:
+        if provider not in _buckets:
+            policy = PROVIDERS[provider]
+            _buckets[provider] = TokenBucket(provider, policy['rate'], policy['burst'])
+        return _buckets[provider]
+
+
+def nominatim_search(query, provider='nominatim'):
+    """
+    Query Nominatim once a token is available from the provider's bucket.
+    Returns (lat, lon), or None when the server has no match.
+    Raises RateLimited on 429/503; other network errors propagate too,
+    so neither is ever cached as a miss.
+    """
+    params = {
+        "q": query,
+        "format": "json",
+        "limit": 1,
+        "countrycodes": "us"
+    }
+
+    get_bucket(provider).acquire()
+    # Rate-limit answers are left to the shared bucket rather than retried here
+    response = get_client().get(PROVIDERS[provider]['url'], params=params,
+                                retry_statuses=(500, 502, 504), timeout=(5, 10))
+    if response.status_code in (429, 503):
+        retry_after = retry_after_seconds(response.headers.get('Retry-After'))
+        raise RateLimited(BACKOFF_BASE if retry_after is None else retry_after)
+    response.raise_for_status()
+    results = response.json()
+
+    if results:
+        return float(results[0]['lat']), float(results[0]['lon'])
+    return None
+
+
+def search_with_backoff(query, provider='nominatim'):
+    """nominatim_search, retrying rate-limit answers with exponential backoff"""
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            return nominatim_search(query, provider)
+        except RateLimited as e:
+            if attempt == MAX_RETRIES:
+                raise
+            delay = max(e.retry_after, BACKOFF_BASE * 2 ** attempt)
+            get_bucket(provider).pause(delay)
+
+
+def geocode_address(name, address, city, state, zipcode='', cache=None, local_first=False,
+                    refresh=False):
+    """
+    Geocode one center, trying each tier in turn: the offline street-address
+    index and hospital gazetteer, then Nominatim, with the city fallback
+    answered from the local zip centroids when possible. With local_first
+    only offline answers are used: the zip centroid comes before the
+    cache, and nothing is sent to Nominatim; with refresh
+    cached answers are ignored (and replaced) so a suspect result is looked
+    up again. Returns a GeocodeResult, or None if every tier failed.
+    """
+    cache = cache or get_cache()
+    queries = build_queries(name, address, city, state, zipcode)
+
+    address_geocoder = get_address_geocoder()
+    if address and address_geocoder:
+        coords = address_geocoder.locate(address, zipcode)
+        if coords:
+            return GeocodeResult(coords[0], coords[1], TigerGeocoder.tier, queries[0][1])
+
+    gazetteer = get_gazetteer()
+    if gazetteer:
+        coords = gazetteer.locate(name, city, state, zipcode)
+        if coords:
+            query = f"{name}, {city}, {state} {zipcode}".strip() + ", USA"
+            return GeocodeResult(coords[0], coords[1], GazetteerGeocoder.tier, query)
+
+    zip_geocoder = get_zipcode_geocoder()
+    for tier, query in queries:
+        if zip_geocoder and (tier == 'city' or local_first):
+            coords = zip_geocoder.locate(city, state, zipcode)
+            if coords:
+                return GeocodeResult(coords[0], coords[1], ZipcodeGeocoder.tier, query)
+
+        found, coords = (False, None) if refresh else cache.lookup(query)
+        if not found:
+            if local_first:
+                continue
+            try:
+                coords = search_with_backoff(query)
+            except Exception as e:
+                print(f"  ✗ Geocoding failed for {name}: {e}")
+                continue
+            cache.store(query, tier, coords)
+        if coords:
+            return GeocodeResult(coords[0], coords[1], tier, query)
+
+    return None
+
+
+def default_workers(provider='nominatim'):
+    """
+    Enough threads to keep the bucket busy while requests are in flight:
+    two for public Nominatim, scaling with the rate of a local instance.
+    """
+    return max(2, min(32, int(PROVIDERS[provider]['rate']) + 1))
+
+
+def geocode_many(centers, workers=None, cache=None, local_first=False, refresh=False):
+    """
+    Geocode center dicts concurrently, yielding (center, GeocodeResult or None)
+    in input order. Cache hits return immediately; network lookups overlap,
+    throttled only by the provider's token bucket.
+    """
+    cache = cache or get_cache()
+    # Load the offline tiers once, before the worker threads need them
+    get_zipcode_geocoder()
+    get_address_geocoder()
+    get_gazetteer()
+
+    def lookup(center):
+        return geocode_address(
+            center['name'],
+            center.get('address', ''),
+            center['city'],
+            center['state'],
+            center.get('zipcode', ''),
+            cache=cache,
+            local_first=local_first,
+            refresh=refresh
+        )
+
+    pool = ThreadPoolExecutor(max_workers=workers or default_workers())
+    try:
+        yield from zip(centers, pool.map(lookup, centers))
+    finally:
+        # Drop queued lookups if the caller stops early (e.g. Ctrl-C)
+        pool.shutdown(wait=True, cancel_futures=True)
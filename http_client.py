@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP client used by every fetcher (geocoding, state PDFs, zipcodes).
+
+One pooled requests.Session keeps connections alive between requests,
+a semaphore per host bounds concurrency, transient failures are retried
+with jittered exponential backoff, and every request is recorded so a
+build can report where its network time went.
+"""
+
+import email.utils
+import random
+import threading
+import time
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+USER_AGENT = "StrokeCenterFinder/2.0"
+
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 30
+
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Simultaneous requests allowed to any one host
+PER_HOST_CONCURRENCY = 4
+POOL_SIZE = 16
+
+
+@dataclass
+class RequestStat:
+    """Timing and outcome of one logical request (all attempts included)"""
+    method: str
+    url: str
+    host: str
+    status: int
+    attempts: int
+    elapsed: float
+    size: int
+    error: str = ''
+
+
+def retry_after_seconds(value, cap=BACKOFF_MAX):
+    """
+    Retry-After is either a number of seconds or an HTTP date; None if
+    absent. Clamped to cap, so a server asking for an hour (or sending a
+    far-off date) cannot stall a worker for that long.
+    """
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = email.utils.parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    if seconds != seconds:
+        # float('nan')
+        return None
+    return min(cap, max(0.0, seconds))
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    """Full-jitter exponential backoff for the given (1-based) retry"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class HttpClient:
+    """Pooled, retrying, per-host-throttled wrapper around requests.Session"""
+
+    def __init__(self, per_host=PER_HOST_CONCURRENCY, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+                 retries=MAX_RETRIES, pool_size=POOL_SIZE):
+        self.per_host = per_host
+        self.timeout = timeout
+        self.retries = retries
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.lock = threading.Lock()
+        self.host_slots = {}
+        self.stats = []
+
+    def _slots(self, host):
+        with self.lock:
+            if host not in self.host_slots:
+                self.host_slots[host] = threading.BoundedSemaphore(self.per_host)
+            return self.host_slots[host]
+
+    def _record(self, stat):
+        with self.lock:
+            self.stats.append(stat)
+
+    def request(self, method, url, retry_statuses=RETRY_STATUSES, **kwargs):
+        """
+        Send a request, retrying connection errors, timeouts and
+        retry_statuses. Returns the final response (raise_for_status is
+        left to the caller); re-raises the last network error.
+        """
+        host = urlsplit(url).netloc
+        slots = self._slots(host)
+        kwargs.setdefault('timeout', self.timeout)
+        start = time.perf_counter()
+
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                with slots:
+                    response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt > self.retries:
+                    self._record(RequestStat(method, url, host, 0, attempt,
+                                             time.perf_counter() - start, 0, str(e)))
+                    raise
+                time.sleep(backoff_delay(attempt))
+                continue
+
+            if response.status_code in retry_statuses and attempt <= self.retries:
+                delay = retry_after_seconds(response.headers.get('Retry-After'))
+                response.close()
+                time.sleep(delay if delay is not None else backoff_delay(attempt))
+                continue
+
+            self._record(RequestStat(method, url, host, response.status_code, attempt,
+                                     time.perf_counter() - start, len(response.content)))
+            return response
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def summary(self):
+        """Per-host totals: requests, retries, errors, seconds and bytes"""
+        totals = {}
+        with self.lock:
+            stats = list(self.stats)
+        for stat in stats:
+            host = totals.setdefault(stat.host, {
+                'requests': 0, 'retries': 0, 'errors': 0, 'seconds': 0.0, 'bytes': 0
+            })
+            host['requests'] += 1
+            host['retries'] += stat.attempts - 1
+            host['errors'] += 1 if stat.error or stat.status >= 400 else 0
+            host['seconds'] += stat.elapsed
+            host['bytes'] += stat.size
+        return totals
+
+    def print_summary(self):
+        totals = self.summary()
+        if not totals:
+            return
+        print()
+        print("HTTP requests by host:")
+        for host, t in sorted(totals.items(), key=lambda item: -item[1]['seconds']):
+            mean = t['seconds'] / t['requests']
+            print(f"  {host}: {t['requests']} requests, {t['retries']} retries, "
+                  f"{t['errors']} errors, {t['seconds']:.1f}s total ({mean * 1000:.0f} ms mean), "
+                  f"{t['bytes'] / 1024:.0f} KB")
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """The process-wide shared client"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+    return _client
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Precomputed zipcode → nearest stroke centers index for the web app.
+
+For every zip centroid in data/zipcodes.json (read from its columnar .bin
+copy) this finds the K nearest CSCs and TSCs within SEARCH_RADIUS_MILES
+with spatial_index's batch query and writes them to
+data/nearest/<3-digit prefix>.json:
+
+    {"33101": {"csc": [[17, 2.4], [18, 3.1]], "tsc": [[5, 2.4]]}}
+
+Each pair is (index into the published dataset, miles). A search in app.js
+is then one fetch of a few kilobytes and a dictionary lookup. build.py
+regenerates the index whenever the centers or zipcodes change. (Zip
+coordinates themselves are in the data/zipcodes/ shards.)
+
+    python3 nearest_index.py          # rebuild if the inputs changed
+    python3 nearest_index.py --force
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from center_store import DATASETS, manifest_up_to_date, write_text_atomic
+from columnar import load_zipcode_arrays
+from spatial_index import SpatialIndex
+
+ZIPCODES_PATH = os.path.join('data', 'zipcodes.json')
+NEAREST_DIR = os.path.join('data', 'nearest')
+
+# Matches the search radius in app.js. K_NEAREST is the first guess at the
+# most centers within it of any zip; the build raises it when a zip fills
+# every slot, so each list holds every center within the radius
+SEARCH_RADIUS_MILES = 100
+K_NEAREST = 40
+
+# Zips per nearest_many() call
+CHUNK_SIZE = 2048
+
+
+def k_nearest(zip_lat, zip_lon, index, k=K_NEAREST, radius=SEARCH_RADIUS_MILES,
+              chunk=CHUNK_SIZE):
+    """
+    Yield (zip index, [(center index, miles), ...]) nearest first, limited to
+    k centers within radius, processing `chunk` zips at a time.
+    """
+    for start in range(0, len(zip_lat), chunk):
+        nearest, miles = index.nearest_many(zip_lat[start:start + chunk], zip_lon[start:start + chunk],
+                                            k, max_miles=radius)
+        # Rows are sorted, so the centers within radius are a prefix of each
+        counts = np.count_nonzero(nearest >= 0, axis=1).tolist()
+        indices, rounded = nearest.tolist(), np.round(miles, 1).tolist()
+        for row, count in enumerate(counts):
+            yield start + row, list(zip(indices[row][:count], rounded[row][:count]))
+
+
+def all_within(zip_lat, zip_lon, index, k=K_NEAREST, radius=SEARCH_RADIUS_MILES):
+    """
+    k_nearest() results as a list, with k doubled until no zip has a center
+    within radius in every slot (the list could be cut off), so each zip
+    gets all of its centers within radius. Returns (results, k used).
+    """
+    while True:
+        results = list(k_nearest(zip_lat, zip_lon, index, k, radius))
+        full = sum(1 for _, nearest in results if len(nearest) == k)
+        if not full or k >= len(index):
+            return results, k
+        print(f"⚠ {full} zips have {k} centers within {radius} miles; retrying with k={min(k * 2, len(index))}")
+        k = min(k * 2, len(index))
+
+
+def build_nearest_index(force=False, output_dir=NEAREST_DIR):
+    """
+    Write the sharded index if its inputs changed since the last run.
+    Returns the number of shards written (0 when it was up to date).
+    """
+    inputs = [ZIPCODES_PATH] + [path for path, _ in DATASETS.values()]
+    manifest_path = os.path.join(output_dir, 'manifest.json')
+    current, manifest = manifest_up_to_date(manifest_path, inputs, k=K_NEAREST,
+                                            radius_miles=SEARCH_RADIUS_MILES)
+    if not force and current:
+        print(f"= {output_dir}: up to date")
+        return 0
+
+    start = time.time()
+    numbers, zip_lat, zip_lon = load_zipcode_arrays(ZIPCODES_PATH)
+    codes = [f"{number:05d}" for number in numbers.tolist()]
+    zip_lat, zip_lon = zip_lat.astype(np.float64), zip_lon.astype(np.float64)
+
+    shards = {}
+    for code in codes:
+        shards.setdefault(code[:3], {})[code] = {}
+    most = {}
+    for dataset in DATASETS:
+        index = SpatialIndex.from_dataset(dataset)
+        results, _ = all_within(zip_lat, zip_lon, index)
+        for i, nearest in results:
+            shards[codes[i][:3]][codes[i]][dataset] = nearest
+        most[dataset] = max((len(nearest) for _, nearest in results), default=0)
+
+    os.makedirs(output_dir, exist_ok=True)
+    written = 0
+    for prefix, entries in shards.items():
+        text = json.dumps(entries, separators=(',', ':'))
+        if write_text_atomic(os.path.join(output_dir, f"{prefix}.json"), text):
+            written += 1
+    for name in os.listdir(output_dir):
+        if name.endswith('.json') and name != 'manifest.json' and name[:-5] not in shards:
+            os.remove(os.path.join(output_dir, name))
+
+    manifest.update({
+        "most_within_radius": most,
+        "datasets": {dataset: path for dataset, (path, _) in DATASETS.items()},
+        "prefixes": sorted(shards),
+    })
+    write_text_atomic(manifest_path, json.dumps(manifest, indent=2))
+    print(f"✓ {output_dir}: {len(codes)} zips in {len(shards)} shards "
+          f"({written} changed, {time.time() - start:.1f}s)")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute zipcode → nearest centers shards")
+    parser.add_argument('--force', action='store_true', help="rebuild even if inputs are unchanged")
+    args = parser.parse_args()
+    build_nearest_index(force=args.force)
+
+
+if __name__ == '__main__':
+    main()
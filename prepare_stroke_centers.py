@@ -2,6 +2,10 @@
 """
 Script to prepare stroke center data.
 This includes sample data and instructions for obtaining real data from Joint Commission.
+
+Once data/stroke_centers.json exists build.py owns it, so the sample is only
+written into an empty checkout, and converted CSVs go to data/sources/ as a
+new build source.
 """
 
 import json
@@ -12,6 +16,10 @@ def create_sample_stroke_centers():
     Create sample stroke center data as a template.
     Users should replace this with actual data from Joint Commission or DNV.
     """
+    output_file = 'data/stroke_centers.json'
+    if os.path.exists(output_file):
+        print(f"= {output_file} exists and is written by build.py; not replacing it with samples")
+        return False
 
     print("Creating sample stroke center data...")
     print("\n" + "="*70)
@@ -160,7 +168,6 @@ def create_sample_stroke_centers():
     os.makedirs('data', exist_ok=True)
 
     # Save sample data
-    output_file = 'data/stroke_centers.json'
     with open(output_file, 'w') as f:
         json.dump(sample_centers, f, indent=2)
 
@@ -170,10 +177,11 @@ def create_sample_stroke_centers():
 
     return True
 
-def convert_csv_to_json(csv_file):
+def convert_csv_to_json(csv_file, output_file=os.path.join('data', 'sources', 'joint_commission_centers.json')):
     """
     Helper function to convert downloaded CSV data to JSON format.
-    Call this function if you download CSV data from Joint Commission.
+    Call this function if you download CSV data from Joint Commission, then
+    add output_file to SOURCES in build.py and run the build.
     """
     import csv
 
@@ -193,8 +201,9 @@ def convert_csv_to_json(csv_file):
                     "city": row.get('City', ''),
                     "state": row.get('State', ''),
                     "zipcode": row.get('Zip', ''),
-                    "latitude": float(row.get('Latitude', 0)) if row.get('Latitude') else 0,
-                    "longitude": float(row.get('Longitude', 0)) if row.get('Longitude') else 0,
+                    # Left empty, build.py geocodes the record
+                    "latitude": float(row['Latitude']) if row.get('Latitude') else None,
+                    "longitude": float(row['Longitude']) if row.get('Longitude') else None,
                     "phone": row.get('Phone', ''),
                     "certification_org": row.get('Certification Organization', 'Joint Commission'),
                     "certification_type": row.get('Certification Type', 'Comprehensive Stroke Center')
@@ -203,11 +212,12 @@ def convert_csv_to_json(csv_file):
                 centers.append(center)
 
         # Save to JSON
-        output_file = 'data/stroke_centers.json'
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
         with open(output_file, 'w') as f:
             json.dump(centers, f, indent=2)
 
         print(f"Converted {len(centers)} centers to {output_file}")
+        print("Add it to SOURCES in build.py, then run python3 build.py")
         return True
 
     except Exception as e:
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Publish the site to dist/ with long-lived caching in mind.
+
+Every data file the pages fetch is minified and written under a name that
+carries a hash of its content:
+
+    data/stroke_centers.json  →  dist/data/stroke_centers.3f9c2a71d0.json
+    data/nearest/             →  dist/data/nearest.8e01b7c4aa/   (one hash per shard directory)
+
+The scripts and stylesheet get the same treatment, with the references in
+the HTML rewritten. Files of GZIP_MIN_BYTES or more also get precompressed
+.gz and, if the brotli package is installed, .br siblings, for servers
+that send them as is (nginx gzip_static/brotli_static). dist/asset-manifest.json
+maps each original path to its hashed one. app.js and desert.js read it
+first (assets.js) and fall back to the original paths when it is missing,
+so the repository root still works as a site during development.
+
+Only the HTML pages and the manifest need revalidating. Everything else in
+dist/ never changes under its name, so it can be served with
+`Cache-Control: public, max-age=31536000, immutable`. Files from the
+previous publish are kept, for pages that loaded the old manifest.
+build.py publishes after every build; when the source files are the same
+ones as last time and none is newer than dist/asset-manifest.json, that
+is a no-op.
+
+    python3 publish.py                 # publish into dist/
+    python3 publish.py --output /srv/strokecenters
+    python3 publish.py --force         # republish even if nothing changed
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from center_store import write_bytes_atomic, write_text_atomic
+
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'asset-manifest.json'
+
+# Fetched by the pages under their own names
+PAGES = ('index.html', 'desert.html')
+# Referenced from the pages, renamed with their hash
+STATIC = ('styles.css', 'assets.js', 'columnar.js', 'app.js', 'desert.js')
+# Fetched by the scripts through assetUrl()
+DATA_FILES = (
+    os.path.join('data', 'stroke_centers.json'),
+    os.path.join('data', 'stroke_centers.bin'),
+    os.path.join('data', 'thrombectomy_centers.json'),
+    os.path.join('data', 'thrombectomy_centers.bin'),
+    os.path.join('data', 'coverage', 'uncovered.geojson'),
+)
+DATA_DIRECTORIES = (
+    os.path.join('data', 'zipcodes'),
+    os.path.join('data', 'nearest'),
+)
+
+HASH_LENGTH = 10
+
+# Smaller files are not worth a compressed sibling
+GZIP_MIN_BYTES = 1024
+
+JSON_EXTENSIONS = ('.json', '.geojson')
+
+
+def minified(path):
+    """File contents, with JSON re-serialized without whitespace"""
+    if path.endswith(JSON_EXTENSIONS):
+        with open(path, 'r') as f:
+            return json.dumps(json.load(f), separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def hashed_name(path, digest):
+    """data/stroke_centers.json → data/stroke_centers.<digest>.json"""
+    root, extension = os.path.splitext(path)
+    return f"{root}.{digest}{extension}"
+
+
+def url(path):
+    return path.replace(os.sep, '/')
+
+
+def write_compressed(path, data):
+    """Write data to path, after the .gz (and .br) siblings worth having"""
+    if len(data) >= GZIP_MIN_BYTES:
+        compressed = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            compressed.append(('.br', brotli.compress(data, quality=11)))
+        for suffix, blob in compressed:
+            if len(blob) < len(data):
+                write_bytes_atomic(path + suffix, blob)
+    # Last, so a file that exists has its siblings
+    write_bytes_atomic(path, data)
+
+
+def publish_file(source, output_dir):
+    """Publish one file under its hashed name; returns (hashed path, minified bytes)"""
+    data = minified(source)
+    target = hashed_name(source, content_hash(data))
+    destination = os.path.join(output_dir, target)
+    if not os.path.exists(destination):
+        os.makedirs(os.path.dirname(destination) or output_dir, exist_ok=True)
+        write_compressed(destination, data)
+    return target, len(data)
+
+
+def publish_directory(source, output_dir):
+    """
+    Publish a shard directory as <source>.<hash>/, one hash over all its
+    files. The copy is assembled under a temporary name and renamed, so an
+    existing hashed directory is always complete. Returns (hashed path,
+    minified bytes).
+    """
+    names = sorted(name for name in os.listdir(source) if not name.startswith('.'))
+    files = {name: minified(os.path.join(source, name)) for name in names}
+    digest = hashlib.sha256()
+    for name in names:
+        digest.update(f"{name}\0{content_hash(files[name])}\n".encode())
+    target = f"{source}.{digest.hexdigest()[:HASH_LENGTH]}"
+    destination = os.path.join(output_dir, target)
+    size = sum(len(data) for data in files.values())
+    if os.path.isdir(destination):
+        return target, size
+
+    parent = os.path.dirname(destination)
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=parent, prefix='.publish-')
+    try:
+        for name, data in files.items():
+            write_compressed(os.path.join(staging, name), data)
+        os.chmod(staging, 0o755)
+        os.rename(staging, destination)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return target, size
+
+
+def rewrite_page(page, static):
+    """An HTML page with its script and stylesheet references hashed"""
+    with open(page, 'r') as f:
+        html = f.read()
+    for original, hashed in static.items():
+        html = html.replace(f'"{original}"', f'"{hashed}"')
+    return html
+
+
+def prune(output_dir, keep):
+    """Remove hashed outputs that neither the new nor the previous manifest uses"""
+    removed = 0
+    keep_paths = {os.path.normpath(os.path.join(output_dir, path)) for path in keep}
+    for root, directories, files in os.walk(output_dir, topdown=True):
+        for directory in list(directories):
+            path = os.path.normpath(os.path.join(root, directory))
+            if path in keep_paths:
+                # A published shard directory, kept whole
+                directories.remove(directory)
+            elif not any(kept.startswith(path + os.sep) for kept in keep_paths):
+                shutil.rmtree(path)
+                directories.remove(directory)
+                removed += 1
+        for name in files:
+            path = os.path.normpath(os.path.join(root, name))
+            if (path[:-3] if path.endswith(('.gz', '.br')) else path) not in keep_paths:
+                os.remove(path)
+                removed += 1
+    return removed
+
+
+def source_paths():
+    """Every file publish() reads"""
+    paths = list(PAGES) + list(STATIC) + [path for path in DATA_FILES if os.path.exists(path)]
+    for directory in DATA_DIRECTORIES:
+        if os.path.isdir(directory):
+            paths += [os.path.join(directory, name) for name in os.listdir(directory)
+                      if not name.startswith('.')]
+    return paths
+
+
+def listing_hash(paths):
+    """Hash of the set of source files, so a deleted shard counts as a change"""
+    return content_hash('\n'.join(sorted(paths)).encode('utf-8'))
+
+
+def up_to_date(manifest_path, previous, paths):
+    """
+    True when the last publish read the same source files and the manifest
+    is newer than every one of them. The generators skip rewriting
+    unchanged files, so an untouched source keeps its mtime and the check
+    costs a stat per file instead of minifying and hashing every one of
+    them again.
+    """
+    if previous.get('sources') != listing_hash(paths):
+        return False
+    try:
+        published = os.stat(manifest_path).st_mtime_ns
+    except FileNotFoundError:
+        return False
+    return all(os.stat(path).st_mtime_ns < published for path in paths)
+
+
+def publish(output_dir=DIST_DIR, force=False):
+    """
+    Publish the pages, scripts and data into output_dir; returns the
+    manifest. Nothing is done when no source changed since the last publish.
+    """
+    start = time.time()
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    try:
+        with open(manifest_path, 'r') as f:
+            previous = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        previous = {}
+    sources = source_paths()
+    if not force and previous and up_to_date(manifest_path, previous, sources):
+        print(f"= {output_dir}: up to date")
+        return previous
+
+    files, directories, source_bytes, published_bytes = {}, {}, 0, 0
+    for path in DATA_FILES:
+        if not os.path.exists(path):
+            print(f"⚠ {path} not found; not published")
+            continue
+        target, size = publish_file(path, output_dir)
+        files[url(path)] = url(target)
+        source_bytes += os.path.getsize(path)
+        published_bytes += size
+    for path in DATA_DIRECTORIES:
+        if not os.path.isdir(path):
+            print(f"⚠ {path}/ not found; not published")
+            continue
+        target, size = publish_directory(path, output_dir)
+        directories[url(path) + '/'] = url(target) + '/'
+        source_bytes += sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+        published_bytes += size
+
+    static = {}
+    for path in STATIC:
+        target, _ = publish_file(path, output_dir)
+        static[path] = url(target)
+    for page in PAGES:
+        write_text_atomic(os.path.join(output_dir, page), rewrite_page(page, static))
+
+    manifest = {"files": files, "directories": directories, "static": static,
+                "encodings": ['gzip'] + (['br'] if brotli is not None else []),
+                "sources": listing_hash(sources)}
+    write_text_atomic(manifest_path, json.dumps(manifest, indent=2))
+    # Marks the sources as published even when the manifest came out the same
+    os.utime(manifest_path)
+
+    keep = set(PAGES) | {MANIFEST_NAME}
+    for entry in (previous, manifest):
+        for group in ('files', 'directories', 'static'):
+            keep.update(path.rstrip('/') for path in entry.get(group, {}).values())
+    removed = prune(output_dir, keep)
+
+    compressed = '.gz and .br' if brotli is not None else '.gz (pip install brotli for .br)'
+    print(f"✓ {output_dir}: {len(files)} files and {len(directories)} shard directories, "
+          f"{source_bytes / 1e6:.1f} MB → {published_bytes / 1e6:.1f} MB minified, with {compressed}"
+          f"{f'; removed {removed} old' if removed else ''} ({time.time() - start:.1f}s)")
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish the site with minified, content-hashed data files")
+    parser.add_argument('--output', default=DIST_DIR, help=f"output directory (default {DIST_DIR})")
+    parser.add_argument('--force', action='store_true', help="publish even if no source changed")
+    args = parser.parse_args()
+    publish(args.output, force=args.force)
+
+
+if __name__ == '__main__':
+    main()
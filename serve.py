@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+"""
+Stroke center query service: nearest centers and state lists over HTTP, for
+consumers other than the dashboard (CAD integrations, scripts, other apps).
+
+The centers and zip centroids are held in memory as spatial_index indexes
+and a zip → coordinates table, so a query is a bounding-box lookup and a
+few dot products. Responses are JSON and are kept in an LRU cache with
+their gzipped copy and ETag, so repeated queries cost one dictionary
+lookup. Clients that send Accept-Encoding: gzip get the gzipped body, and
+If-None-Match gets a 304.
+
+    GET /nearest?zip=33101[&type=csc|tsc][&radius=100][&limit=40]
+    GET /nearest?lat=29.65&lon=-82.34[&type=...][&radius=...][&limit=...]
+    GET /state/FL[?type=csc|tsc]      centers in a state, by city then name
+    GET /health                       data version, counts, cache statistics
+
+The inputs (data/zipcodes.json and the center datasets) are checked every
+few seconds, or at once on SIGHUP. When a build changes them, the new data
+is loaded on a worker thread and swapped in as one object. Requests
+already in progress finish against the old data, and the cache starts
+empty with the new data.
+
+    python3 serve.py                      # http://127.0.0.1:8080
+    python3 serve.py --host 0.0.0.0 --port 9000 --workers 4
+    curl 'http://127.0.0.1:8080/nearest?zip=33101&limit=3'
+"""
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import multiprocessing
+import os
+import signal
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qs, unquote, urlsplit
+
+try:
+    import numpy as np
+except ImportError:
+    raise SystemExit("The query service needs numpy: pip install numpy")
+
+from center_store import DATASETS, file_hash
+from columnar import ZIPCODES_PATH, load_zipcode_arrays
+from nearest_index import K_NEAREST, SEARCH_RADIUS_MILES
+from spatial_index import SpatialIndex
+from zip_states import ZIP3_STATES
+
+DEFAULT_PORT = 8080
+
+# Responses kept per data version
+CACHE_SIZE = 10000
+
+# Largest radius and result count a query may ask for
+MAX_RADIUS_MILES = 500
+MAX_LIMIT = 500
+
+# Bodies shorter than this are sent uncompressed
+GZIP_MIN_BYTES = 512
+
+# Seconds between checks of the input files
+RELOAD_SECONDS = 2.0
+
+# Longest request head accepted
+MAX_HEAD_BYTES = 8192
+
+STATES = frozenset(ZIP3_STATES) - {''}
+
+REASONS = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found',
+           405: 'Method Not Allowed', 431: 'Request Header Fields Too Large'}
+
+
+class QueryError(Exception):
+    """A request the service answers with an error status"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Response:
+    """An encoded response: status, JSON body and ETag; gzipped on first request for it"""
+
+    COMMON = ("Content-Type: application/json; charset=utf-8\r\n"
+              "Cache-Control: no-cache\r\n"
+              "Access-Control-Allow-Origin: *\r\n"
+              "Vary: Accept-Encoding\r\n")
+
+    def __init__(self, status, body):
+        self.status = status
+        self.body = body
+        self.etag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+        self.head = self._head(self.etag, len(body))
+        self.not_modified = f"HTTP/1.1 304 Not Modified\r\n{self.COMMON}ETag: {self.etag}\r\n".encode()
+        self.gzipped = None
+
+    @classmethod
+    def of(cls, status, data):
+        return cls(status, to_json(data))
+
+    def _head(self, etag, length, encoding=''):
+        return (f"HTTP/1.1 {self.status} {REASONS[self.status]}\r\n{self.COMMON}ETag: {etag}\r\n"
+                f"{encoding}Content-Length: {length}\r\n").encode()
+
+    def _gzip(self):
+        """(gzip ETag, head, body, 304 head); each encoding is its own representation"""
+        if self.gzipped is None:
+            body = gzip.compress(self.body, compresslevel=6, mtime=0)
+            etag = self.etag[:-1] + '-gzip"'
+            self.gzipped = (etag, self._head(etag, len(body), "Content-Encoding: gzip\r\n"), body,
+                            f"HTTP/1.1 304 Not Modified\r\n{self.COMMON}ETag: {etag}\r\n".encode())
+        return self.gzipped
+
+    def parts(self, accept_gzip, if_none_match):
+        """(head, body) to send; head lacks the blank line that ends it"""
+        if accept_gzip and len(self.body) >= GZIP_MIN_BYTES:
+            etag, head, body, not_modified = self._gzip()
+            if if_none_match and etag in if_none_match:
+                return not_modified, b''
+            return head, body
+        if if_none_match and self.etag in if_none_match:
+            return self.not_modified, b''
+        return self.head, self.body
+
+
+def to_json(data):
+    return json.dumps(data, separators=(',', ':')).encode()
+
+
+class LRUCache:
+    def __init__(self, size=CACHE_SIZE):
+        self.size = size
+        self.entries = OrderedDict()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, entry):
+        self.entries[key] = entry
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+
+def input_paths():
+    return [ZIPCODES_PATH] + [path for path, _ in DATASETS.values()]
+
+
+def input_signature():
+    """Cheap change check: (mtime, size) of every input"""
+    signature = []
+    for path in input_paths():
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            signature.append(None)
+    return signature
+
+
+class Snapshot:
+    """One loaded version of the data; never modified once built"""
+
+    def __init__(self, cache_size=CACHE_SIZE):
+        start = time.perf_counter()
+        self.signature = input_signature()
+        self.version = hashlib.blake2b(''.join(file_hash(path) for path in input_paths()).encode(),
+                                       digest_size=6).hexdigest()
+        numbers, lat, lon = load_zipcode_arrays()
+        self.zips = {f"{z:05d}": (y, x) for z, y, x in
+                     zip(numbers.tolist(), np.round(lat.astype(np.float64), 5).tolist(),
+                         np.round(lon.astype(np.float64), 5).tolist())}
+
+        self.indexes, self.fragments, self.by_state = {}, {}, {}
+        for dataset in DATASETS:
+            index = SpatialIndex.from_dataset(dataset)
+            index.records = [dict(record, id=i) for i, record in enumerate(index.records)]
+            self.indexes[dataset] = index
+            # Each record encoded once, open for the "miles" of a query
+            self.fragments[dataset] = [to_json(record)[:-1] for record in index.records]
+            states = {}
+            for record in sorted(index.records, key=lambda r: (r.get('city') or '', r['name'])):
+                states.setdefault(record['state'], []).append(record)
+            self.by_state[dataset] = states
+
+        self.cache = LRUCache(cache_size)
+        self.loaded_at = time.time()
+        self.load_seconds = time.perf_counter() - start
+
+    def describe(self):
+        counts = ', '.join(f"{len(index)} {dataset.upper()}s" for dataset, index in self.indexes.items())
+        return f"data {self.version}: {len(self.zips)} zips, {counts} ({self.load_seconds * 1000:.0f} ms)"
+
+    # Queries
+
+    def respond(self, target):
+        """Response for a request target, from the cache when possible"""
+        entry = self.cache.get(target)
+        if entry is None:
+            try:
+                entry = Response(200, self.query(target))
+            except QueryError as e:
+                # Not cached: arbitrary bad input should not evict real answers
+                return Response.of(e.status, {"error": str(e)})
+            self.cache.put(target, entry)
+        return entry
+
+    def query(self, target):
+        """JSON body for a request target"""
+        url = urlsplit(target)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        path = unquote(url.path).rstrip('/')
+        if path == '/nearest':
+            return self.nearest(params)
+        if path.startswith('/state/'):
+            return self.state(path[len('/state/'):].upper(), params)
+        raise QueryError(404, f"Unknown path {url.path}; use /nearest, /state/ST or /health")
+
+    def dataset(self, params):
+        dataset = params.get('type', 'csc').lower()
+        if dataset not in self.indexes:
+            raise QueryError(400, f"type must be one of {', '.join(self.indexes)}")
+        return dataset
+
+    def nearest(self, params):
+        dataset = self.dataset(params)
+        radius = number(params, 'radius', SEARCH_RADIUS_MILES, 0, MAX_RADIUS_MILES)
+        limit = number(params, 'limit', K_NEAREST, 1, MAX_LIMIT)
+        if 'zip' in params:
+            zipcode = params['zip'].strip().split('-')[0]
+            if not (zipcode.isdigit() and len(zipcode) == 5):
+                raise QueryError(400, "zip must be 5 digits")
+            if zipcode not in self.zips:
+                raise QueryError(404, f"Unknown zipcode {zipcode}")
+            lat, lon = self.zips[zipcode]
+            origin = {"zip": zipcode, "latitude": lat, "longitude": lon}
+        elif 'lat' in params and 'lon' in params:
+            lat = number(params, 'lat', None, -90, 90)
+            lon = number(params, 'lon', None, -180, 180)
+            origin = {"latitude": lat, "longitude": lon}
+        else:
+            raise QueryError(400, "give zip, or lat and lon")
+
+        nearest = self.indexes[dataset].nearest(lat, lon, int(limit), max_miles=radius)
+        fragments = self.fragments[dataset]
+        centers = b','.join(b'%s,"miles":%.1f}' % (fragments[i], miles) for i, miles in nearest)
+        envelope = to_json({"version": self.version, "type": dataset, "origin": origin,
+                            "radius_miles": radius, "count": len(nearest)})
+        return envelope[:-1] + b',"centers":[' + centers + b']}'
+
+    def state(self, state, params):
+        dataset = self.dataset(params)
+        if state not in STATES:
+            raise QueryError(404, f"Unknown state {state}")
+        centers = self.by_state[dataset].get(state, [])
+        return to_json({"version": self.version, "type": dataset, "state": state,
+                        "count": len(centers), "centers": centers})
+
+
+def number(params, name, default, low, high):
+    """A numeric query parameter within [low, high]"""
+    if name not in params:
+        if default is None:
+            raise QueryError(400, f"{name} is required")
+        return float(default)
+    try:
+        value = float(params[name])
+    except ValueError:
+        raise QueryError(400, f"{name} must be a number")
+    if not low <= value <= high:
+        raise QueryError(400, f"{name} must be between {low} and {high}")
+    return value
+
+
+class Service:
+    """The current snapshot, swapped when the inputs change"""
+
+    def __init__(self, cache_size=CACHE_SIZE):
+        self.cache_size = cache_size
+        self.snapshot = Snapshot(cache_size)
+        self.requests = 0
+        self.reloading = None
+        self.started = time.time()
+
+    def health(self):
+        snapshot = self.snapshot
+        cache = snapshot.cache
+        return Response.of(200, {
+            "status": "ok",
+            "version": snapshot.version,
+            "loaded_at": round(snapshot.loaded_at),
+            "zips": len(snapshot.zips),
+            "centers": {dataset: len(index) for dataset, index in snapshot.indexes.items()},
+            "requests": self.requests,
+            "cache": {"entries": len(cache.entries), "hits": cache.hits, "misses": cache.misses},
+            "pid": os.getpid(),
+        })
+
+    async def reload(self, force=False):
+        """Load the inputs on a thread and swap them in if they changed"""
+        if self.reloading is not None:
+            return await self.reloading
+        if not force and input_signature() == self.snapshot.signature:
+            return False
+        loop = asyncio.get_running_loop()
+        self.reloading = loop.run_in_executor(None, Snapshot, self.cache_size)
+        try:
+            snapshot = await self.reloading
+        except Exception as e:
+            # Keep serving the old data; the next check retries
+            print(f"⚠ Reload failed, still serving {self.snapshot.version}: {e}")
+            return False
+        finally:
+            self.reloading = None
+        if snapshot.version == self.snapshot.version:
+            # Touched but identical: keep the warm cache, remember the new mtimes
+            self.snapshot.signature = snapshot.signature
+            return False
+        previous, self.snapshot = self.snapshot, snapshot
+        print(f"✓ [{os.getpid()}] Reloaded {previous.version} → {snapshot.describe()}")
+        return True
+
+    async def watch(self, interval=RELOAD_SECONDS):
+        while True:
+            await asyncio.sleep(interval)
+            await self.reload()
+
+
+class HttpProtocol(asyncio.Protocol):
+    """Minimal HTTP/1.1: GET and HEAD, keep-alive and pipelining, no request bodies"""
+
+    def __init__(self, service):
+        self.service = service
+        self.buffer = b''
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data):
+        self.buffer += data
+        while self.transport is not None:
+            end = self.buffer.find(b'\r\n\r\n')
+            if end < 0:
+                if len(self.buffer) > MAX_HEAD_BYTES:
+                    self.send(Response.of(431, {"error": "Request head too large"}), False, None, close=True)
+                return
+            head, self.buffer = self.buffer[:end].decode('latin-1'), self.buffer[end + 4:]
+            self.handle(head)
+
+    def handle(self, head):
+        lines = head.split('\r\n')
+        try:
+            method, target, version = lines[0].split(' ')
+        except ValueError:
+            self.send(Response.of(400, {"error": "Malformed request line"}), False, None, close=True)
+            return
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        connection = headers.get('connection', '').lower()
+        close = connection == 'close' or (version == 'HTTP/1.0' and connection != 'keep-alive')
+
+        if method not in ('GET', 'HEAD') or headers.get('content-length', '0') != '0':
+            self.send(Response.of(405, {"error": "Only GET and HEAD are supported"}), False, None, close=True)
+            return
+
+        service = self.service
+        service.requests += 1
+        if target == '/health':
+            response = service.health()
+        else:
+            # Holding the snapshot for the whole request; a reload only
+            # replaces service.snapshot
+            response = service.snapshot.respond(target)
+        self.send(response, 'gzip' in headers.get('accept-encoding', ''), headers.get('if-none-match'),
+                  close=close, head_only=method == 'HEAD')
+
+    def send(self, response, accept_gzip, if_none_match, close=False, head_only=False):
+        head, body = response.parts(accept_gzip, if_none_match)
+        self.transport.write(head + (b'Connection: close\r\n\r\n' if close else b'\r\n')
+                             + (b'' if head_only else body))
+        if close:
+            self.transport.close()
+            self.transport = None
+
+    def connection_lost(self, exc):
+        self.transport = None
+
+
+async def serve(host, port, cache_size=CACHE_SIZE, reuse_port=False):
+    service = Service(cache_size)
+    loop = asyncio.get_running_loop()
+    server = await loop.create_server(lambda: HttpProtocol(service), host, port,
+                                      reuse_port=reuse_port or None, backlog=1024)
+    print(f"✓ [{os.getpid()}] Serving on http://{host}:{port} ({service.snapshot.describe()})")
+
+    stop = asyncio.Event()
+    loop.add_signal_handler(signal.SIGHUP, lambda: asyncio.ensure_future(service.reload(force=True)))
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    watcher = asyncio.ensure_future(service.watch())
+    async with server:
+        await stop.wait()
+    watcher.cancel()
+
+
+def run(host, port, cache_size, reuse_port):
+    try:
+        asyncio.run(serve(host, port, cache_size, reuse_port))
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve nearest-center and state queries over HTTP")
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on (default 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"port (default {DEFAULT_PORT})")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="processes sharing the port (SO_REUSEPORT), e.g. one per core")
+    parser.add_argument('--cache-size', type=int, default=CACHE_SIZE,
+                        help=f"cached responses per process (default {CACHE_SIZE})")
+    args = parser.parse_args()
+
+    if args.workers <= 1:
+        run(args.host, args.port, args.cache_size, False)
+        return
+    workers = [multiprocessing.Process(target=run, args=(args.host, args.port, args.cache_size, True))
+               for _ in range(args.workers)]
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Where would new centers close the most coverage gap?
+
+Given candidate sites, picks the k that together bring the most currently
+uncovered zips within --radius of a center. Each candidate's coverage
+(the zips within the radius of it) is precomputed once as a bitset, a
+Python int with one bit per zip, so the gain of a site is a popcount of
+its bits minus the covered set. Sites are chosen by lazy greedy: a site's
+gain can only shrink as others are picked, so stale gains in a heap are
+upper bounds, and only the top of the heap is ever re-evaluated.
+
+Candidates default to the other dataset's hospitals (TSCs that could
+become CSCs, or CSCs for the TSC list), minus those already at a center
+of the target dataset. Any JSON list of records with latitude/longitude,
+or CSV with name and lat/lon columns, can be given instead.
+
+    python3 siting.py -k 5                          # best 5 TSCs to upgrade to CSC, 60 miles
+    python3 siting.py --dataset tsc --radius 45 -k 10
+    python3 siting.py --candidates psc_sites.csv -k 3 --json picks.json
+"""
+
+import argparse
+import csv
+import heapq
+import json
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    raise SystemExit("Siting needs numpy: pip install numpy")
+
+from center_store import DATASETS, write_atomic
+from columnar import load_zipcode_arrays
+from coverage import MAP_RADIUS_MILES
+from dedup import SAME_SITE_MILES
+from spatial_index import SpatialIndex
+from zip_states import ZIP3_STATES
+
+DEFAULT_PICKS = 5
+
+LAT_KEYS = ('latitude', 'lat')
+LON_KEYS = ('longitude', 'lon', 'lng')
+
+
+def load_candidates(path):
+    """Records with name/city/state/latitude/longitude from a JSON or CSV file"""
+    if path.endswith('.csv'):
+        with open(path, 'r', newline='') as f:
+            records = list(csv.DictReader(f))
+    else:
+        with open(path, 'r') as f:
+            records = json.load(f)
+
+    candidates, skipped = [], 0
+    for record in records:
+        lowered = {key.lower(): value for key, value in record.items()}
+        lat = next((lowered[k] for k in LAT_KEYS if lowered.get(k) not in (None, '')), None)
+        lon = next((lowered[k] for k in LON_KEYS if lowered.get(k) not in (None, '')), None)
+        try:
+            lat, lon = float(lat), float(lon)
+        except (TypeError, ValueError):
+            skipped += 1
+            continue
+        candidates.append({
+            "name": lowered.get('name') or f"Site {len(candidates) + 1}",
+            "city": lowered.get('city') or '',
+            "state": lowered.get('state') or '',
+            "latitude": lat,
+            "longitude": lon,
+        })
+    if skipped:
+        print(f"⚠ Skipped {skipped} candidates without coordinates")
+    return candidates
+
+
+def to_bitset(indices, size):
+    """Python int with bit i set for each index"""
+    mask = np.zeros(size, dtype=bool)
+    mask[indices] = True
+    return int.from_bytes(np.packbits(mask, bitorder='little').tobytes(), 'little')
+
+
+def from_bitset(bits):
+    """Indices of the set bits"""
+    data = np.frombuffer(bits.to_bytes((bits.bit_length() + 7) // 8 or 1, 'little'), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(data, bitorder='little'))
+
+
+def lazy_greedy(bitsets, covered, k):
+    """
+    Pick up to k bitsets maximizing the newly covered bits. Returns
+    [(candidate index, gain, evaluations)], stopping early when nothing
+    more can be gained.
+    """
+    heap = [(-(bits & ~covered).bit_count(), i) for i, bits in enumerate(bitsets)]
+    heapq.heapify(heap)
+    picks, evaluations = [], len(bitsets)
+    while heap and len(picks) < k:
+        bound, i = heapq.heappop(heap)
+        gain = (bitsets[i] & ~covered).bit_count()
+        evaluations += 1
+        if gain == 0:
+            # Its bound was stale; others may still gain
+            continue
+        # Stale bounds only overestimate, so beating the next bound means
+        # no other site can do better (ties go to the earlier candidate)
+        if not heap or (-gain, i) < heap[0]:
+            covered |= bitsets[i]
+            picks.append((i, gain, evaluations))
+        else:
+            heapq.heappush(heap, (-gain, i))
+    return picks, covered
+
+
+def default_candidates(dataset):
+    """The other dataset's records"""
+    other = next(name for name in DATASETS if name != dataset)
+    with open(DATASETS[other][0], 'r') as f:
+        return json.load(f)
+
+
+def site(dataset='csc', candidates=None, k=DEFAULT_PICKS, radius=MAP_RADIUS_MILES):
+    """Run the optimizer; returns a result dict (also what --json writes)"""
+    start = time.perf_counter()
+    numbers, zip_lat, zip_lon = load_zipcode_arrays()
+    zips = SpatialIndex(zip_lat.astype(np.float64), zip_lon.astype(np.float64))
+    existing = SpatialIndex.from_dataset(dataset)
+
+    # Zips already within the radius of an existing center
+    _, miles = existing.nearest_many(zips.lat, zips.lon, 1)
+    covered = to_bitset(np.flatnonzero(miles[:, 0] <= radius), len(zips))
+    baseline = covered.bit_count()
+
+    # Candidates already at an existing center add nothing
+    candidates = [c for c in (candidates if candidates is not None else default_candidates(dataset))
+                  if not existing.nearest(c['latitude'], c['longitude'], 1, max_miles=SAME_SITE_MILES)]
+    bitsets = [to_bitset([i for i, _ in zips.within(c['latitude'], c['longitude'], radius)], len(zips))
+               for c in candidates]
+    prepared = time.perf_counter()
+
+    picks, _ = lazy_greedy(bitsets, covered, k)
+    solved = time.perf_counter()
+
+    # Replay the picks for each one's newly covered zips by state
+    states = np.array(ZIP3_STATES)[numbers.astype(np.int64) // 100]
+    results = []
+    for rank, (i, gain, _) in enumerate(picks, 1):
+        gained = from_bitset(bitsets[i] & ~covered)
+        covered |= bitsets[i]
+        by_state = dict(zip(*[v.tolist() for v in np.unique(states[gained], return_counts=True)]))
+        results.append(dict(candidates[i], rank=rank, new_zips=gain, covered_zips=covered.bit_count(),
+                            new_zips_by_state=by_state))
+    evaluations = picks[-1][2] if picks else len(bitsets)
+    return {
+        "dataset": dataset,
+        "radius_miles": radius,
+        "zips": len(zips),
+        "baseline_covered": baseline,
+        "candidates": len(candidates),
+        "picks": results,
+        "evaluations": evaluations,
+        "seconds": round(time.perf_counter() - start, 3),
+        "solve_seconds": round(solved - prepared, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pick candidate sites that close the most coverage gap")
+    parser.add_argument('--dataset', choices=sorted(DATASETS), default='csc',
+                        help="dataset whose coverage the new sites extend (default csc)")
+    parser.add_argument('--candidates', help="JSON or CSV of candidate sites (default: the other dataset)")
+    parser.add_argument('-k', type=int, default=DEFAULT_PICKS, help=f"sites to pick (default {DEFAULT_PICKS})")
+    parser.add_argument('--radius', type=float, default=MAP_RADIUS_MILES,
+                        help=f"coverage radius in miles (default {MAP_RADIUS_MILES})")
+    parser.add_argument('--json', help="also write the picks to this file")
+    args = parser.parse_args()
+
+    candidates = load_candidates(args.candidates) if args.candidates else None
+    result = site(args.dataset, candidates, args.k, args.radius)
+
+    zips = result['zips']
+    print(f"{result['candidates']} candidates, {result['baseline_covered']} of {zips} zips "
+          f"({result['baseline_covered'] / zips:.1%}) already within {args.radius:g} miles of a "
+          f"{args.dataset.upper()}")
+    for pick in result['picks']:
+        states = ', '.join(f"{state} +{n}" for state, n in
+                           sorted(pick['new_zips_by_state'].items(), key=lambda item: -item[1]))
+        print(f"  {pick['rank']:>2}. +{pick['new_zips']:<5} → {pick['covered_zips'] / zips:6.1%}  "
+              f"{pick['name']}, {pick['city']}, {pick['state']} ({states})")
+    print(f"Solved in {result['solve_seconds'] * 1000:.0f} ms with {result['evaluations']} gain evaluations "
+          f"({result['seconds']:.2f}s including setup)")
+    if args.json:
+        write_atomic(args.json, result)
+        print(f"✓ Wrote {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Radius and k-nearest queries over a set of points (centers, zip centroids).
+
+Every point is stored as a unit vector on the sphere. Comparing two points is
+then a dot product, and the nearer of two points is the one with the larger
+dot product. The arcsine that turns the dot product into miles is only
+computed for the points that are returned. Single-point queries first cut
+the candidates down to the query's bounding box, one binary search per
+half-degree latitude row (points are sorted by row, then longitude), so
+far-away points cost nothing. The batch variants score blocks of query points against all
+points with one matrix product each (for a few thousand points or fewer,
+like the center datasets; bigger sets are queried point by point).
+
+    from spatial_index import SpatialIndex
+    index = SpatialIndex.from_dataset('csc')
+    index.within(29.65, -82.34, 25)      # [(center index, miles), ...]
+    index.nearest(29.65, -82.34, k=3)
+
+    python3 spatial_index.py near 29.65 -82.34 25
+    python3 spatial_index.py nearest 29.65 -82.34 -k 3 --dataset tsc
+"""
+
+import argparse
+import json
+import math
+
+try:
+    import numpy as np
+except ImportError:
+    raise SystemExit("The spatial index needs numpy: pip install numpy")
+
+from center_store import DATASETS, EARTH_RADIUS_MILES, radius_bbox
+
+# Query points per matrix product in the batch queries: BATCH_SIZE x points float64s
+BATCH_SIZE = 2048
+
+# Above this many points the batch queries switch from one matrix product
+# per batch to prefiltered single-point queries
+DENSE_POINTS = 4096
+
+# No two points on Earth are further apart than this
+MAX_DISTANCE_MILES = math.pi * EARTH_RADIUS_MILES
+
+# Height of the latitude rows of the bounding-box prefilter; row keys are
+# row * ROW_KEY_SPAN + longitude + 180, so a row's points sort by longitude
+ROW_DEGREES = 0.5
+ROW_KEY_SPAN = 1000.0
+
+# First search radius for nearest() without a limit; doubled until k are found
+INITIAL_RADIUS_MILES = 25.0
+
+
+def unit_vectors(lat, lon):
+    """(n, 3) unit vectors for degrees of latitude/longitude"""
+    lat, lon = np.radians(np.asarray(lat, dtype=np.float64)), np.radians(np.asarray(lon, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def dot_to_miles(dot):
+    """Great-circle miles from unit-vector dot products"""
+    # Half the chord length is sin(angle / 2); this stays accurate at short
+    # distances, unlike arccos(dot)
+    half_chord = np.sqrt(np.clip(2.0 - 2.0 * dot, 0.0, 4.0)) / 2
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.minimum(half_chord, 1.0))
+
+
+def miles_to_dot(miles):
+    """Smallest dot product of two points within `miles` of each other"""
+    return math.cos(min(miles, MAX_DISTANCE_MILES) / EARTH_RADIUS_MILES)
+
+
+class SpatialIndex:
+    """Points in a fixed order; queries return (index into that order, miles)"""
+
+    def __init__(self, lat, lon):
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.vectors = unit_vectors(self.lat, self.lon)
+
+        # Bounding-box prefilter: points sorted by latitude row, then by
+        # longitude within the row, so each row of a box is one slice
+        self.rows = np.floor(self.lat / ROW_DEGREES).astype(np.int64)
+        self.keys = self.rows * ROW_KEY_SPAN + (self.lon + 180.0)
+        self.order = np.argsort(self.keys, kind='stable')
+        self.keys = self.keys[self.order]
+
+    @classmethod
+    def from_dataset(cls, dataset):
+        """Index of a published dataset ('csc' or 'tsc'), records kept alongside"""
+        path, _ = DATASETS[dataset]
+        with open(path, 'r') as f:
+            centers = json.load(f)
+        index = cls([c['latitude'] for c in centers], [c['longitude'] for c in centers])
+        index.records = centers
+        return index
+
+    def __len__(self):
+        return len(self.lat)
+
+    def _candidates(self, lat, lon, miles):
+        """Indices of the points in the latitude rows and longitude span of the circle"""
+        min_lat, min_lon, max_lat, max_lon = radius_bbox(lat, lon, miles)
+        half_width = (max_lon - min_lon) / 2
+        if half_width >= 180.0:
+            spans = [(-180.0, 180.0)]
+        else:
+            west, east = (lon - half_width + 180.0) % 360.0 - 180.0, (lon + half_width + 180.0) % 360.0 - 180.0
+            spans = [(west, east)] if west <= east else [(west, 180.0), (-180.0, east)]
+        first = math.floor(max(min_lat, -90.0) / ROW_DEGREES)
+        last = math.floor(min(max_lat, 90.0) / ROW_DEGREES)
+        bounds = np.array([(row * ROW_KEY_SPAN + west + 180.0, row * ROW_KEY_SPAN + east + 180.0)
+                           for row in range(first, last + 1) for west, east in spans])
+        starts = np.searchsorted(self.keys, bounds[:, 0], side='left').tolist()
+        ends = np.searchsorted(self.keys, bounds[:, 1], side='right').tolist()
+        slices = [self.order[s:e] for s, e in zip(starts, ends) if e > s]
+        if len(slices) == 1:
+            return slices[0]
+        return np.concatenate(slices) if slices else self.order[:0]
+
+    def _scored(self, lat, lon, miles):
+        """(candidate indices, dot products) of the points within `miles`"""
+        candidates = self._candidates(lat, lon, miles)
+        lat_r, lon_r = math.radians(lat), math.radians(lon)
+        query = np.array([math.cos(lat_r) * math.cos(lon_r), math.cos(lat_r) * math.sin(lon_r), math.sin(lat_r)])
+        dot = self.vectors[candidates] @ query
+        keep = dot >= miles_to_dot(miles)
+        return candidates[keep], dot[keep]
+
+    @staticmethod
+    def _ranked(candidates, dot, miles, k=None):
+        """[(index, miles), ...] nearest first, ties to the lower index"""
+        if k == 1 and len(dot):
+            best = dot.max()
+            index = int(candidates[dot == best].min())
+            distance = float(dot_to_miles(best))
+            return [(index, distance)] if distance <= miles else []
+        if k is not None and k < len(dot):
+            top = np.argpartition(-dot, k - 1)[:k]
+            # Keep every point tied with the k-th so the tie-break is stable
+            top = np.flatnonzero(dot >= dot[top].min())
+            candidates, dot = candidates[top], dot[top]
+        order = np.lexsort((candidates, -dot))[:k]
+        distances = dot_to_miles(dot[order])
+        # The dot threshold can admit a point a hair over the limit
+        return [(i, d) for i, d in zip(candidates[order].tolist(), distances.tolist()) if d <= miles]
+
+    def within(self, lat, lon, miles):
+        """[(index, miles), ...] of the points within `miles`, nearest first"""
+        candidates, dot = self._scored(lat, lon, miles)
+        return self._ranked(candidates, dot, miles)
+
+    def nearest(self, lat, lon, k=1, max_miles=None):
+        """[(index, miles), ...] of the k nearest points, optionally within max_miles"""
+        k = min(k, len(self))
+        if k <= 0:
+            return []
+        if max_miles is not None:
+            candidates, dot = self._scored(lat, lon, max_miles)
+            return self._ranked(candidates, dot, max_miles, k)
+        # Grow the search circle until it holds k points; anything outside
+        # the circle is further than everything inside it
+        radius = INITIAL_RADIUS_MILES
+        while True:
+            candidates, dot = self._scored(lat, lon, radius)
+            if len(candidates) >= k or radius >= MAX_DISTANCE_MILES:
+                return self._ranked(candidates, dot, radius, k)
+            radius = min(radius * 2, MAX_DISTANCE_MILES)
+
+    def _batches(self, lat, lon, batch_size):
+        lat, lon = np.atleast_1d(lat), np.atleast_1d(lon)
+        for start in range(0, len(lat), batch_size):
+            queries = unit_vectors(lat[start:start + batch_size], lon[start:start + batch_size])
+            yield start, queries @ self.vectors.T
+
+    def nearest_many(self, lat, lon, k=1, max_miles=None, batch_size=BATCH_SIZE):
+        """
+        k nearest points to each query point, as (indices, miles) arrays of
+        shape (queries, k), nearest first. Slots beyond the points available
+        (or beyond max_miles) have index -1 and distance inf.
+        """
+        count = len(np.atleast_1d(lat))
+        indices = np.full((count, k), -1, dtype=np.int64)
+        miles = np.full((count, k), np.inf)
+        found = min(k, len(self))
+        if found == 0:
+            return indices, miles
+
+        if len(self) > DENSE_POINTS:
+            # Scoring every query against every point costs more than the
+            # prefiltered single-point queries here
+            for row, (query_lat, query_lon) in enumerate(zip(np.atleast_1d(lat).tolist(),
+                                                              np.atleast_1d(lon).tolist())):
+                result = self.nearest(query_lat, query_lon, found, max_miles)
+                indices[row, :len(result)] = [i for i, _ in result]
+                miles[row, :len(result)] = [d for _, d in result]
+            return indices, miles
+
+        for start, dot in self._batches(lat, lon, batch_size):
+            if found == 1:
+                # argmax returns the first maximum, i.e. ties go to the lower index
+                nearest = dot.argmax(axis=1)[:, None]
+            else:
+                # Partition to the k largest dot products, then sort only those
+                # (ties go to the lower index, matching within())
+                nearest = np.argpartition(dot, dot.shape[1] - found, axis=1)[:, -found:]
+                nearest_dot = np.take_along_axis(dot, nearest, axis=1)
+                order = np.lexsort((nearest, -nearest_dot), axis=1)
+                nearest = np.take_along_axis(nearest, order, axis=1)
+                # A tie across the k-th place may have left out a lower index;
+                # redo those (rare) rows with a full stable sort
+                kth = np.take_along_axis(dot, nearest[:, -1:], axis=1)
+                for row in np.flatnonzero(np.count_nonzero(dot >= kth, axis=1) > found):
+                    nearest[row] = np.argsort(-dot[row], kind='stable')[:found]
+            distances = dot_to_miles(np.take_along_axis(dot, nearest, axis=1))
+            if max_miles is not None:
+                outside = distances > max_miles
+                nearest[outside], distances[outside] = -1, np.inf
+            indices[start:start + len(dot), :found] = nearest
+            miles[start:start + len(dot), :found] = distances
+        return indices, miles
+
+    def within_many(self, lat, lon, miles, batch_size=BATCH_SIZE):
+        """within() for each query point; a list of [(index, miles), ...] lists"""
+        threshold = miles_to_dot(miles)
+        results = []
+        for _, dot in self._batches(lat, lon, batch_size):
+            for row in dot:
+                candidates = np.flatnonzero(row >= threshold)
+                row_dot = row[candidates]
+                order = np.lexsort((candidates, -row_dot))
+                distances = dot_to_miles(row_dot[order])
+                results.append([(i, d) for i, d in zip(candidates[order].tolist(), distances.tolist())
+                                if d <= miles])
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Radius and k-nearest queries over the published centers")
+    parser.add_argument('--dataset', choices=sorted(DATASETS), default='csc')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    near = subparsers.add_parser('near', help="centers within a radius, nearest first")
+    near.add_argument('lat', type=float)
+    near.add_argument('lon', type=float)
+    near.add_argument('miles', type=float)
+    nearest = subparsers.add_parser('nearest', help="the k nearest centers")
+    nearest.add_argument('lat', type=float)
+    nearest.add_argument('lon', type=float)
+    nearest.add_argument('-k', type=int, default=5)
+    args = parser.parse_args()
+
+    index = SpatialIndex.from_dataset(args.dataset)
+    if args.command == 'near':
+        results = index.within(args.lat, args.lon, args.miles)
+    else:
+        results = index.nearest(args.lat, args.lon, args.k)
+    for i, miles in results:
+        center = index.records[i]
+        print(f"  {miles:6.1f} mi  {center['name']}, {center['city']}, {center['state']}")
+    print(f"{len(results)} centers")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Offline street-address geocoder built from Census TIGER/Line address ranges.
+
+Loads ADDRFEAT (address range feature) files from local disk into an SQLite
+store indexed by zip and normalized street name, then interpolates a house
+number along its street segment. Download the county files from
+https://www2.census.gov/geo/tiger/TIGER2023/ADDRFEAT/ into data/tiger/ and run:
+
+    python3 tiger_geocoder.py build data/tiger/*.zip
+    python3 tiger_geocoder.py lookup "1600 SW Archer Rd" 32610
+
+Shapefiles (.shp or the Census .zip) need pyshp (`pip install pyshp`);
+GeoJSON exports (e.g. from ogr2ogr) are read without extra dependencies.
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+
+TIGER_INDEX_PATH = os.path.join('data', 'tiger_addresses.sqlite')
+
+# Distance to push the point off the centerline toward the addressed side
+SIDE_OFFSET_METERS = 15
+
+# USPS Publication 28 abbreviations for the words that vary most in our lists
+STREET_ABBREVIATIONS = {
+    'AVENUE': 'AVE', 'AV': 'AVE', 'BOULEVARD': 'BLVD', 'CIRCLE': 'CIR',
+    'COURT': 'CT', 'DRIVE': 'DR', 'EXPRESSWAY': 'EXPY', 'FREEWAY': 'FWY',
+    'HIGHWAY': 'HWY', 'LANE': 'LN', 'PARKWAY': 'PKWY', 'PIKE': 'PIKE',
+    'PLACE': 'PL', 'PLAZA': 'PLZ', 'ROAD': 'RD', 'ROUTE': 'RTE',
+    'SQUARE': 'SQ', 'STREET': 'ST', 'TERRACE': 'TER', 'TRAIL': 'TRL',
+    'TURNPIKE': 'TPKE', 'WAY': 'WAY',
+    'NORTH': 'N', 'SOUTH': 'S', 'EAST': 'E', 'WEST': 'W',
+    'NORTHEAST': 'NE', 'NORTHWEST': 'NW', 'SOUTHEAST': 'SE', 'SOUTHWEST': 'SW',
+    'FIRST': '1ST', 'SECOND': '2ND', 'THIRD': '3RD', 'FOURTH': '4TH',
+    'FIFTH': '5TH', 'SIXTH': '6TH', 'SEVENTH': '7TH', 'EIGHTH': '8TH',
+    'NINTH': '9TH', 'TENTH': '10TH',
+    'SAINT': 'ST', 'MOUNT': 'MT', 'FORT': 'FT',
+}
+
+# Unit designators end the street part of an address line
+UNIT_PATTERN = re.compile(r'\b(SUITE|STE|UNIT|APT|BLDG|FLOOR|FL|ROOM|RM)\b.*$|#.*$')
+
+
+def normalize_street(street):
+    """Uppercase, strip punctuation and apply the standard abbreviations"""
+    street = UNIT_PATTERN.sub('', street.upper())
+    street = re.sub(r"[.,']", '', street)
+    street = re.sub(r'[^A-Z0-9 ]', ' ', street)
+    return ' '.join(STREET_ABBREVIATIONS.get(word, word) for word in street.split())
+
+
+def parse_address(address):
+    """Split '1600 SW ARCHER RD' into (1600, 'SW ARCHER RD'); None if unnumbered"""
+    match = re.match(r'\s*(\d+)[A-Za-z]?(?:-\d+)?\s+(.+)', address or '')
+    if not match:
+        return None
+    street = normalize_street(match.group(2))
+    if not street:
+        return None
+    return int(match.group(1)), street
+
+
+def _house_number(value):
+    """TIGER house numbers are strings and may be blank or hyphenated"""
+    value = (value or '').strip()
+    return int(value) if value.isdigit() else None
+
+
+def read_addrfeat(path):
+    """
+    Yield (properties, [(lon, lat), ...]) for each edge in an ADDRFEAT file.
+    Multi-part lines are flattened into one vertex list.
+    """
+    if path.endswith(('.geojson', '.json')):
+        with open(path, 'r') as f:
+            collection = json.load(f)
+        for feature in collection.get('features', []):
+            geometry = feature.get('geometry') or {}
+            if geometry.get('type') == 'LineString':
+                points = geometry['coordinates']
+            elif geometry.get('type') == 'MultiLineString':
+                points = [p for part in geometry['coordinates'] for p in part]
+            else:
+                continue
+            yield feature.get('properties') or {}, [tuple(p[:2]) for p in points]
+        return
+
+    try:
+        import shapefile
+    except ImportError:
+        raise SystemExit("Reading TIGER shapefiles needs pyshp: pip install pyshp")
+
+    with shapefile.Reader(path) as reader:
+        fields = [field[0] for field in reader.fields[1:]]
+        for shape_record in reader.iterShapeRecords():
+            properties = dict(zip(fields, shape_record.record))
+            yield properties, [tuple(p) for p in shape_record.shape.points]
+
+
+def edge_ranges(properties):
+    """Yield (zipcode, side, from_hn, to_hn) for each addressed side of an edge"""
+    for side in ('L', 'R'):
+        zipcode = (properties.get(f'ZIP{side}') or '').strip()
+        from_hn = _house_number(properties.get(f'{side}FROMHN'))
+        to_hn = _house_number(properties.get(f'{side}TOHN'))
+        if zipcode and from_hn is not None and to_hn is not None:
+            yield zipcode, side, from_hn, to_hn
+
+
+def edge_id(properties, encoded):
+    """The edge's TLID, or for exports without one a stable id from its geometry"""
+    tlid = properties.get('TLID')
+    if tlid not in (None, ''):
+        return int(tlid)
+    # Negative, so it cannot collide with a Census TLID
+    return -int(hashlib.sha256(encoded.encode()).hexdigest()[:15], 16)
+
+
+def build_index(paths, index_path=TIGER_INDEX_PATH):
+    """
+    Load ADDRFEAT files into the SQLite store. An edge side can carry
+    several ranges (one feature each); reloading a file replaces the ranges
+    it already added.
+    """
+    directory = os.path.dirname(index_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(index_path)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS ranges (
+            tlid INTEGER NOT NULL,
+            zipcode TEXT NOT NULL,
+            street TEXT NOT NULL,
+            side TEXT NOT NULL,
+            low INTEGER NOT NULL,
+            high INTEGER NOT NULL,
+            from_hn INTEGER NOT NULL,
+            to_hn INTEGER NOT NULL,
+            points TEXT NOT NULL,
+            PRIMARY KEY (tlid, side, from_hn, to_hn)
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS ranges_zip_street ON ranges (zipcode, street)")
+
+    total = 0
+    for path in paths:
+        start = time.time()
+        rows = []
+        for properties, points in read_addrfeat(path):
+            street = normalize_street(properties.get('FULLNAME') or '')
+            if not street or len(points) < 2:
+                continue
+            encoded = json.dumps([[round(lon, 6), round(lat, 6)] for lon, lat in points],
+                                 separators=(',', ':'))
+            for zipcode, side, from_hn, to_hn in edge_ranges(properties):
+                rows.append((
+                    edge_id(properties, encoded), zipcode, street, side,
+                    min(from_hn, to_hn), max(from_hn, to_hn), from_hn, to_hn, encoded
+                ))
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO ranges VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        total += len(rows)
+        print(f"  ✓ {os.path.basename(path)}: {len(rows)} address ranges ({time.time() - start:.1f}s)")
+
+    conn.close()
+    print(f"Indexed {total} address ranges into {index_path}")
+    return total
+
+
+def _meters_per_degree(lat):
+    """(meters per degree of longitude, meters per degree of latitude) at lat"""
+    return 111320 * math.cos(math.radians(lat)), 110540
+
+
+def interpolate(points, fraction, side=None, offset_meters=SIDE_OFFSET_METERS):
+    """
+    Walk `fraction` of the way along a (lon, lat) polyline, then step
+    offset_meters to the left or right of it. Returns (lat, lon).
+    """
+    mx, my = _meters_per_degree(points[0][1])
+    lengths = [
+        math.hypot((b[0] - a[0]) * mx, (b[1] - a[1]) * my)
+        for a, b in zip(points, points[1:])
+    ]
+    target = max(0.0, min(1.0, fraction)) * sum(lengths)
+
+    last = len(lengths) - 1
+    for i, ((a, b), length) in enumerate(zip(zip(points, points[1:]), lengths)):
+        if target <= length or i == last:
+            t = target / length if length else 0.0
+            lon = a[0] + (b[0] - a[0]) * t
+            lat = a[1] + (b[1] - a[1]) * t
+            if side and length:
+                # Unit normal in meters; left of travel direction is (-dy, dx)
+                dx, dy = (b[0] - a[0]) * mx / length, (b[1] - a[1]) * my / length
+                sign = 1 if side == 'L' else -1
+                lon += sign * -dy * offset_meters / mx
+                lat += sign * dx * offset_meters / my
+            return lat, lon
+        target -= length
+
+    return points[-1][1], points[-1][0]
+
+
+class TigerGeocoder:
+    """Address-range lookups against an index built by build_index()"""
+
+    tier = 'address'
+
+    def __init__(self, index_path=TIGER_INDEX_PATH):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(f"file:{index_path}?mode=ro", uri=True,
+                                    check_same_thread=False)
+
+    def locate(self, address, zipcode):
+        """Return interpolated (lat, lon) for a street address in a zip, or None"""
+        parsed = parse_address(address)
+        zipcode = (zipcode or '').strip()[:5]
+        if not parsed or not zipcode:
+            return None
+        number, street = parsed
+
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT side, from_hn, to_hn, points FROM ranges "
+                "WHERE zipcode = ? AND street = ? AND low <= ? AND high >= ?",
+                (zipcode, street, number, number)
+            ).fetchall()
+
+        # Prefer the side whose range has the same parity as the house number
+        rows.sort(key=lambda row: (row[1] % 2) != (number % 2))
+        for side, from_hn, to_hn, points in rows:
+            span = to_hn - from_hn
+            fraction = (number - from_hn) / span if span else 0.5
+            return interpolate(json.loads(points), fraction, side)
+        return None
+
+    def close(self):
+        self.conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline TIGER/Line address geocoder")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build = subparsers.add_parser('build', help="load ADDRFEAT files into the index")
+    build.add_argument('paths', nargs='+')
+    build.add_argument('--index', default=TIGER_INDEX_PATH)
+
+    lookup = subparsers.add_parser('lookup', help="geocode one street address")
+    lookup.add_argument('address')
+    lookup.add_argument('zipcode')
+    lookup.add_argument('--index', default=TIGER_INDEX_PATH)
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        build_index(args.paths, args.index)
+    else:
+        coords = TigerGeocoder(args.index).locate(args.address, args.zipcode)
+        if coords:
+            print(f"✓ {args.address}, {args.zipcode} → ({coords[0]:.6f}, {coords[1]:.6f})")
+        else:
+            print(f"✗ No address range found for {args.address}, {args.zipcode}")
+
+
+if __name__ == '__main__':
+    main()
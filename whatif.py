@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+What-if coverage edits: add, remove or move a center and see the effect
+on every zip at once, without recomputing all zips against all centers.
+
+The model keeps each zip's nearest and second-nearest center. Adding a
+center only touches zips it is closer to than their second-nearest: zips
+within INFLUENCE_MILES of it (found with the zip spatial index), plus the
+few remote zips whose second-nearest center is further away than that.
+Removing a center only recomputes the zips that had it as nearest or
+second-nearest. A move is a remove and an add. Each edit returns the zips
+whose nearest distance changed and the change in covered zips per radius
+band, nationally and by state.
+
+    python3 whatif.py add 35.19 -101.85 "Amarillo Regional"
+    python3 whatif.py --dataset tsc remove "Mission Hospital"
+    python3 whatif.py move "Mission Hospital" 35.6 -82.5
+    python3 whatif.py -i          # one edit per line, applied cumulatively
+"""
+
+import argparse
+import shlex
+import sys
+import time
+from dataclasses import dataclass, field
+
+try:
+    import numpy as np
+except ImportError:
+    raise SystemExit("What-if needs numpy: pip install numpy")
+
+from columnar import load_zipcode_arrays
+from coverage import MAP_RADIUS_MILES, RADIUS_BANDS
+from spatial_index import SpatialIndex, dot_to_miles, unit_vectors
+from zip_states import ZIP3_STATES
+
+# A new center can only displace a zip's second-nearest center within this
+# radius, except for the zips whose second-nearest is already further
+INFLUENCE_MILES = 250.0
+
+
+@dataclass
+class Impact:
+    """Effect of one edit"""
+    description: str
+    zips_changed: int = 0
+    # band → (zips within before, zips within after)
+    within: dict = field(default_factory=dict)
+    # state → change in zips within MAP_RADIUS_MILES, nonzero only
+    states: dict = field(default_factory=dict)
+    # (zip, miles before, miles after), largest changes first
+    largest: list = field(default_factory=list)
+    elapsed_ms: float = 0.0
+
+
+class WhatIf:
+    """Per-zip nearest / second-nearest centers of one dataset, editable"""
+
+    def __init__(self, dataset='csc'):
+        self.dataset = dataset
+        numbers, lat, lon = load_zipcode_arrays()
+        self.zips = numbers.astype(np.int64)
+        self.zip_index = SpatialIndex(lat.astype(np.float64), lon.astype(np.float64))
+        self.zip_vectors = self.zip_index.vectors
+        self.zip_states = np.array(ZIP3_STATES)[self.zips // 100]
+
+        centers = SpatialIndex.from_dataset(dataset)
+        self.records = list(centers.records)
+        self.center_vectors = centers.vectors.copy()
+        self.active = np.ones(len(self.records), dtype=bool)
+
+        nearest, miles = centers.nearest_many(self.zip_index.lat, self.zip_index.lon, 2)
+        self.first, self.second = nearest[:, 0].copy(), nearest[:, 1].copy()
+        self.first_miles, self.second_miles = miles[:, 0].copy(), miles[:, 1].copy()
+
+    # Lookups
+
+    def find(self, query):
+        """Center id from an id number or a (unique) case-insensitive name"""
+        if str(query).isdigit():
+            center = int(query)
+            if center < len(self.records) and self.active[center]:
+                return center
+            raise KeyError(f"No active center {center}")
+        text = str(query).strip().lower()
+        active = [i for i in range(len(self.records)) if self.active[i]]
+        exact = [i for i in active if self.records[i]['name'].lower() == text]
+        matches = exact or [i for i in active if text in self.records[i]['name'].lower()]
+        if len(matches) == 1:
+            return matches[0]
+        if not matches:
+            raise KeyError(f"No {self.dataset} center matches {query!r}")
+        names = '; '.join(f"{i}: {self.records[i]['name']}, {self.records[i]['state']}" for i in matches[:10])
+        raise KeyError(f"{query!r} matches {len(matches)} centers ({names}); use the number")
+
+    def within_counts(self):
+        """band → zips within it"""
+        return {band: int((self.first_miles <= band).sum()) for band in RADIUS_BANDS}
+
+    # Edits
+
+    def add(self, lat, lon, name='New center', state=''):
+        """Add a center; returns its id and the Impact"""
+        start = time.perf_counter()
+        center = len(self.records)
+        self.records.append({"name": name, "state": state, "latitude": lat, "longitude": lon})
+        self.center_vectors = np.vstack([self.center_vectors, unit_vectors([lat], [lon])])
+        self.active = np.append(self.active, True)
+
+        before = self._snapshot()
+        self._insert(center)
+        return center, self._impact(f"add {name} ({lat:.4f}, {lon:.4f})", before, start)
+
+    def remove(self, center):
+        start = time.perf_counter()
+        before = self._snapshot()
+        self._delete(center)
+        return self._impact(f"remove {self.records[center]['name']}", before, start)
+
+    def move(self, center, lat, lon):
+        start = time.perf_counter()
+        before = self._snapshot()
+        self._delete(center)
+        self.records[center] = dict(self.records[center], latitude=lat, longitude=lon)
+        self.center_vectors[center] = unit_vectors(lat, lon)
+        self.active[center] = True
+        self._insert(center)
+        return self._impact(f"move {self.records[center]['name']} to ({lat:.4f}, {lon:.4f})", before, start)
+
+    def _snapshot(self):
+        # Copy-on-write is not worth it: 33k floats copy in microseconds
+        return self.first_miles.copy()
+
+    def _insert(self, center):
+        """Update the zips the active center `center` is now nearest or second-nearest to"""
+        lat, lon = self.records[center]['latitude'], self.records[center]['longitude']
+        nearby = np.array([i for i, _ in self.zip_index.within(lat, lon, INFLUENCE_MILES)], dtype=np.int64)
+        remote = np.flatnonzero(self.second_miles > INFLUENCE_MILES)
+        candidates = np.union1d(nearby, remote)
+        if len(candidates) == 0:
+            return
+        miles = dot_to_miles(self.zip_vectors[candidates] @ self.center_vectors[center])
+
+        # Ties keep the existing (lower-numbered) center first, as nearest_many does
+        closer = ((miles < self.first_miles[candidates])
+                  | ((miles == self.first_miles[candidates]) & (center < self.first[candidates])))
+        second = ~closer & ((miles < self.second_miles[candidates])
+                            | ((miles == self.second_miles[candidates]) & (center < self.second[candidates])))
+
+        first_zips, second_zips = candidates[closer], candidates[second]
+        self.second[first_zips], self.second_miles[first_zips] = self.first[first_zips], self.first_miles[first_zips]
+        self.first[first_zips], self.first_miles[first_zips] = center, miles[closer]
+        self.second[second_zips], self.second_miles[second_zips] = center, miles[second]
+
+    def _delete(self, center):
+        """Deactivate `center` and recompute the zips that depended on it"""
+        if not self.active[center]:
+            raise KeyError(f"Center {center} is not active")
+        self.active[center] = False
+        affected = np.flatnonzero((self.first == center) | (self.second == center))
+        if len(affected) == 0:
+            return
+        active = np.flatnonzero(self.active)
+        dot = self.zip_vectors[affected] @ self.center_vectors[active].T
+        # Stable sort on -dot: ties go to the lower id
+        order = np.argsort(-dot, axis=1, kind='stable')[:, :2]
+        nearest = active[order]
+        miles = dot_to_miles(np.take_along_axis(dot, order, axis=1))
+        missing = nearest.shape[1]
+        self.first[affected], self.first_miles[affected] = (
+            (nearest[:, 0], miles[:, 0]) if missing > 0 else (-1, np.inf))
+        self.second[affected], self.second_miles[affected] = (
+            (nearest[:, 1], miles[:, 1]) if missing > 1 else (-1, np.inf))
+
+    def _impact(self, description, before, start):
+        after = self.first_miles
+        changed = np.flatnonzero(before != after)
+        impact = Impact(description, zips_changed=len(changed))
+        for band in RADIUS_BANDS:
+            impact.within[band] = (int((before <= band).sum()), int((after <= band).sum()))
+
+        if len(changed):
+            gained = (after[changed] <= MAP_RADIUS_MILES).astype(np.int64)
+            lost = (before[changed] <= MAP_RADIUS_MILES).astype(np.int64)
+            for state, delta in zip(self.zip_states[changed].tolist(), (gained - lost).tolist()):
+                if delta:
+                    impact.states[state] = impact.states.get(state, 0) + delta
+            impact.states = {s: d for s, d in sorted(impact.states.items()) if d}
+            # Distances may be inf when a dataset is emptied; rank those last
+            delta = np.abs(np.nan_to_num(after[changed] - before[changed], posinf=0.0, neginf=0.0))
+            top = changed[np.argsort(-delta, kind='stable')[:5]]
+            impact.largest = [(f"{z:05d}", float(before[i]), float(after[i]))
+                              for z, i in zip(self.zips[top].tolist(), top.tolist())]
+        impact.elapsed_ms = (time.perf_counter() - start) * 1000
+        return impact
+
+
+def print_impact(impact):
+    print(f"{impact.description}: {impact.zips_changed} zips changed ({impact.elapsed_ms:.1f} ms)")
+    for band, (before, after) in impact.within.items():
+        marker = '✓' if after > before else ('✗' if after < before else '=')
+        print(f"  {marker} within {band} miles: {before} → {after} zips ({after - before:+d})")
+    if impact.states:
+        print(f"  by state within {MAP_RADIUS_MILES} miles: "
+              + ', '.join(f"{state} {delta:+d}" for state, delta in impact.states.items()))
+    for zipcode, before, after in impact.largest:
+        print(f"    {zipcode}: {before:.1f} → {after:.1f} mi")
+
+
+def apply(model, words):
+    """Run one command (add / remove / move) against the model"""
+    command, args = words[0], words[1:]
+    if command == 'add' and len(args) >= 2:
+        _, impact = model.add(float(args[0]), float(args[1]), ' '.join(args[2:]) or 'New center')
+    elif command == 'remove' and len(args) == 1:
+        impact = model.remove(model.find(args[0]))
+    elif command == 'move' and len(args) == 3:
+        impact = model.move(model.find(args[0]), float(args[1]), float(args[2]))
+    else:
+        raise ValueError("usage: add LAT LON [NAME] | remove CENTER | move CENTER LAT LON")
+    print_impact(impact)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="What-if coverage edits for one center dataset")
+    parser.add_argument('--dataset', choices=('csc', 'tsc'), default='csc')
+    parser.add_argument('-i', '--interactive', action='store_true',
+                        help="read one command per line from stdin, applied cumulatively")
+    parser.add_argument('command', nargs=argparse.REMAINDER,
+                        help="add LAT LON [NAME] | remove CENTER | move CENTER LAT LON")
+    args = parser.parse_args()
+    if not args.interactive and not args.command:
+        parser.error("give a command or -i")
+
+    start = time.perf_counter()
+    model = WhatIf(args.dataset)
+    print(f"Loaded {int(model.active.sum())} {args.dataset.upper()}s and {len(model.zips)} zips "
+          f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    if not args.interactive:
+        try:
+            apply(model, args.command)
+        except (KeyError, ValueError) as e:
+            raise SystemExit(str(e).strip('"'))
+        return
+
+    for line in sys.stdin:
+        words = shlex.split(line)
+        if not words or words[0].startswith('#'):
+            continue
+        try:
+            apply(model, words)
+        except (KeyError, ValueError) as e:
+            print(f"✗ {str(e).strip(chr(34))}")
+
+
+if __name__ == '__main__':
+    main()